@@ -0,0 +1,44 @@
+import asyncio
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .push import user_group_name
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Streams the connected user's new notifications.
+
+    Notifications that arrive within ``NOTIFICATION_PUSH_COALESCE_SECONDS`` of
+    each other are sent as one ``notifications`` frame, so a burst costs the
+    client a single message.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.group_name = user_group_name(user.pk)
+        self.pending = []
+        self.flush_task = None
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if getattr(self, 'flush_task', None) is not None:
+            self.flush_task.cancel()
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        self.pending.append(event['notification'])
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_after_delay())
+
+    async def flush_after_delay(self):
+        await asyncio.sleep(settings.NOTIFICATION_PUSH_COALESCE_SECONDS)
+        pending, self.pending = self.pending, []
+        self.flush_task = None
+        await self.send_json({'type': 'notifications', 'notifications': pending})
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0001_initial'),
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationFanout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_key', models.CharField(max_length=255, unique=True)),
+                ('notification_type', models.CharField(choices=[('follow', 'New Follower'), ('friend_request', 'Friend Request'), ('message', 'New Message'), ('comment', 'New Comment'), ('review', 'New Review'), ('like', 'New Like'), ('nearby_entity', 'Nearby Entity'), ('entity_update', 'Entity Update'), ('product_update', 'Product Update'), ('service_update', 'Service Update')], max_length=20)),
+                ('content', models.TextField()),
+                ('last_recipient_id', models.BigIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_fanouts', to='entities.entity')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_notificationfanout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notifications_read_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'created_at'], name='notification_unread_idx'),
+        ),
+    ]
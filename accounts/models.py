@@ -1,9 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.gis.db import models
 from django.contrib.gis.geos import Point
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from . import social_graph
+
 class User(AbstractUser):
     location = models.PointField(geography=True, null=True, blank=True)
     bio = models.TextField(max_length=500, blank=True)
@@ -16,7 +19,9 @@ class User(AbstractUser):
     favorite_entities = models.ManyToManyField('entities.Entity', related_name='favorited_by', blank=True)
     blocked_users = models.ManyToManyField('self', symmetrical=False, related_name='blocked_by', blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_entity = models.BooleanField(default=False)
+    notifications_read_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -28,37 +33,28 @@ class User(AbstractUser):
         self.save()
 
     def add_friend(self, user):
-        if user not in self.friends.all():
-            self.friends.add(user)
-            user.friends.add(self)
+        social_graph.add_friend(self, user)
 
     def remove_friend(self, user):
-        self.friends.remove(user)
-        user.friends.remove(self)
+        social_graph.remove_friend(self, user)
 
     def follow(self, user):
-        if user not in self.following.all():
-            self.following.add(user)
+        social_graph.follow(self, user)
 
     def unfollow(self, user):
-        self.following.remove(user)
+        social_graph.unfollow(self, user)
 
     def add_close_friend(self, user):
-        if user not in self.close_friends.all():
-            self.close_friends.add(user)
+        social_graph.add_relation('close_friends', self, user)
 
     def remove_close_friend(self, user):
-        self.close_friends.remove(user)
+        social_graph.remove_relation('close_friends', self, user)
 
     def block_user(self, user):
-        if user not in self.blocked_users.all():
-            self.blocked_users.add(user)
-            self.friends.remove(user)
-            self.following.remove(user)
-            self.followers.remove(user)
+        social_graph.block(self, user)
 
     def unblock_user(self, user):
-        self.blocked_users.remove(user)
+        social_graph.unblock(self, user)
 
 class UserPreferences(models.Model):
     user = models.OneToOneField("accounts.User", on_delete=models.CASCADE, related_name='preferences')
@@ -111,10 +107,52 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Only unread rows, so unread counts stay cheap however much history a user has.
+            models.Index(fields=['recipient', 'created_at'], condition=Q(is_read=False), name='notification_unread_idx'),
+            # The paginated feed: a user's notifications newest first.
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_feed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_notification_type_display()} for {self.recipient.username}"
 
+    @property
+    def is_unread(self):
+        # Rows at or before the recipient's read watermark count as read.
+        watermark = self.recipient.notifications_read_until
+        return not self.is_read and (watermark is None or self.created_at > watermark)
+
     def mark_as_read(self):
+        from .notification_counters import decrement_unread_count
+
+        was_unread = self.is_unread
         self.is_read = True
-        self.save()
+        self.save(update_fields=['is_read'])
+        if was_unread:
+            decrement_unread_count(self.recipient_id)
+
+
+class NotificationFanout(models.Model):
+    """
+    Progress of delivering one event's notification to every follower of an
+    entity. Keyed by the event so a retried or duplicated fan-out resumes from
+    the last recipient instead of notifying anyone twice.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+    )
+
+    event_key = models.CharField(max_length=255, unique=True)
+    entity = models.ForeignKey('entities.Entity', on_delete=models.CASCADE, related_name='notification_fanouts')
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    content = models.TextField()
+    last_recipient_id = models.BigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Fan-out {self.event_key} ({self.get_status_display()})"
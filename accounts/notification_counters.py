@@ -0,0 +1,68 @@
+"""
+Per-user unread notification counters kept in the cache.
+
+The cached value is adjusted in place on create and read. A missing key is
+recomputed from the partial unread index on the next read, and keys expire so
+that any drift from a lost update heals itself.
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+UNREAD_COUNT_TIMEOUT = 60 * 60
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def count_unread(user):
+    """
+    Count unread notifications in the database, honouring the read watermark.
+    """
+    from .models import Notification
+
+    queryset = Notification.objects.filter(recipient_id=user.pk, is_read=False)
+    if user.notifications_read_until is not None:
+        queryset = queryset.filter(created_at__gt=user.notifications_read_until)
+    return queryset.count()
+
+
+def get_unread_count(user):
+    count = cache.get(_key(user.pk))
+    if count is None:
+        count = count_unread(user)
+        cache.set(_key(user.pk), count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def increment_unread_counts(user_ids, amount=1):
+    for user_id in user_ids:
+        try:
+            cache.incr(_key(user_id), amount)
+        except ValueError:
+            # Not cached yet; the next read counts from the database.
+            pass
+
+
+def decrement_unread_count(user_id, amount=1):
+    try:
+        if cache.decr(_key(user_id), amount) < 0:
+            cache.delete(_key(user_id))
+    except ValueError:
+        pass
+
+
+def reset_unread_count(user_id):
+    cache.set(_key(user_id), 0, UNREAD_COUNT_TIMEOUT)
+
+
+def mark_all_read(user):
+    """
+    Mark every current notification read by moving the user's watermark: a
+    single-row write however many notifications are unread.
+    """
+    from .models import User
+
+    user.notifications_read_until = timezone.now()
+    User.objects.filter(pk=user.pk).update(notifications_read_until=user.notifications_read_until)
+    reset_unread_count(user.pk)
@@ -0,0 +1,39 @@
+"""
+Pushing new notifications to their recipients over WebSockets.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+
+def user_group_name(user_id):
+    return f'notifications.user.{user_id}'
+
+
+def notification_payload(notification):
+    # Flat on purpose: building it must not query related rows.
+    return {
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+        'content': notification.content,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+        'sender': notification.sender_id,
+        'related_object_id': notification.related_object_id,
+        'related_object_type': notification.related_object_type,
+    }
+
+
+def push_notifications(notifications):
+    """
+    Send each notification to its recipient's group. Recipients without an
+    open socket are simply not subscribed to their group.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    group_send = async_to_sync(channel_layer.group_send)
+    for notification in notifications:
+        group_send(user_group_name(notification.recipient_id), {
+            'type': 'notification.created',
+            'notification': notification_payload(notification),
+        })
@@ -2,22 +2,25 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
+from utils.image_variants import ImageVariantsField
+from utils.query_plan import QueryPlanMixin
 from .models import Notification, UserPreferences, SocialMediaAccount
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(QueryPlanMixin, serializers.ModelSerializer):
     email = serializers.EmailField(
         required=True,
         validators=[UniqueValidator(queryset=User.objects.all())]
     )
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
+    profile_picture_variants = ImageVariantsField()
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'password', 'password2', 'email', 'first_name', 'last_name', 'location', 'bio', 'birth_date', 'phone_number', 'is_private', 'is_entity', 'profile_picture', 'created_at', 'updated_at')
+        fields = ('id', 'username', 'password', 'password2', 'email', 'first_name', 'last_name', 'location', 'bio', 'birth_date', 'phone_number', 'is_private', 'is_entity', 'profile_picture', 'profile_picture_variants', 'created_at', 'updated_at')
         extra_kwargs = {
             'first_name': {'required': True},
             'last_name': {'required': True}
@@ -46,10 +49,12 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(QueryPlanMixin, serializers.ModelSerializer):
+    profile_picture_variants = ImageVariantsField()
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'location', 'bio', 'birth_date', 'phone_number', 'is_private', 'is_entity', 'profile_picture', 'created_at', 'updated_at')
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'location', 'bio', 'birth_date', 'phone_number', 'is_private', 'is_entity', 'profile_picture', 'profile_picture_variants', 'created_at', 'updated_at')
         read_only_fields = ('email', 'created_at', 'updated_at')
 
 
@@ -72,10 +77,13 @@ class ResetPasswordSerializer(serializers.Serializer):
         return attrs
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(QueryPlanMixin, serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     recipient = UserSerializer(read_only=True)
 
+    select_related_fields = ('sender', 'recipient')
+    expandable_fields = ('sender', 'recipient')
+
     class Meta:
         model = Notification
         fields = ['id', 'sender', 'recipient', 'notification_type', 'content', 'is_read', 'created_at', 'related_object_id', 'related_object_type']
@@ -83,6 +91,7 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
+        representation['is_read'] = not instance.is_unread
         if instance.notification_type in ['friend_request', 'message']:
             representation.pop('related_object_id', None)
             representation.pop('related_object_type', None)
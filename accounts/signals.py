@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.conditional import bump_version, bump_version_on_commit
+from utils.image_variants import schedule_image_variants, variants_ready
+
+from .models import Notification, User
+from .notification_counters import increment_unread_counts
+from .push import push_notifications
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    # bulk_create skips this signal; bulk writers push explicitly.
+    if created:
+        transaction.on_commit(lambda: push_notifications([instance]))
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: increment_unread_counts([instance.recipient_id]))
+
+
+@receiver(post_save, sender=User)
+def queue_profile_picture_variants(sender, instance, **kwargs):
+    schedule_image_variants(instance, 'profile_picture')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is not serialized.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_version_on_commit(User, instance.pk)
+
+
+@receiver(variants_ready, sender=User)
+def bump_user_version_for_variants(sender, pk, **kwargs):
+    bump_version(User, pk)
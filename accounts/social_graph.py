@@ -0,0 +1,172 @@
+"""
+Friend, follow and block relations between users.
+
+Membership checks are single ``EXISTS`` queries against the join tables, so
+they cost the same for a user with ten followers as for one with fifty
+thousand. Follower and following counts are cached and dropped on change.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+SOCIAL_COUNT_TIMEOUT = 60 * 60
+
+
+def _user_model():
+    from .models import User
+    return User
+
+
+def _through(field_name):
+    return getattr(_user_model(), field_name).through
+
+
+def _follow_count_keys(user_id):
+    return [f'social:followers:{user_id}', f'social:following:{user_id}']
+
+
+def _invalidate_follow_counts(user_ids):
+    cache.delete_many([key for user_id in user_ids for key in _follow_count_keys(user_id)])
+
+
+def _both_ways(user, other):
+    return Q(from_user_id=user.pk, to_user_id=other.pk) | Q(from_user_id=other.pk, to_user_id=user.pk)
+
+
+def has_relation(field_name, user, other):
+    """
+    Whether ``user`` -> ``other`` exists in the given self-referential relation
+    ('friends', 'following', 'close_friends' or 'blocked_users').
+    """
+    return _through(field_name).objects.filter(from_user_id=user.pk, to_user_id=other.pk).exists()
+
+
+def is_following(user, other):
+    return has_relation('following', user, other)
+
+
+def is_friend(user, other):
+    return has_relation('friends', user, other)
+
+
+def is_blocked(user, other):
+    """
+    Whether either user has blocked the other.
+    """
+    return _through('blocked_users').objects.filter(_both_ways(user, other)).exists()
+
+
+def add_relation(field_name, user, other):
+    """
+    Add ``user`` -> ``other`` unless it already exists.
+    """
+    Through = _through(field_name)
+    Through.objects.bulk_create([Through(from_user_id=user.pk, to_user_id=other.pk)], ignore_conflicts=True)
+
+
+def remove_relation(field_name, user, other):
+    _through(field_name).objects.filter(from_user_id=user.pk, to_user_id=other.pk).delete()
+
+
+def add_friend(user, other):
+    # Friendship is symmetrical: one row per direction, written together.
+    Friend = _through('friends')
+    Friend.objects.bulk_create([
+        Friend(from_user_id=user.pk, to_user_id=other.pk),
+        Friend(from_user_id=other.pk, to_user_id=user.pk),
+    ], ignore_conflicts=True)
+
+
+def remove_friend(user, other):
+    _through('friends').objects.filter(_both_ways(user, other)).delete()
+
+
+def follow(user, other):
+    return follow_many(user, [other.pk]) == 1
+
+
+def unfollow(user, other):
+    return unfollow_many(user, [other.pk]) == 1
+
+
+def follow_many(user, user_ids):
+    """
+    Follow every user in ``user_ids`` in one insert, skipping the user
+    themselves, unknown ids, anyone already followed and anyone in a block
+    either way. Returns how many were newly followed.
+    """
+    Follow = _through('following')
+    Block = _through('blocked_users')
+    user_ids = set(user_ids) - {user.pk}
+    if not user_ids:
+        return 0
+    # ignore_conflicts does not cover foreign key violations.
+    user_ids = set(_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    if not user_ids:
+        return 0
+
+    blocks = Block.objects.filter(
+        Q(from_user_id=user.pk, to_user_id__in=user_ids) | Q(to_user_id=user.pk, from_user_id__in=user_ids)
+    ).values_list('from_user_id', 'to_user_id')
+    blocked = {to_id if from_id == user.pk else from_id for from_id, to_id in blocks}
+    already = set(Follow.objects.filter(from_user_id=user.pk, to_user_id__in=user_ids).values_list('to_user_id', flat=True))
+    new_ids = user_ids - blocked - already
+    if not new_ids:
+        return 0
+
+    Follow.objects.bulk_create(
+        [Follow(from_user_id=user.pk, to_user_id=user_id) for user_id in new_ids], ignore_conflicts=True
+    )
+    _invalidate_follow_counts([user.pk, *new_ids])
+    return len(new_ids)
+
+
+def unfollow_many(user, user_ids):
+    """
+    Unfollow every user in ``user_ids`` with one delete. Only the users
+    actually unfollowed have their cached counts dropped.
+    """
+    follows = _through('following').objects.filter(from_user_id=user.pk, to_user_id__in=set(user_ids))
+    followed_ids = list(follows.values_list('to_user_id', flat=True))
+    if not followed_ids:
+        return 0
+    deleted, _ = follows.filter(to_user_id__in=followed_ids).delete()
+    if deleted:
+        _invalidate_follow_counts([user.pk, *followed_ids])
+    return deleted
+
+
+@transaction.atomic
+def block(user, other):
+    """
+    Block ``other`` and sever friendship, close-friendship and follows in both
+    directions, all in one transaction.
+    """
+    Block = _through('blocked_users')
+    Block.objects.bulk_create([Block(from_user_id=user.pk, to_user_id=other.pk)], ignore_conflicts=True)
+
+    for field_name in ('friends', 'close_friends', 'following'):
+        _through(field_name).objects.filter(_both_ways(user, other)).delete()
+    transaction.on_commit(lambda: _invalidate_follow_counts([user.pk, other.pk]))
+
+
+def unblock(user, other):
+    remove_relation('blocked_users', user, other)
+
+
+def follower_count(user):
+    key = f'social:followers:{user.pk}'
+    count = cache.get(key)
+    if count is None:
+        count = _through('following').objects.filter(to_user_id=user.pk).count()
+        cache.set(key, count, SOCIAL_COUNT_TIMEOUT)
+    return count
+
+
+def following_count(user):
+    key = f'social:following:{user.pk}'
+    count = cache.get(key)
+    if count is None:
+        count = _through('following').objects.filter(from_user_id=user.pk).count()
+        cache.set(key, count, SOCIAL_COUNT_TIMEOUT)
+    return count
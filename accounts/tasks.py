@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationFanout, User
+from .notification_counters import increment_unread_counts
+from .push import push_notifications
+
+
+def _next_follower_ids(entity_id, after_id, limit):
+    # Entity followers are the users who favorited it; walk the join table by
+    # user id so each chunk is an index range scan.
+    Follow = User.favorite_entities.through
+    return list(
+        Follow.objects.filter(entity_id=entity_id, user_id__gt=after_id)
+        .order_by('user_id')
+        .values_list('user_id', flat=True)[:limit]
+    )
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def fan_out_notification(self, fanout_id):
+    """
+    Notify every follower of a fan-out's entity, one chunk per transaction.
+
+    The chunk's notifications and the fan-out cursor are committed together,
+    so a retry after a crash picks up exactly where the last chunk ended.
+    """
+    chunk_size = settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    try:
+        while True:
+            with transaction.atomic():
+                fanout = NotificationFanout.objects.select_for_update().get(pk=fanout_id)
+                if fanout.status == 'done':
+                    return fanout.sent_count
+
+                recipient_ids = _next_follower_ids(fanout.entity_id, fanout.last_recipient_id, chunk_size)
+                if not recipient_ids:
+                    fanout.status = 'done'
+                    fanout.save(update_fields=['status', 'updated_at'])
+                    return fanout.sent_count
+
+                notifications = Notification.objects.bulk_create([
+                    Notification(
+                        recipient_id=recipient_id,
+                        notification_type=fanout.notification_type,
+                        content=fanout.content,
+                        related_object_id=fanout.entity_id,
+                        related_object_type='entity',
+                    )
+                    for recipient_id in recipient_ids
+                ])
+                fanout.last_recipient_id = recipient_ids[-1]
+                fanout.sent_count += len(recipient_ids)
+                fanout.save(update_fields=['last_recipient_id', 'sent_count', 'updated_at'])
+                transaction.on_commit(lambda notifications=notifications: push_notifications(notifications))
+                transaction.on_commit(lambda recipient_ids=recipient_ids: increment_unread_counts(recipient_ids))
+    except NotificationFanout.DoesNotExist:
+        return 0
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+@shared_task
+def resume_notification_fanouts():
+    """
+    Re-queue fan-outs left pending, e.g. after a worker died mid-run. Runs
+    from the beat schedule; fan-outs that made progress recently are left to
+    the worker running them.
+    """
+    stalled_before = timezone.now() - timedelta(seconds=settings.NOTIFICATION_FANOUT_STALL_SECONDS)
+    pending_ids = list(
+        NotificationFanout.objects.filter(status='pending', updated_at__lt=stalled_before).values_list('pk', flat=True)
+    )
+    for fanout_id in pending_ids:
+        fan_out_notification.delay(fanout_id)
+    return len(pending_ids)
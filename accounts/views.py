@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.tokens import default_token_generator
+from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.utils.encoding import force_bytes
@@ -13,11 +15,16 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .serializers import UserSerializer, NotificationSerializer
-from .models import Notification, User
+from utils.conditional import ConditionalGetMixin
+from utils.query_plan import QueryPlanViewSetMixin
+from .models import Notification, NotificationFanout, User
+from .notification_counters import get_unread_count, mark_all_read, reset_unread_count
+from . import social_graph
+from .tasks import fan_out_notification
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
@@ -81,6 +88,54 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'])
+    def follow(self, request, pk=None):
+        user = self.get_object()
+        if user.pk == request.user.pk:
+            return Response({'error': 'Cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        if social_graph.is_blocked(request.user, user):
+            return Response({'error': 'Cannot follow this user'}, status=status.HTTP_403_FORBIDDEN)
+        social_graph.follow(request.user, user)
+        return Response({'status': f'Following {user.username}'})
+
+    @action(detail=True, methods=['post'])
+    def unfollow(self, request, pk=None):
+        user = self.get_object()
+        social_graph.unfollow(request.user, user)
+        return Response({'status': f'Unfollowed {user.username}'})
+
+    @action(detail=False, methods=['post'])
+    def follow_many(self, request):
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list) or not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+            return Response({'error': 'user_ids must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        followed = social_graph.follow_many(request.user, user_ids)
+        return Response({'followed': followed})
+
+    @action(detail=False, methods=['post'])
+    def unfollow_many(self, request):
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list) or not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+            return Response({'error': 'user_ids must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        unfollowed = social_graph.unfollow_many(request.user, user_ids)
+        return Response({'unfollowed': unfollowed})
+
+    @action(detail=True, methods=['post'])
+    def block(self, request, pk=None):
+        user = self.get_object()
+        if user.pk == request.user.pk:
+            return Response({'error': 'Cannot block yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        request.user.block_user(user)
+        return Response({'status': f'Blocked {user.username}'})
+
+    @action(detail=True, methods=['get'])
+    def social_counts(self, request, pk=None):
+        user = self.get_object()
+        return Response({
+            'followers': social_graph.follower_count(user),
+            'following': social_graph.following_count(user),
+        })
+
 class PasswordResetConfirmView(APIView):
     permission_classes = [AllowAny]
 
@@ -102,41 +157,51 @@ class PasswordResetConfirmView(APIView):
         else:
             return Response({'error': 'Invalid reset link'}, status=status.HTTP_400_BAD_REQUEST)
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(QueryPlanViewSetMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        return super().get_queryset().filter(recipient=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(recipient=self.request.user)
+
+    @action(detail=False, methods=['GET'])
+    def unread_count(self, request):
+        return Response({'unread_count': get_unread_count(request.user)})
 
     @action(detail=False, methods=['POST'])
     def mark_all_as_read(self, request):
-        notifications = self.get_queryset().filter(is_read=False)
-        notifications.update(is_read=True)
+        if settings.NOTIFICATION_READ_WATERMARK:
+            mark_all_read(request.user)
+        else:
+            notifications = Notification.objects.filter(recipient=request.user, is_read=False)
+            notifications.update(is_read=True)
+            reset_unread_count(request.user.pk)
         return Response({'status': 'All notifications marked as read'})
 
     @action(detail=True, methods=['POST'])
     def mark_as_read(self, request, pk=None):
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        notification.mark_as_read()
         return Response({'status': 'Notification marked as read'})
 
     @action(detail=False, methods=['DELETE'])
     def clear_all(self, request):
-        self.get_queryset().delete()
+        Notification.objects.filter(recipient=request.user).delete()
+        reset_unread_count(request.user.pk)
         return Response({'status': 'All notifications cleared'}, status=status.HTTP_204_NO_CONTENT)
 
 def create_notification(user, notification_type, content_object=None, message=None):
     notification = Notification.objects.create(
-        user=user,
+        recipient=user,
         notification_type=notification_type,
-        content_object=content_object,
-        message=message
+        content=message or '',
+        related_object_id=content_object.pk if content_object is not None else None,
+        related_object_type=content_object._meta.model_name if content_object is not None else None,
     )
     return notification
 
@@ -158,7 +223,29 @@ def create_nearby_user_notification(user, nearby_user):
     message = f"{nearby_user.username} is nearby."
     return create_notification(user, 'nearby_user', nearby_user, message)
 
-def create_entity_update_notification(entity, update_type):
-    message = f"{entity.name} has a new {update_type}."
-    for follower in entity.followers.all():
-        create_notification(follower, 'entity_update', entity, message)
+def create_entity_update_notification(entity, update_type, update_object=None, event_id=None):
+    """
+    Queue a notification to every follower of ``entity``.
+
+    The fan-out runs in a Celery task. It is keyed by (entity, update), so
+    calling this again for the same update does not notify twice. The update
+    is identified by ``update_object`` or, for updates without a row of their
+    own, by a caller-chosen ``event_id``; one of them is required.
+    """
+    if update_object is not None:
+        event_key = f"entity:{entity.pk}:{update_type}:{update_object._meta.model_name}:{update_object.pk}"
+    elif event_id is not None:
+        event_key = f"entity:{entity.pk}:{update_type}:{event_id}"
+    else:
+        raise ValueError('An entity update notification needs an update_object or an event_id')
+    fanout, created = NotificationFanout.objects.get_or_create(
+        event_key=event_key,
+        defaults={
+            'entity': entity,
+            'notification_type': 'entity_update',
+            'content': f"{entity.name} has a new {update_type}.",
+        },
+    )
+    if fanout.status != 'done':
+        transaction.on_commit(lambda: fan_out_notification.delay(fanout.pk))
+    return fanout
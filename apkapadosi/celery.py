@@ -0,0 +1,18 @@
+"""
+Celery application for apkapadosi.
+
+Workers are started with ``celery -A apkapadosi worker``, and the periodic
+tasks in ``CELERY_BEAT_SCHEDULE`` with ``celery -A apkapadosi beat``. Without
+a broker (``REDIS_URL`` unset) tasks run eagerly in-process, which is what
+tests use.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apkapadosi.settings')
+
+app = Celery('apkapadosi')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -32,6 +32,7 @@ ALLOWED_HOSTS = ['*']
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',   # ASGI runserver; must precede django.contrib.staticfiles
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -39,14 +40,17 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',   # enable geodjango
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_gis',
+    'channels',
     'nested_admin',
     
     'accounts',
     'entities',
     'listings',
+    'maps',
 ]
 
 MIDDLEWARE = [
@@ -78,6 +82,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'apkapadosi.wsgi.application'
+ASGI_APPLICATION = 'apkapadosi.asgi.application'
 
 
 # Database
@@ -152,7 +157,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'utils.pagination.KeysetCursorPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -179,3 +184,138 @@ MEDIA_TYPES = [
 ]
 
 POSTGIS_DATABASE_CONFIG = DATABASES['default']
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Celery: tasks run eagerly in-process unless a broker is configured
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL or 'memory://')
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', '0' if REDIS_URL else '1') == '1'
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+
+# Periodic tasks, run by `celery -A apkapadosi beat` (intervals in seconds)
+CELERY_BEAT_SCHEDULE = {
+    'resume-notification-fanouts': {
+        'task': 'accounts.tasks.resume_notification_fanouts',
+        'schedule': 5 * 60,
+    },
+    'flush-listing-views': {
+        'task': 'listings.tasks.flush_listing_views',
+        'schedule': 60,
+    },
+    'sweep-listings': {
+        'task': 'listings.tasks.sweep_listings',
+        'schedule': 15 * 60,
+    },
+}
+
+# Channels: Redis layer when available, in-memory (single process) otherwise
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+    }
+
+# Shared cache: Redis when available, per-process memory otherwise
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        },
+    }
+
+# Seconds a user's EntityUser roles are cached for permission checks (0 = per request only)
+ENTITY_ROLE_CACHE_TIMEOUT = 30
+
+# Mark-all-read moves a per-user watermark instead of updating every unread row
+NOTIFICATION_READ_WATERMARK = True
+
+# Notifications arriving within this many seconds go out in one WebSocket frame
+NOTIFICATION_PUSH_COALESCE_SECONDS = 0.5
+
+# Followers notified per transaction when fanning out a notification
+NOTIFICATION_FANOUT_CHUNK_SIZE = 1000
+
+# Pending fan-outs idle this many seconds are re-queued by `resume_notification_fanouts`
+NOTIFICATION_FANOUT_STALL_SECONDS = 5 * 60
+
+# Listing view counts are buffered here and flushed by `flush_listing_views`:
+# 'redis' (shared across workers) or 'local' (per-process, for dev and tests)
+LISTING_VIEW_COUNTER_BACKEND = os.environ.get('LISTING_VIEW_COUNTER_BACKEND', 'redis' if REDIS_URL else 'local')
+
+# Listing search: 'postgres' (full-text + trigram) or 'basic' (icontains scan)
+LISTING_SEARCH_BACKEND = os.environ.get('LISTING_SEARCH_BACKEND', 'postgres')
+
+# Map clusters: grid cells per tile side, and seconds a tile's clusters are cached
+MAP_CLUSTER_GRID_SIZE = 8
+MAP_CLUSTER_CACHE_TIMEOUT = 300
+
+# Seconds a rendered vector tile is cached; edits invalidate affected tiles sooner
+MAP_TILE_CACHE_TIMEOUT = 60 * 60
+
+# Seconds an entity detail snapshot lives in the cache; writes rebuild it sooner
+ENTITY_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+# Seconds a conditional-GET version stamp lives in the cache; a stamp that
+# expires is recreated on the next read at the cost of one full response
+CONDITIONAL_VERSION_TIMEOUT = 24 * 60 * 60
+
+# Resized copies generated in the background for uploaded images: name -> longest side in px
+IMAGE_VARIANT_SIZES = {
+    'thumb': 160,
+    'medium': 640,
+    'large': 1280,
+}
+
+# Uploads stream to temporary files through a handler that sniffs the real
+# type and enforces per-kind size limits while the body is still arriving.
+FILE_UPLOAD_HANDLERS = [
+    'utils.uploads.SniffingUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_SIZES = {
+    'image': 5 * 1024 * 1024,
+    'video': 100 * 1024 * 1024,
+    'document': 5 * 1024 * 1024,
+}
+# Whole multipart bodies larger than this are refused before being read
+UPLOAD_MAX_REQUEST_SIZE = 250 * 1024 * 1024
+
+# Home feed (listings.feed): listings kept per user, newest candidates scored per
+# build, and seconds a built feed is cached
+FEED_SIZE = 500
+FEED_CANDIDATE_LIMIT = 5000
+FEED_TIMEOUT = 6 * 60 * 60
+
+# Home feed ranking: recency half-life, featured multiplier, and the distance at
+# which proximity halves a listing's score
+FEED_RECENCY_HALF_LIFE_HOURS = 72
+FEED_FEATURED_BOOST = 2.0
+FEED_DISTANCE_SCALE_KM = 2.0
+
+# New listings are pushed into cached feeds of users this close; users who move
+# less than the threshold keep their feed
+FEED_MAX_RADIUS_KM = 50
+FEED_MOVE_THRESHOLD_KM = 1.0
+
+# Listing sweeper (`sweep_listings`): listings changed per transaction, and days a
+# listing stays expired or sold out before it is archived
+LISTING_SWEEP_BATCH_SIZE = 500
+LISTING_ARCHIVE_AFTER_DAYS = 30
+
+# Featured listings (listings.featured): tile zoom of a geocell (13 is ~4 km
+# across in Delhi), listings kept per cell and category, listings returned, and
+# seconds buckets and cards are cached (ratings on cards refresh on this timer)
+FEATURED_CELL_ZOOM = 13
+FEATURED_PER_CELL = 50
+FEATURED_LIMIT = 20
+FEATURED_CACHE_TIMEOUT = 10 * 60
@@ -15,6 +15,7 @@ urlpatterns = [
     path('', include('accounts.urls')),
     path('', include('entities.urls')),
     path('', include('listings.urls')),
+    path('', include('maps.urls')),
 ]
 
 if settings.DEBUG:
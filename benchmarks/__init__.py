@@ -0,0 +1,13 @@
+"""
+End-to-end API benchmarks.
+
+Seeds a throwaway test database with a synthetic Delhi dataset, drives the
+main endpoints in-process and reports p50/p95/p99 latency, throughput and SQL
+queries per request::
+
+    python -m benchmarks --listings 20000 --requests 200 --save bench.json
+    python -m benchmarks --baseline bench.json --threshold 15
+
+With ``--baseline`` the run exits non-zero if any endpoint's p95 latency or
+query count grew by more than the threshold.
+"""
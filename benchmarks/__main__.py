@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the API benchmark suite.')
+    volumes = parser.add_argument_group('dataset')
+    volumes.add_argument('--users', type=int, default=200)
+    volumes.add_argument('--entities', type=int, default=500)
+    volumes.add_argument('--listings', type=int, default=5000)
+    volumes.add_argument('--reviews', type=int, default=10000)
+    volumes.add_argument('--notifications', type=int, default=20000)
+    volumes.add_argument('--seed', type=int, default=0, help='RNG seed for the dataset and request mix')
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per endpoint')
+    parser.add_argument('--only', help='comma-separated endpoint names to run')
+    parser.add_argument('--save', help='write results as JSON to this path')
+    parser.add_argument('--baseline', help='compare with results previously saved with --save')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed regression in percent')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apkapadosi.settings')
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .runner import compare, format_table, load_results, run, save_results
+    from .seed import SeedVolumes, seed
+
+    volumes = SeedVolumes(
+        users=args.users,
+        entities=args.entities,
+        listings=args.listings,
+        reviews=args.reviews,
+        notifications=args.notifications,
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f'Seeding {volumes} ...', file=sys.stderr)
+        users = seed(volumes, seed=args.seed)
+        only = set(args.only.split(',')) if args.only else None
+        results = run(users[0], requests=args.requests, only=only, seed=args.seed)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    print(format_table(results))
+    if args.save:
+        save_results(results, args.save)
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), threshold_pct=args.threshold)
+        print()
+        for name, metric, before, after, change, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f'{name:<28}{metric:<22}{before:>10} -> {after:<10}{change:+.1f}%{flag}')
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
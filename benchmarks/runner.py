@@ -0,0 +1,156 @@
+"""
+Drive API endpoints in-process and report latency, throughput and SQL counts.
+"""
+import json
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .seed import DELHI_CENTER, DELHI_SPREAD_DEGREES
+
+
+@dataclass
+class EndpointResult:
+    name: str
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput_rps: float
+    queries_per_request: float
+
+
+def build_scenarios():
+    """
+    Return (name, url factory) pairs for the endpoints under test. Factories
+    take the RNG so that each request hits a different place or term.
+    """
+    from entities.models import Entity
+    from listings.models import Collection
+
+    collection_ids = list(Collection.objects.values_list('pk', flat=True)[:50])
+    entity_ids = list(Entity.objects.values_list('pk', flat=True)[:200])
+    # 'tution' is misspelt on purpose so that trigram matching is exercised.
+    terms = ['phone', 'laptop', 'sweets', 'plumbing', 'chair', 'tution', 'bakery']
+
+    def around_delhi(path):
+        def factory(rng):
+            lat = DELHI_CENTER[0] + rng.uniform(-DELHI_SPREAD_DEGREES, DELHI_SPREAD_DEGREES) / 2
+            lon = DELHI_CENTER[1] + rng.uniform(-DELHI_SPREAD_DEGREES, DELHI_SPREAD_DEGREES) / 2
+            return f'{path}?lat={lat:.5f}&lon={lon:.5f}&radius=5'
+        return factory
+
+    def delhi_viewport(rng):
+        lat = DELHI_CENTER[0] + rng.uniform(-DELHI_SPREAD_DEGREES, DELHI_SPREAD_DEGREES) / 2
+        lon = DELHI_CENTER[1] + rng.uniform(-DELHI_SPREAD_DEGREES, DELHI_SPREAD_DEGREES) / 2
+        return f'/map/clusters/?zoom=13&bbox={lon - 0.05:.5f},{lat - 0.04:.5f},{lon + 0.05:.5f},{lat + 0.04:.5f}'
+
+    return [
+        ('entity_nearby', around_delhi('/entities/nearby/')),
+        ('entity_detail', lambda rng: f'/entities/{rng.choice(entity_ids)}/'),
+        ('entity_search', lambda rng: f'/entities/search/?q={rng.choice(terms)}'),
+        ('listing_search', lambda rng: f'/products/search/?q={rng.choice(terms)}'),
+        ('collection_items', lambda rng: f'/collections/{rng.choice(collection_ids)}/items/'),
+        ('map_clusters', delhi_viewport),
+        ('notifications', lambda rng: '/notifications/'),
+        ('notifications_unread_count', lambda rng: '/notifications/unread_count/'),
+    ]
+
+
+def percentile(samples, pct):
+    """
+    Linear-interpolated percentile of a non-empty list of samples.
+    """
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def run_endpoint(client, name, url_factory, requests, rng, warmup=3):
+    for _ in range(warmup):
+        client.get(url_factory(rng))
+
+    timings, query_counts, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        url = url_factory(rng)
+        with CaptureQueriesContext(connection) as queries:
+            request_started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - request_started) * 1000)
+        query_counts.append(len(queries))
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    return EndpointResult(
+        name=name,
+        requests=requests,
+        errors=errors,
+        p50_ms=round(percentile(timings, 50), 2),
+        p95_ms=round(percentile(timings, 95), 2),
+        p99_ms=round(percentile(timings, 99), 2),
+        throughput_rps=round(requests / elapsed, 1),
+        queries_per_request=round(statistics.mean(query_counts), 1),
+    )
+
+
+def run(user, requests=100, only=None, seed=0):
+    """
+    Benchmark every scenario as ``user`` and return a list of results.
+    """
+    from rest_framework.test import APIClient
+
+    rng = random.Random(seed)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    results = []
+    for name, url_factory in build_scenarios():
+        if only and name not in only:
+            continue
+        results.append(run_endpoint(client, name, url_factory, requests, rng))
+    return results
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump({result.name: asdict(result) for result in results}, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold_pct=20.0):
+    """
+    Compare results with a stored baseline. Returns rows of
+    (name, metric, baseline, current, change %, regressed) for p95 latency and
+    query count; a regression is a rise of more than ``threshold_pct``.
+    """
+    rows = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        for metric in ('p95_ms', 'queries_per_request'):
+            before, after = previous[metric], getattr(result, metric)
+            change = ((after - before) / before * 100) if before else 0.0
+            rows.append((result.name, metric, before, after, round(change, 1), change > threshold_pct))
+    return rows
+
+
+def format_table(results):
+    header = f"{'endpoint':<28}{'reqs':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(
+            f'{r.name:<28}{r.requests:>6}{r.errors:>5}{r.p50_ms:>9}{r.p95_ms:>9}'
+            f'{r.p99_ms:>9}{r.throughput_rps:>9}{r.queries_per_request:>9}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,146 @@
+"""
+Synthetic Delhi dataset for benchmarks.
+
+Everything is written with ``bulk_create`` so seeding tens of thousands of rows
+takes seconds. The same ``seed`` value always produces the same dataset.
+"""
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+from faker import Faker
+
+# Connaught Place; points are scattered within ~20 km of it.
+DELHI_CENTER = (28.6315, 77.2167)
+DELHI_SPREAD_DEGREES = 0.18
+
+CATEGORY_TREE = {
+    'Electronics': ['Mobiles', 'Laptops', 'Audio'],
+    'Home': ['Furniture', 'Kitchen', 'Decor'],
+    'Services': ['Plumbing', 'Tutoring', 'Salon'],
+    'Food': ['Sweets', 'Groceries', 'Bakery'],
+}
+
+
+@dataclass
+class SeedVolumes:
+    users: int = 200
+    entities: int = 500
+    listings: int = 5000
+    reviews: int = 10000
+    notifications: int = 20000
+    collections: int = 100
+    follows_per_user: int = 10
+
+
+def random_delhi_point(rng):
+    lat = DELHI_CENTER[0] + rng.uniform(-DELHI_SPREAD_DEGREES, DELHI_SPREAD_DEGREES)
+    lon = DELHI_CENTER[1] + rng.uniform(-DELHI_SPREAD_DEGREES, DELHI_SPREAD_DEGREES)
+    return Point(lon, lat, srid=4326)
+
+
+def seed(volumes=None, seed=0, batch_size=1000):
+    """
+    Populate the current database and return the created users (the first one
+    is the user the benchmark requests run as).
+    """
+    from accounts.models import Notification, User
+    from entities.models import Entity, EntityUser
+    from listings.models import Category, Collection, Listing, Review
+    from listings.ratings import reconcile_ratings
+    from listings.search import update_search_vector
+
+    volumes = volumes or SeedVolumes()
+    rng = random.Random(seed)
+    fake = Faker('en_IN')
+    fake.seed_instance(seed)
+    now = timezone.now()
+
+    users = User.objects.bulk_create([
+        User(
+            username=f'bench_{i}_{fake.user_name()}'[:150],
+            email=fake.email(),
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            location=random_delhi_point(rng),
+        )
+        for i in range(volumes.users)
+    ], batch_size=batch_size)
+
+    categories = []
+    for parent_name, children in CATEGORY_TREE.items():
+        parent = Category.objects.create(category_name=parent_name)
+        categories.extend(Category.objects.create(category_name=name, parent_category=parent) for name in children)
+
+    entities = Entity.objects.bulk_create([
+        Entity(
+            name=fake.company(),
+            description=fake.catch_phrase(),
+            location=random_delhi_point(rng),
+            address=fake.address(),
+            contact_info=f'+91{rng.randint(7000000000, 9999999999)}',
+            email=fake.company_email(),
+            deals_in=[rng.choice(list(CATEGORY_TREE))],
+        )
+        for _ in range(volumes.entities)
+    ], batch_size=batch_size)
+    EntityUser.objects.bulk_create([
+        EntityUser(entity=entity, user=rng.choice(users), role='admin', is_creator=True)
+        for entity in entities
+    ], batch_size=batch_size, ignore_conflicts=True)
+
+    listings = Listing.objects.bulk_create([
+        Listing(
+            vendor=vendor,
+            category=rng.choice(categories),
+            title=fake.sentence(nb_words=4).rstrip('.'),
+            description=fake.paragraph(nb_sentences=3),
+            price=round(rng.uniform(50, 50000), 2),
+            listing_type=rng.choice(['product', 'product', 'service', 'event']),
+            condition=rng.choice(['new', 'used']),
+            availability_status=rng.choice(['available', 'available', 'sold_out']),
+            location=vendor.location,
+            expiry_date=now + timedelta(days=rng.randint(-30, 90)),
+            is_featured=rng.random() < 0.05,
+        )
+        for vendor in (rng.choice(entities) for _ in range(volumes.listings))
+    ], batch_size=batch_size)
+    # bulk_create bypasses the post_save signal that maintains the search index.
+    update_search_vector([listing.pk for listing in listings])
+
+    Review.objects.bulk_create([
+        Review(
+            listing=rng.choice(listings),
+            user=rng.choice(users),
+            rating=rng.randint(1, 5),
+            review_text=fake.sentence(),
+        )
+        for _ in range(volumes.reviews)
+    ], batch_size=batch_size)
+    # Same for the review signals that maintain the rating aggregates.
+    reconcile_ratings()
+
+    for _ in range(volumes.collections):
+        collection = Collection.objects.create(name=fake.bs().title(), entity=rng.choice(entities))
+        collection.listings.add(*rng.sample(listings, min(len(listings), 20)))
+
+    Favorite = User.favorite_entities.through
+    Favorite.objects.bulk_create([
+        Favorite(user_id=user.pk, entity_id=entity.pk)
+        for user in users
+        for entity in rng.sample(entities, min(len(entities), volumes.follows_per_user))
+    ], batch_size=batch_size, ignore_conflicts=True)
+
+    Notification.objects.bulk_create([
+        Notification(
+            recipient=rng.choice(users[:10]),
+            notification_type=rng.choice(['follow', 'review', 'entity_update']),
+            content=fake.sentence(),
+            is_read=rng.random() < 0.5,
+        )
+        for _ in range(volumes.notifications)
+    ], batch_size=batch_size)
+
+    return users
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entity',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entitymedia',
+            name='file_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+BACKFILL = """
+    UPDATE entities_entity e SET
+        review_count = l.review_count,
+        rating_sum = l.rating_sum,
+        rating_average = l.rating_sum::float8 / l.review_count,
+        rating_1_count = l.rating_1_count,
+        rating_2_count = l.rating_2_count,
+        rating_3_count = l.rating_3_count,
+        rating_4_count = l.rating_4_count,
+        rating_5_count = l.rating_5_count
+    FROM (
+        SELECT vendor_id, sum(review_count) AS review_count, sum(rating_sum) AS rating_sum,
+               sum(rating_1_count) AS rating_1_count, sum(rating_2_count) AS rating_2_count,
+               sum(rating_3_count) AS rating_3_count, sum(rating_4_count) AS rating_4_count,
+               sum(rating_5_count) AS rating_5_count
+        FROM listings_listing GROUP BY vendor_id HAVING sum(review_count) > 0
+    ) l
+    WHERE l.vendor_id = e.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0002_image_variants'),
+        ('listings', '0005_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entity',
+            name='rating_1_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='rating_2_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='rating_3_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='rating_4_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='rating_5_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='rating_average',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='review_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='entity',
+            index=models.Index(models.OrderBy(models.F('rating_average'), descending=True, nulls_last=True), models.OrderBy(models.F('review_count'), descending=True), models.OrderBy(models.F('id'), descending=True), name='entity_rating_idx'),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
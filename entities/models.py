@@ -1,9 +1,11 @@
 from django.contrib.gis.db import models
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.db.models import F
+from listings.models import RatingAggregates
 from utils.validators import validate_coordinates, validate_phone_number, validate_website_url, validate_image_file, validate_document_file
 
-class Entity(models.Model):
+class Entity(RatingAggregates):
     name = models.CharField(max_length=255)
     description = models.TextField()
     location = models.PointField(validators=[validate_coordinates])
@@ -12,6 +14,7 @@ class Entity(models.Model):
     email = models.EmailField()
     website = models.URLField(blank=True, null=True, validators=[validate_website_url])
     logo = models.ImageField(upload_to='entity_logos/', blank=True, null=True, validators=[validate_image_file])
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
     documents = ArrayField(models.FileField(upload_to='entity_documents/', validators=[validate_document_file]), blank=True, null=True)
     deals_in = ArrayField(models.CharField(max_length=100), blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -23,6 +26,11 @@ class Entity(models.Model):
     social_media_links = models.JSONField(default=dict, blank=True, null=True)
     additional_info = models.JSONField(default=dict, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(F('rating_average').desc(nulls_last=True), F('review_count').desc(), F('id').desc(), name='entity_rating_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -59,6 +67,7 @@ class EntityMedia(models.Model):
     entity = models.ForeignKey(Entity, on_delete=models.CASCADE, related_name='media')
     media_type = models.CharField(max_length=10, choices=MEDIA_TYPES)
     file = models.FileField(upload_to='entity_media/', blank=True, null=True)
+    file_variants = models.JSONField(default=dict, blank=True, editable=False)
     url = models.URLField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
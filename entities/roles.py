@@ -0,0 +1,69 @@
+"""
+Resolve a user's roles on entities from ``EntityUser``.
+
+All memberships of the requesting user are loaded with one query and memoized
+on the request, so any number of permission checks in that request share it.
+They can also be cached for ``ENTITY_ROLE_CACHE_TIMEOUT`` seconds; the cache is
+dropped whenever one of the user's memberships changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+REQUEST_ATTR = '_entity_roles'
+
+
+def _cache_key(user_id):
+    return f'entity_roles:{user_id}'
+
+
+def load_entity_roles(user_id):
+    """
+    Map entity id -> (role, permission) for every membership of the user.
+    """
+    from .models import EntityUser
+
+    memberships = EntityUser.objects.filter(user_id=user_id).values_list('entity_id', 'role', 'permission')
+    return {entity_id: (role, permission) for entity_id, role, permission in memberships}
+
+
+def get_entity_roles(request):
+    roles = getattr(request, REQUEST_ATTR, None)
+    if roles is not None:
+        return roles
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        roles = {}
+    elif settings.ENTITY_ROLE_CACHE_TIMEOUT:
+        roles = cache.get(_cache_key(user.pk))
+        if roles is None:
+            roles = load_entity_roles(user.pk)
+            cache.set(_cache_key(user.pk), roles, settings.ENTITY_ROLE_CACHE_TIMEOUT)
+    else:
+        roles = load_entity_roles(user.pk)
+    setattr(request, REQUEST_ATTR, roles)
+    return roles
+
+
+def invalidate_entity_roles(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def is_entity_admin(request, entity_id):
+    role = get_entity_roles(request).get(entity_id)
+    return role is not None and role[0] == 'admin'
+
+
+def is_entity_member(request, entity_id):
+    return entity_id in get_entity_roles(request)
+
+
+def can_edit_entity(request, entity_id):
+    """
+    Admins can always edit; collaborators unless limited to 'view'.
+    """
+    role = get_entity_roles(request).get(entity_id)
+    if role is None:
+        return False
+    role_name, permission = role
+    return role_name == 'admin' or permission != 'view'
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.gis.geos import Point
+from utils.image_variants import ImageVariantsField
+from utils.query_plan import QueryPlanMixin
 from .models import Entity, EntityUser, EntityMedia
 
 class EntityUserSerializer(serializers.ModelSerializer):
@@ -8,18 +10,25 @@ class EntityUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'role', 'permission', 'is_creator']
 
 class EntityMediaSerializer(serializers.ModelSerializer):
+    file_variants = ImageVariantsField()
+
     class Meta:
         model = EntityMedia
-        fields = ['id', 'media_type', 'file', 'url']
+        fields = ['id', 'media_type', 'file', 'file_variants', 'url']
 
-class EntitySerializer(serializers.ModelSerializer):
+class EntitySerializer(QueryPlanMixin, serializers.ModelSerializer):
     location = serializers.SerializerMethodField()
     users = EntityUserSerializer(many=True, read_only=True)
     media = EntityMediaSerializer(many=True, read_only=True)
+    logo_variants = ImageVariantsField()
+    rating_histogram = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    prefetch_related_fields = ('users', 'media')
+    expandable_fields = ('users', 'media')
 
     class Meta:
         model = Entity
-        fields = ['id', 'name', 'description', 'location', 'address', 'contact_info', 'email', 'website', 'logo', 'documents', 'deals_in', 'is_active', 'users', 'media', 'business_hours', 'amenities', 'payment_methods', 'social_media_links', 'additional_info']
+        fields = ['id', 'name', 'description', 'location', 'address', 'contact_info', 'email', 'website', 'logo', 'logo_variants', 'documents', 'deals_in', 'is_active', 'users', 'media', 'business_hours', 'amenities', 'payment_methods', 'social_media_links', 'additional_info', 'review_count', 'rating_average', 'rating_histogram']
 
     def get_location(self, obj):
         if obj.location:
@@ -47,9 +56,16 @@ class EntitySerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class EntityListSerializer(serializers.ModelSerializer):
-    distance = serializers.FloatField(read_only=True)
+class EntityListSerializer(QueryPlanMixin, serializers.ModelSerializer):
+    distance = serializers.SerializerMethodField()
 
     class Meta:
         model = Entity
-        fields = ['id', 'name', 'description', 'location', 'distance']
\ No newline at end of file
+        fields = ['id', 'name', 'description', 'location', 'distance', 'review_count', 'rating_average']
+
+    def get_distance(self, obj):
+        # Present only when the queryset was annotated with a Distance (in km).
+        distance = getattr(obj, 'distance', None)
+        if distance is None:
+            return None
+        return round(distance.km, 3)
\ No newline at end of file
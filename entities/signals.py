@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from listings.models import Listing, Review
+from utils.image_variants import schedule_image_variants, variants_ready
+
+from .models import Entity, EntityMedia, EntityUser
+from .roles import invalidate_entity_roles
+from .snapshots import drop_snapshot, schedule_snapshot_rebuild
+
+
+@receiver(post_save, sender=EntityUser)
+@receiver(post_delete, sender=EntityUser)
+def drop_cached_entity_roles(sender, instance, **kwargs):
+    invalidate_entity_roles(instance.user_id)
+
+
+@receiver(post_save, sender=Entity)
+def refresh_entity_snapshot(sender, instance, **kwargs):
+    schedule_snapshot_rebuild(instance.pk)
+
+
+@receiver(post_delete, sender=Entity)
+def drop_entity_snapshot(sender, instance, **kwargs):
+    drop_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=EntityUser)
+@receiver(post_delete, sender=EntityUser)
+@receiver(post_save, sender=EntityMedia)
+@receiver(post_delete, sender=EntityMedia)
+def refresh_snapshot_for_related(sender, instance, **kwargs):
+    schedule_snapshot_rebuild(instance.entity_id)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def refresh_snapshot_for_listing(sender, instance, update_fields=None, **kwargs):
+    # View-count flushes and other bookkeeping saves do not change the summary.
+    if update_fields is not None and not {'title', 'price', 'listing_type', 'availability_status', 'category'} & set(update_fields):
+        return
+    schedule_snapshot_rebuild(instance.vendor_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_snapshot_for_review(sender, instance, **kwargs):
+    # The rating aggregates are written with update(), which skips post_save.
+    vendor_id = Listing.objects.filter(pk=instance.listing_id).values_list('vendor_id', flat=True).first()
+    if vendor_id is not None:
+        schedule_snapshot_rebuild(vendor_id)
+
+
+@receiver(post_save, sender=Entity)
+def queue_logo_variants(sender, instance, **kwargs):
+    schedule_image_variants(instance, 'logo')
+
+
+@receiver(post_save, sender=EntityMedia)
+def queue_media_variants(sender, instance, **kwargs):
+    # Videos and 360 tours are served as uploaded.
+    if instance.media_type == 'image':
+        schedule_image_variants(instance, 'file')
+
+
+@receiver(variants_ready, sender=Entity)
+@receiver(variants_ready, sender=EntityMedia)
+def refresh_snapshot_for_variants(sender, pk, **kwargs):
+    # Variants are written with update(), which skips post_save.
+    entity_id = pk if sender is Entity else EntityMedia.objects.filter(pk=pk).values_list('entity_id', flat=True).first()
+    if entity_id is not None:
+        schedule_snapshot_rebuild(entity_id)
@@ -0,0 +1,93 @@
+"""
+Precomputed entity detail snapshots.
+
+An entity's detail payload (the entity, its users, media and a summary of its
+listings) is rendered to JSON once and cached as bytes. Detail reads return
+those bytes as-is; writes to any of the underlying rows schedule a rebuild in
+the background, and the previous snapshot keeps being served until it lands.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from listings.models import Listing
+from utils.conditional import bump_version
+
+from .models import Entity
+from .serializers import EntitySerializer
+
+SNAPSHOT_LISTING_LIMIT = 20
+# The snapshot is the fully expanded detail; it costs nothing per request.
+SNAPSHOT_EXPAND = {'users', 'media'}
+# How long a scheduled rebuild suppresses further scheduling for the same entity.
+REBUILD_DEBOUNCE_SECONDS = 60
+
+
+def snapshot_key(entity_id):
+    return f'entities:snapshot:{entity_id}'
+
+
+def _pending_key(entity_id):
+    return f'entities:snapshot:pending:{entity_id}'
+
+
+def render_snapshot(entity_id):
+    """
+    The snapshot bytes for an entity, or ``None`` if it does not exist.
+    """
+    entity = EntitySerializer.setup_eager_loading(Entity.objects.filter(pk=entity_id), (None, SNAPSHOT_EXPAND)).first()
+    if entity is None:
+        return None
+
+    data = EntitySerializer(entity, expand=SNAPSHOT_EXPAND).data
+    listings = Listing.objects.filter(vendor_id=entity_id).exclude(availability_status='archived').order_by('-listing_date')
+    data['listing_count'] = listings.count()
+    data['listings'] = [
+        {**listing, 'price': str(listing['price'])}
+        for listing in listings.values('id', 'title', 'price', 'listing_type', 'availability_status', 'category', 'review_count', 'rating_average')[:SNAPSHOT_LISTING_LIMIT]
+    ]
+    return JSONRenderer().render(data)
+
+
+def rebuild_snapshot(entity_id):
+    cache.delete(_pending_key(entity_id))
+    data = render_snapshot(entity_id)
+    if data is None:
+        cache.delete(snapshot_key(entity_id))
+    else:
+        cache.set(snapshot_key(entity_id), data, settings.ENTITY_SNAPSHOT_TIMEOUT)
+    return data
+
+
+def get_snapshot(entity_id):
+    """
+    Cached snapshot bytes, built inline on a miss. ``None`` if the entity
+    does not exist.
+    """
+    data = cache.get(snapshot_key(entity_id))
+    if data is None:
+        data = rebuild_snapshot(entity_id)
+    return data
+
+
+def schedule_snapshot_rebuild(entity_id):
+    """
+    Queue a rebuild once the current transaction commits. Repeated calls while
+    one is already queued are dropped.
+    """
+    from .tasks import rebuild_entity_snapshot
+
+    def enqueue():
+        if cache.add(_pending_key(entity_id), 1, REBUILD_DEBOUNCE_SECONDS):
+            rebuild_entity_snapshot.delay(entity_id)
+
+    transaction.on_commit(enqueue)
+
+
+def drop_snapshot(entity_id):
+    def drop():
+        cache.delete_many([snapshot_key(entity_id), _pending_key(entity_id)])
+        bump_version(Entity, entity_id)
+
+    transaction.on_commit(drop)
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from utils.conditional import bump_version
+
+from .models import Entity
+from .snapshots import rebuild_snapshot
+
+
+@shared_task(ignore_result=True)
+def rebuild_entity_snapshot(entity_id):
+    rebuild_snapshot(entity_id)
+    # Only now does the detail response change; see utils.conditional.
+    bump_version(Entity, entity_id)
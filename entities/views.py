@@ -1,32 +1,68 @@
-from django.contrib.gis.db.models.functions import Distance
-from django.contrib.gis.geos import Point
-from django.contrib.gis.measure import D
+from django.contrib.gis.geos import Polygon
+from django.core.exceptions import ValidationError
 from django.db.models import Q
+from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Entity, EntityUser, EntityMedia
 from .serializers import EntitySerializer, EntityListSerializer, EntityUserSerializer, EntityMediaSerializer
+from .snapshots import get_snapshot
+from listings.importers import IMPORT_FORMATS, ListingImportError, import_listings
 from listings.models import Listing, Service
-from listings.serializers import ListingSerializer, ServiceSerializer
+from listings.ratings import filter_min_rating, rating_ordering
+from listings.serializers import ListingSerializer, ListingListSerializer, ServiceSerializer
+from utils.conditional import ConditionalGetMixin, get_version
+from utils.geo_utils import annotate_distances, create_point, get_bounding_box, order_by_nearest
+from utils.pagination import DistanceCursorPagination
 from utils.permissions import IsEntityAdmin, IsEntityCollaborator
+from utils.query_plan import QueryPlanViewSetMixin, plan_queryset
 from utils.validators import validate_coordinates
 
-class EntityViewSet(viewsets.ModelViewSet):
+class EntityViewSet(ConditionalGetMixin, QueryPlanViewSetMixin, viewsets.ModelViewSet):
     queryset = Entity.objects.all()
+    serializer_class = EntitySerializer
     permission_classes = [IsAuthenticated]
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'search', 'nearby']:
             return EntityListSerializer
-        return EntitySerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_min_rating(queryset, self.request.query_params)
+        return queryset
+
+    @property
+    def ordering(self):
+        return rating_ordering(self.request.query_params) or ('-id',)
 
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
             return [IsAuthenticated(), IsEntityAdmin()]
         return super().get_permissions()
 
+    def retrieve(self, request, *args, **kwargs):
+        # The version is bumped when the snapshot is rebuilt, so it validates both paths.
+        return self.conditional(request, get_version(Entity, kwargs['pk']), self.retrieve_snapshot, *args, **kwargs)
+
+    def retrieve_snapshot(self, request, *args, **kwargs):
+        if 'fields' in request.query_params or 'expand' in request.query_params:
+            # A custom shape is serialized on demand; retrieve() already did
+            # the conditional check, so skip ConditionalGetMixin's.
+            return viewsets.ModelViewSet.retrieve(self, request, *args, **kwargs)
+        # Served straight from the cached snapshot bytes; see entities.snapshots.
+        try:
+            data = get_snapshot(int(kwargs['pk']))
+        except ValueError:
+            data = None
+        if data is None:
+            return Response({'error': 'Entity not found'}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(data, content_type='application/json')
+
     def perform_create(self, serializer):
         entity = serializer.save()
         EntityUser.objects.create(entity=entity, user=self.request.user, role='admin', is_creator=True)
@@ -54,6 +90,27 @@ class EntityViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsEntityCollaborator])
+    def import_products(self, request, pk=None):
+        """
+        Bulk import listings from an uploaded CSV or JSON Lines ``file``.
+        Invalid rows are skipped and reported; valid ones are created.
+        """
+        entity = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get('format') or ('jsonl' if upload.name.lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+        if fmt not in IMPORT_FORMATS:
+            return Response({'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = import_listings(upload, entity.id, fmt=fmt)
+        except ListingImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def search(self, request):
         query = request.query_params.get('q', '')
@@ -72,17 +129,51 @@ class EntityViewSet(viewsets.ModelViewSet):
 
         if lat and lon:
             try:
-                lat, lon = validate_coordinates(lat, lon)
-                user_location = Point(float(lon), float(lat), srid=4326)
-                queryset = queryset.annotate(
-                    distance=Distance('location', user_location)
-                ).filter(location__distance_lte=(user_location, D(km=radius)))
-            except ValueError as e:
-                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-        serializer = EntityListSerializer(queryset, many=True)
+                validate_coordinates(lat, lon)
+                radius = float(radius)
+            except ValidationError as e:
+                return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+            except ValueError:
+                return Response({'error': 'radius must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+            # The bounding box is an index lookup; exact distances are then
+            # computed for all the candidates at once.
+            bbox = Polygon.from_bbox(get_bounding_box(lat, lon, radius))
+            bbox.srid = 4326
+            queryset = annotate_distances(queryset.filter(location__contained=bbox), create_point(lat, lon), radius)
+
+        serializer = EntityListSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Nearest-first entity search around ``lat``/``lon``, paged by a
+        (distance, id) cursor so deep pages cost the same as the first one.
+        """
+        query = request.query_params.get('q', '')
+        lat = request.query_params.get('lat')
+        lon = request.query_params.get('lon')
+        if lat is None or lon is None:
+            return Response({'error': 'lat and lon are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            validate_coordinates(lat, lon)
+            radius = float(request.query_params.get('radius', 10))  # Default radius: 10km
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'error': 'Invalid radius'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        if query:
+            queryset = queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+        queryset = order_by_nearest(queryset, create_point(lat, lon), radius_km=radius)
+
+        paginator = DistanceCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = EntityListSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def add_user(self, request, pk=None):
         entity = self.get_object()
@@ -114,11 +205,11 @@ class EntityViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], serializer_class=ListingListSerializer)
     def products(self, request, pk=None):
         entity = self.get_object()
-        products = Listing.objects.filter(vendor=entity, listing_type='product')
-        serializer = ListingSerializer(products, many=True)
+        products = plan_queryset(Listing.objects.filter(vendor=entity, listing_type='product'), ListingListSerializer, request)
+        serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
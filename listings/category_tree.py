@@ -0,0 +1,70 @@
+"""
+The category tree, served from a versioned cache.
+
+The whole tree is built from one query ordered by materialized path and cached
+under the current version. Category writes bump the version, so readers move
+to a fresh key and the stale tree simply expires.
+"""
+from django.core.cache import cache
+
+from .models import Category
+
+TREE_VERSION_KEY = 'categories:tree:version'
+TREE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _tree_key(version):
+    return f'categories:tree:{version}'
+
+
+def get_tree_version():
+    version = cache.get(TREE_VERSION_KEY)
+    if version is None:
+        cache.add(TREE_VERSION_KEY, 1, None)
+        version = cache.get(TREE_VERSION_KEY, 1)
+    return version
+
+
+def bump_tree_version():
+    try:
+        cache.incr(TREE_VERSION_KEY)
+    except ValueError:
+        # No version yet; the next read starts one.
+        pass
+
+
+def build_tree(rows):
+    """
+    Nest ``(id, category_name, parent_id, path, depth)`` rows, ordered by
+    path, into ``{'roots': [...], 'paths': {id: path}}``.
+    """
+    nodes, roots, paths = {}, [], {}
+    for pk, name, parent_id, path, depth in rows:
+        node = {'id': pk, 'category_name': name, 'depth': depth, 'children': []}
+        nodes[pk] = node
+        paths[pk] = path
+        parent = nodes.get(parent_id)
+        (parent['children'] if parent else roots).append(node)
+    return {'roots': roots, 'paths': paths}
+
+
+def get_category_tree():
+    key = _tree_key(get_tree_version())
+    tree = cache.get(key)
+    if tree is None:
+        rows = Category.objects.order_by('path').values_list('id', 'category_name', 'parent_category_id', 'path', 'depth')
+        tree = build_tree(rows)
+        cache.set(key, tree, TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def get_subtree_ids(category_id, tree=None):
+    """
+    Ids of a category and all its descendants, read from the cached tree.
+    Unknown ids give an empty list.
+    """
+    paths = (tree or get_category_tree())['paths']
+    prefix = paths.get(category_id)
+    if prefix is None:
+        return []
+    return [pk for pk, path in paths.items() if path.startswith(prefix)]
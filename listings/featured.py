@@ -0,0 +1,150 @@
+"""
+Featured listings for landing screens, served from the cache.
+
+Featured live listings are bucketed by geocell (the XYZ tile containing them
+at ``FEATURED_CELL_ZOOM``) and by category: a bucket holds
+``(id, expiry timestamp, lon, lat)`` for the featured listings in one cell
+and one category subtree, or every category. Each listing's card payload is
+cached once under its own key and shared by all buckets it is in.
+
+A request reads the 3x3 block of buckets around the user, then the cards for
+the nearest entries: two ``get_many`` calls and no database query on a warm
+cache. Missing buckets are built with one query each, missing cards with one
+query between them.
+
+Signals (``listings.signals``) drop a listing's card when it is saved, and
+its buckets when it enters or leaves them: featured flag, availability,
+location, category or expiry. Entries past their expiry are skipped on read,
+so the sweeper's bulk updates need no invalidation of their own.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+
+from maps.tiles import lonlat_to_tile, tile_lonlat_bounds
+from utils.geo_utils import haversine_km
+
+from .category_tree import get_category_tree, get_subtree_ids
+from .models import Listing
+from .serializers import ListingCardSerializer
+
+
+def cell_for(lon, lat):
+    return lonlat_to_tile(lon, lat, settings.FEATURED_CELL_ZOOM)
+
+
+def bucket_key(cell, category_id=None):
+    x, y = cell
+    return f"listings:featured:{settings.FEATURED_CELL_ZOOM}:{x}:{y}:{category_id or 'all'}"
+
+
+def card_key(listing_id):
+    return f'listings:featured:card:{listing_id}'
+
+
+def neighbourhood(cell):
+    """
+    The cell and the eight around it (fewer at the poles).
+    """
+    x, y = cell
+    n = 2 ** settings.FEATURED_CELL_ZOOM
+    return [((x + dx) % n, y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if 0 <= y + dy < n]
+
+
+def bucket_categories(category_id, tree=None):
+    """
+    The category buckets a listing in ``category_id`` belongs to: ``None``
+    (every category), its category and that category's ancestors.
+    """
+    if category_id is None:
+        return [None]
+    paths = (tree or get_category_tree())['paths']
+    path = paths.get(category_id)
+    if path is None:
+        return [None, category_id]
+    return [None, *(pk for pk, prefix in paths.items() if path.startswith(prefix))]
+
+
+def build_bucket(cell, category_id=None):
+    bbox = Polygon.from_bbox(tile_lonlat_bounds(settings.FEATURED_CELL_ZOOM, *cell))
+    bbox.srid = 4326
+    queryset = Listing.active.filter(is_featured=True, location__contained=bbox)
+    if category_id is not None:
+        queryset = queryset.filter(category_id__in=get_subtree_ids(category_id))
+    rows = queryset.order_by('-listing_date', '-id').values_list('id', 'expiry_date', 'location')[:settings.FEATURED_PER_CELL]
+    bucket = [(pk, expiry_date.timestamp(), location.x, location.y) for pk, expiry_date, location in rows]
+    cache.set(bucket_key(cell, category_id), bucket, settings.FEATURED_CACHE_TIMEOUT)
+    return bucket
+
+
+def build_cards(listing_ids):
+    """
+    Render and cache cards for listings; ``{card key: card}``.
+    """
+    listings = ListingCardSerializer.setup_eager_loading(Listing.objects.filter(pk__in=listing_ids))
+    cards = {card_key(card['id']): card for card in ListingCardSerializer(listings, many=True).data}
+    cache.set_many(cards, settings.FEATURED_CACHE_TIMEOUT)
+    return cards
+
+
+def featured_listings(lon, lat, category_id=None, limit=None):
+    """
+    Cards for the featured listings nearest to a point, nearest first, each
+    with its ``distance`` in km.
+    """
+    keys = {bucket_key(cell, category_id): cell for cell in neighbourhood(cell_for(lon, lat))}
+    buckets = cache.get_many(list(keys))
+    for key, cell in keys.items():
+        if key not in buckets:
+            buckets[key] = build_bucket(cell, category_id)
+
+    now = time.time()
+    # A listing on a cell border is inside both cells' boxes; keep it once.
+    entries = list({entry[0]: entry for bucket in buckets.values() for entry in bucket if entry[1] > now}.values())
+    if not entries:
+        return []
+    ids, _, lons, lats = (np.array(column) for column in zip(*entries))
+    distances = haversine_km(lat, lon, lats, lons)
+    nearest = np.argsort(distances, kind='stable')[:limit or settings.FEATURED_LIMIT]
+
+    wanted = [card_key(int(ids[i])) for i in nearest]
+    cards = cache.get_many(wanted)
+    missing = [int(ids[i]) for i, key in zip(nearest, wanted) if key not in cards]
+    if missing:
+        cards.update(build_cards(missing))
+    # A listing deleted since its bucket was built has no card; skip it.
+    return [
+        {**cards[key], 'distance': round(float(distances[i]), 3)}
+        for i, key in zip(nearest, wanted) if key in cards
+    ]
+
+
+def placement(listing):
+    """
+    What decides which buckets a listing is in, read without loading
+    deferred fields.
+    """
+    fields = listing.__dict__
+    return (
+        fields.get('is_featured'), fields.get('availability_status'), fields.get('location'),
+        fields.get('category_id'), fields.get('expiry_date'),
+    )
+
+
+def invalidate_listing(listing_id, placements=()):
+    """
+    Drop a listing's card, and the buckets for each ``placement()`` given in
+    which it was featured.
+    """
+    keys = [card_key(listing_id)]
+    tree = None
+    for is_featured, _, location, category_id, _ in placements:
+        if not is_featured or location is None:
+            continue
+        tree = tree or get_category_tree()
+        cell = cell_for(location.x, location.y)
+        keys.extend(bucket_key(cell, category) for category in bucket_categories(category_id, tree))
+    cache.delete_many(keys)
@@ -0,0 +1,256 @@
+"""
+Personalised home feed.
+
+Each user's feed is a ranked list of listing ids near them, in their
+preferred categories (and the categories below those), built in the
+background and cached as two packed arrays: ids and scores. Reading a page
+is a slice of those arrays plus one batched query for the listings on it.
+
+A listing's score is recency x featured boost x proximity. Recency decays
+exponentially, so in log space it is linear in the listing's timestamp: two
+listings keep their relative order as they age, and a score computed today
+can be compared with one computed at build time. That is what lets a new
+listing be slotted into every cached feed near it without a rebuild.
+"""
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.contrib.gis.measure import D
+from django.core.cache import cache
+
+from accounts.models import User, UserPreferences
+from utils.geo_utils import bounding_box, haversine_km, points_to_arrays, within_radius
+
+from .category_tree import get_subtree_ids
+from .models import Listing
+
+# Users whose cached feeds are updated per batch when a listing is created.
+FANOUT_BATCH_SIZE = 500
+
+
+def feed_key(user_id):
+    return f'listings:feed:{user_id}'
+
+
+def log_scores(timestamps, featured, distances_km):
+    """
+    Log of (recency x featured boost x proximity) for arrays of listings.
+    """
+    tau = settings.FEED_RECENCY_HALF_LIFE_HOURS * 3600 / math.log(2)
+    boost = np.where(np.asarray(featured, dtype=bool), settings.FEED_FEATURED_BOOST, 1.0)
+    proximity = 1.0 / (1.0 + np.asarray(distances_km, dtype=float) / settings.FEED_DISTANCE_SCALE_KM)
+    return np.asarray(timestamps, dtype=float) / tau + np.log(boost * proximity)
+
+
+def feed_preferences(user_id):
+    """
+    ``(location, radius_km, category_ids)`` for a user. ``category_ids`` is
+    ``None`` when no categories are preferred (every category counts).
+    """
+    row = User.objects.filter(pk=user_id).values_list(
+        'location', 'preferences__search_radius', 'preferences__preferred_categories'
+    ).first()
+    if row is None:
+        return None, 0, None
+    location, radius_km, preferred = row
+    radius_km = radius_km or UserPreferences._meta.get_field('search_radius').default
+    category_ids = set()
+    for category_id in preferred or ():
+        try:
+            category_ids.update(get_subtree_ids(int(category_id)))
+        except (TypeError, ValueError):
+            continue
+    return location, radius_km, sorted(category_ids) or None
+
+
+def rank(rows, location, radius_km):
+    """
+    Score ``(id, listing_date, is_featured, location)`` rows and keep the best
+    ``FEED_SIZE`` within the radius. Returns ``(ids, scores)``, best first,
+    ordered by score then id, both descending.
+    """
+    count = len(rows)
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    timestamps = np.fromiter((row[1].timestamp() for row in rows), dtype=float, count=count)
+    featured = np.fromiter((row[2] for row in rows), dtype=bool, count=count)
+    if location is None:
+        mask, distances = np.ones(count, dtype=bool), np.zeros(count)
+    else:
+        lats, lons = points_to_arrays([row[3] for row in rows])
+        mask, distances = within_radius(lats, lons, location.y, location.x, radius_km)
+
+    ids = ids[mask]
+    scores = log_scores(timestamps[mask], featured[mask], distances[mask])
+    # Ties (same timestamp and distance) are common; id breaks them so pages
+    # can seek past an exact (score, id) position.
+    order = np.lexsort((-ids, -scores))[:settings.FEED_SIZE]
+    return ids[order], scores[order]
+
+
+def pack(ids, scores, location, radius_km, category_ids):
+    return {
+        'ids': np.asarray(ids, dtype='<i8').tobytes(),
+        'scores': np.asarray(scores, dtype='<f8').tobytes(),
+        'location': None if location is None else (location.x, location.y),
+        'radius_km': radius_km,
+        'category_ids': category_ids,
+        'built_at': time.time(),
+    }
+
+
+def unpack(record):
+    return np.frombuffer(record['ids'], dtype='<i8'), np.frombuffer(record['scores'], dtype='<f8')
+
+
+def build_feed(user_id):
+    location, radius_km, category_ids = feed_preferences(user_id)
+    queryset = Listing.active.all()
+    if category_ids is not None:
+        queryset = queryset.filter(category_id__in=category_ids)
+    if location is not None:
+        bbox = Polygon.from_bbox(bounding_box(location.y, location.x, radius_km))
+        bbox.srid = 4326
+        queryset = queryset.filter(location__contained=bbox)
+    rows = list(
+        queryset.order_by('-listing_date')
+        .values_list('id', 'listing_date', 'is_featured', 'location')[:settings.FEED_CANDIDATE_LIMIT]
+    )
+    record = pack(*rank(rows, location, radius_km), location, radius_km, category_ids)
+    cache.set(feed_key(user_id), record, settings.FEED_TIMEOUT)
+    return record
+
+
+def get_feed(user_id):
+    """
+    The cached feed record, built inline if there is none yet.
+    """
+    record = cache.get(feed_key(user_id))
+    if record is None:
+        record = build_feed(user_id)
+    return record
+
+
+def feed_is_current(record, location, radius_km, category_ids):
+    """
+    Whether a cached feed still fits the user's preferences; small moves
+    (under ``FEED_MOVE_THRESHOLD_KM``) keep the feed.
+    """
+    if record['radius_km'] != radius_km or record['category_ids'] != category_ids:
+        return False
+    if record['location'] is None or location is None:
+        return record['location'] is None and location is None
+    lon, lat = record['location']
+    return haversine_km(lat, lon, location.y, location.x) < settings.FEED_MOVE_THRESHOLD_KM
+
+
+def refresh_feed(user_id):
+    """
+    Rebuild a cached feed whose preferences or location changed. Users with
+    no cached feed are left alone; theirs is built on the next read.
+    """
+    record = cache.get(feed_key(user_id))
+    if record is None or feed_is_current(record, *feed_preferences(user_id)):
+        return False
+    build_feed(user_id)
+    return True
+
+
+def _ranked_before(ids, scores, score, listing_id):
+    """
+    How many entries of a feed sort before or at ``(score, listing_id)``.
+    """
+    return int(np.count_nonzero((scores > score) | ((scores == score) & (ids >= listing_id))))
+
+
+def insert_listing(record, listing_id, score):
+    """
+    A copy of ``record`` with the listing slotted in by score (then id), or
+    ``None`` if it ranks below the end of a full feed.
+    """
+    ids, scores = unpack(record)
+    keep = ids != listing_id
+    ids, scores = ids[keep], scores[keep]
+    position = _ranked_before(ids, scores, score, listing_id)
+    if position >= settings.FEED_SIZE:
+        return None
+    ids = np.insert(ids, position, listing_id)[:settings.FEED_SIZE]
+    scores = np.insert(scores, position, score)[:settings.FEED_SIZE]
+    return {**record, 'ids': ids.astype('<i8').tobytes(), 'scores': scores.astype('<f8').tobytes()}
+
+
+def add_listing_to_feeds(listing_id):
+    """
+    Slot a new listing into the cached feeds of users near it. Returns how
+    many feeds changed. Users without a location only see it on rebuild.
+    """
+    row = Listing.active.filter(pk=listing_id).values_list('listing_date', 'is_featured', 'location', 'category_id').first()
+    if row is None:
+        return 0
+    listing_date, is_featured, location, category_id = row
+
+    user_ids = (
+        User.objects.filter(location__dwithin=(location, D(km=settings.FEED_MAX_RADIUS_KM)))
+        .values_list('id', flat=True).iterator(chunk_size=FANOUT_BATCH_SIZE)
+    )
+    updated = 0
+    batch = []
+    for user_id in user_ids:
+        batch.append(user_id)
+        if len(batch) == FANOUT_BATCH_SIZE:
+            updated += _add_to_feeds(batch, listing_id, listing_date, is_featured, location, category_id)
+            batch = []
+    if batch:
+        updated += _add_to_feeds(batch, listing_id, listing_date, is_featured, location, category_id)
+    return updated
+
+
+def _add_to_feeds(user_ids, listing_id, listing_date, is_featured, location, category_id):
+    records = cache.get_many([feed_key(user_id) for user_id in user_ids])
+    changed = {}
+    for key, record in records.items():
+        if record['category_ids'] is not None and category_id not in record['category_ids']:
+            continue
+        if record['location'] is None:
+            continue
+        lon, lat = record['location']
+        distance = haversine_km(lat, lon, location.y, location.x)
+        if distance > record['radius_km']:
+            continue
+        score = float(log_scores([listing_date.timestamp()], [is_featured], [distance])[0])
+        new_record = insert_listing(record, listing_id, score)
+        if new_record is not None:
+            changed[key] = new_record
+    if changed:
+        cache.set_many(changed, settings.FEED_TIMEOUT)
+    return len(changed)
+
+
+def is_feed_cursor(cursor):
+    """
+    Whether a decoded cursor is a ``(score, id)`` pair ``feed_page`` accepts.
+    """
+    if len(cursor) != 2:
+        return False
+    score, listing_id = cursor
+    return (
+        isinstance(score, (int, float)) and not isinstance(score, bool) and math.isfinite(score)
+        and isinstance(listing_id, int) and not isinstance(listing_id, bool)
+    )
+
+
+def feed_page(record, cursor=None, size=20):
+    """
+    The ids on one page and the cursor (``[score, id]`` of the last row) for
+    the next, or ``None`` at the end. Insertions between pages do not shift
+    later pages.
+    """
+    ids, scores = unpack(record)
+    start = 0 if cursor is None else _ranked_before(ids, scores, *cursor)
+    page = ids[start:start + size]
+    has_next = start + size < len(ids)
+    last = start + size - 1
+    next_cursor = [float(scores[last]), int(ids[last])] if has_next else None
+    return [int(pk) for pk in page], next_cursor
@@ -0,0 +1,199 @@
+"""
+Streaming bulk import of listings from CSV or JSON Lines.
+
+Files are read in fixed-size chunks with pandas, each chunk is validated with
+vectorized column checks, and the valid rows are written with ``COPY`` (or
+``bulk_create``). Invalid rows are reported by line and skipped; they never
+abort the rest of the import. Memory use is bounded by the chunk size, not the
+file size.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+
+import pandas as pd
+from django.db import connection, transaction
+from django.utils import timezone
+
+from entities.snapshots import schedule_snapshot_rebuild
+from maps.invalidation import invalidate_points
+
+from .models import Category, Listing
+from .ratings import AGGREGATE_FIELDS
+from .search import LISTING_SEARCH_VECTOR
+
+REQUIRED_COLUMNS = ['title', 'description', 'price', 'condition', 'availability_status', 'latitude', 'longitude', 'expiry_date']
+OPTIONAL_COLUMNS = ['listing_type', 'category', 'is_featured']
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_METHODS = ('copy', 'bulk')
+DEFAULT_CHUNK_SIZE = 1000
+MAX_PRICE = 10 ** 8  # DecimalField(max_digits=10, decimal_places=2)
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+# Every NOT NULL column: model defaults are not database defaults, so COPY
+# must write them all. New listings start with empty rating aggregates.
+COPY_COLUMNS = ['vendor_id', 'category_id', 'title', 'description', 'price', 'listing_type', 'condition',
+                'availability_status', 'status_changed_at', 'location', 'listing_date', 'expiry_date', 'views',
+                'is_featured', *AGGREGATE_FIELDS]
+
+
+class ListingImportError(Exception):
+    """
+    The file as a whole cannot be imported (bad format or missing columns).
+    """
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    max_errors: int = 1000
+
+    def add_errors(self, row_errors):
+        self.failed += len(row_errors)
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            self.errors.extend(row_errors[:room])
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+
+def read_chunks(file, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    if fmt == 'csv':
+        return pd.read_csv(file, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    if fmt == 'jsonl':
+        return pd.read_json(file, lines=True, chunksize=chunk_size, dtype=False)
+    raise ListingImportError(f'Unsupported format: {fmt}')
+
+
+def validate_chunk(chunk, category_ids):
+    """
+    Validate a chunk column by column. Returns the cleaned valid rows and a
+    list of ``{'row': n, 'errors': [...]}`` for the rest (rows are 1-based,
+    counting data rows only).
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ListingImportError(f"Missing required columns: {', '.join(missing)}")
+
+    def text(column, default=''):
+        if column not in chunk.columns:
+            return pd.Series(default, index=chunk.index)
+        return chunk[column].fillna(default).astype(str).str.strip()
+
+    df = pd.DataFrame(index=chunk.index)
+    df['title'] = text('title')
+    df['description'] = text('description')
+    df['price'] = pd.to_numeric(text('price'), errors='coerce').round(2)
+    df['condition'] = text('condition').str.lower()
+    df['availability_status'] = text('availability_status').str.lower()
+    df['latitude'] = pd.to_numeric(text('latitude'), errors='coerce')
+    df['longitude'] = pd.to_numeric(text('longitude'), errors='coerce')
+    df['expiry_date'] = pd.to_datetime(text('expiry_date'), errors='coerce', utc=True)
+    df['listing_type'] = text('listing_type').str.lower().replace('', 'product')
+    category = text('category')
+    df['category'] = pd.to_numeric(category, errors='coerce')
+    df['is_featured'] = text('is_featured').str.lower().isin(TRUE_VALUES)
+
+    checks = [
+        ('title', (df['title'].str.len() == 0) | (df['title'].str.len() > 255), 'Title is required and must be at most 255 characters.'),
+        ('description', df['description'].str.len() == 0, 'Description is required.'),
+        ('price', df['price'].isna() | (df['price'] < 0) | (df['price'] >= MAX_PRICE), 'Price must be a non-negative number below 100,000,000.'),
+        ('condition', ~df['condition'].isin([c for c, _ in Listing.CONDITION_CHOICES]), 'Invalid condition.'),
+        ('availability_status', ~df['availability_status'].isin([c for c, _ in Listing.AVAILABILITY_CHOICES]), 'Invalid availability status.'),
+        ('listing_type', ~df['listing_type'].isin([c for c, _ in Listing.LISTING_TYPES]), 'Invalid listing type.'),
+        ('latitude', ~df['latitude'].between(-90, 90), 'Latitude must be between -90 and 90.'),
+        ('longitude', ~df['longitude'].between(-180, 180), 'Longitude must be between -180 and 180.'),
+        ('expiry_date', df['expiry_date'].isna(), 'Expiry date must be a valid date.'),
+        ('category', (category != '') & ~df['category'].isin(category_ids), 'Unknown category.'),
+    ]
+
+    invalid = pd.Series(False, index=df.index)
+    messages = {}
+    for column, mask, message in checks:
+        invalid |= mask
+        for index in mask[mask].index:
+            messages.setdefault(index, []).append(f'{column}: {message}')
+
+    errors = [{'row': int(index) + 1, 'errors': messages[index]} for index in sorted(messages)]
+    return df[~invalid], errors
+
+
+def _rows(df, vendor_id):
+    now = timezone.now()
+    for row in df.itertuples(index=False):
+        yield {
+            'vendor_id': vendor_id,
+            'category_id': None if pd.isna(row.category) else int(row.category),
+            'title': row.title,
+            'description': row.description,
+            'price': f'{row.price:.2f}',
+            'listing_type': row.listing_type,
+            'condition': row.condition,
+            'availability_status': row.availability_status,
+            'status_changed_at': now,
+            'location': f'SRID=4326;POINT({row.longitude} {row.latitude})',
+            'listing_date': now,
+            'expiry_date': row.expiry_date.to_pydatetime(),
+            'views': 0,
+            'is_featured': bool(row.is_featured),
+            **{name: 0 for name in AGGREGATE_FIELDS},
+        }
+
+
+def copy_rows(df, vendor_id):
+    """
+    Stream the rows to Postgres with COPY, the fastest bulk write path.
+    """
+    columns = COPY_COLUMNS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in _rows(df, vendor_id):
+        row['listing_date'] = row['listing_date'].isoformat()
+        row['status_changed_at'] = row['status_changed_at'].isoformat()
+        row['expiry_date'] = row['expiry_date'].isoformat()
+        writer.writerow([row[column] for column in columns])
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(Listing._meta.db_table)
+    column_list = ', '.join(connection.ops.quote_name(c) for c in columns)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+        # COPY bypasses the post_save signal that maintains the search vector.
+        Listing.objects.filter(vendor_id=vendor_id, search_vector__isnull=True).update(search_vector=LISTING_SEARCH_VECTOR)
+
+
+def bulk_create_rows(df, vendor_id):
+    listings = Listing.objects.bulk_create([Listing(**row) for row in _rows(df, vendor_id)])
+    Listing.objects.filter(pk__in=[listing.pk for listing in listings]).update(search_vector=LISTING_SEARCH_VECTOR)
+
+
+def import_listings(file, vendor_id, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE, method='copy'):
+    """
+    Import listings for ``vendor_id`` from an open file. Each chunk is written
+    in its own transaction, so earlier chunks stay imported if a later one fails.
+    """
+    if method not in IMPORT_METHODS:
+        raise ListingImportError(f'Unsupported import method: {method}')
+    write = copy_rows if method == 'copy' else bulk_create_rows
+    category_ids = set(Category.objects.values_list('pk', flat=True))
+    report = ImportReport()
+
+    try:
+        for chunk in read_chunks(file, fmt, chunk_size):
+            valid, errors = validate_chunk(chunk, category_ids)
+            report.add_errors(errors)
+            if not valid.empty:
+                with transaction.atomic():
+                    write(valid, vendor_id)
+                report.created += len(valid)
+                # COPY and bulk_create skip the signals that drop stale map tiles.
+                invalidate_points('listings', zip(valid['longitude'], valid['latitude']))
+    except ValueError as e:
+        # pandas raises ValueError for unparseable input.
+        raise ListingImportError(f'Could not parse file: {e}')
+    finally:
+        if report.created:
+            schedule_snapshot_rebuild(vendor_id)
+    return report
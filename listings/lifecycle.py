@@ -0,0 +1,94 @@
+"""
+Listing lifecycle: available -> expired (or sold out) -> archived.
+
+Live listings (available and unexpired) are what every hot query reads, so
+the indexes behind those queries are partial on ``availability_status =
+'available'`` and grow with live inventory only. ``now()`` cannot appear in
+an index predicate, so this module keeps the status honest instead:
+available listings past their expiry date are marked expired, and listings
+expired or sold out for ``LISTING_ARCHIVE_AFTER_DAYS`` (counted from
+``status_changed_at``, which ``Listing.save`` and these passes stamp) are
+archived. Extending an expired listing's expiry date makes it available again
+(see ``Listing.save``).
+
+Each pass works in short batches, one transaction per batch, and locks only
+the rows it is about to change with ``SKIP LOCKED``, so it never waits on
+(or blocks for long) a vendor editing a listing.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from entities.snapshots import schedule_snapshot_rebuild
+from maps.invalidation import invalidate_points
+from utils.conditional import bump_versions
+
+from .models import Collection, Listing
+
+
+def _move_batch(queryset, status, batch_size, order_by):
+    """
+    Move up to ``batch_size`` rows of ``queryset`` to ``status`` in one
+    transaction. Returns how many moved.
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by(*order_by)
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'vendor_id', 'location')[:batch_size]
+        )
+        if not rows:
+            return 0
+        listing_ids = [listing_id for listing_id, _, _ in rows]
+        Listing.objects.filter(pk__in=listing_ids).update(availability_status=status, status_changed_at=timezone.now())
+
+        # update() sends no signals; refresh what a status change shows up in.
+        for vendor_id in {vendor_id for _, vendor_id, _ in rows}:
+            schedule_snapshot_rebuild(vendor_id)
+        points = {(location.x, location.y) for _, _, location in rows if location is not None}
+        transaction.on_commit(lambda: invalidate_points('listings', points))
+        collection_ids = list(
+            Collection.listings.through.objects.filter(listing_id__in=listing_ids)
+            .values_list('collection_id', flat=True).distinct()
+        )
+        if collection_ids:
+            transaction.on_commit(lambda: bump_versions(Collection, collection_ids))
+    return len(rows)
+
+
+def _move_all(queryset, status, batch_size, order_by):
+    moved = 0
+    while True:
+        count = _move_batch(queryset, status, batch_size, order_by)
+        moved += count
+        if count < batch_size:
+            # Short batch: done, or only rows locked by someone else remain
+            # (the next sweep gets those).
+            return moved
+
+
+def expire_listings(now=None, batch_size=None):
+    now = now or timezone.now()
+    queryset = Listing.objects.filter(availability_status='available', expiry_date__lte=now)
+    return _move_all(queryset, 'expired', batch_size or settings.LISTING_SWEEP_BATCH_SIZE, ('expiry_date', 'id'))
+
+
+def archive_listings(now=None, batch_size=None):
+    """
+    Archive listings that have been expired or sold out (per
+    ``status_changed_at``) for ``LISTING_ARCHIVE_AFTER_DAYS``. The expiry
+    date plays no part: a listing sold out today waits its full term.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=settings.LISTING_ARCHIVE_AFTER_DAYS)
+    queryset = Listing.objects.filter(availability_status__in=['sold_out', 'expired'], status_changed_at__lte=cutoff)
+    return _move_all(queryset, 'archived', batch_size or settings.LISTING_SWEEP_BATCH_SIZE, ('status_changed_at', 'id'))
+
+
+def sweep_listings(now=None, batch_size=None):
+    """
+    Run both passes. Returns ``(expired, archived)``.
+    """
+    now = now or timezone.now()
+    return expire_listings(now, batch_size), archive_listings(now, batch_size)
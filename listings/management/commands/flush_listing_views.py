@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from listings.view_counter import flush_pending_views
+
+
+class Command(BaseCommand):
+    help = 'Write buffered listing view counts to the database. Celery beat runs this every minute (CELERY_BEAT_SCHEDULE); the command is for manual runs.'
+
+    def handle(self, *args, **options):
+        updated = flush_pending_views()
+        self.stdout.write(self.style.SUCCESS(f'Flushed views for {updated} listings'))
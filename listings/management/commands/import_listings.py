@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from entities.models import Entity
+from listings.importers import DEFAULT_CHUNK_SIZE, IMPORT_FORMATS, IMPORT_METHODS, ListingImportError, import_listings
+
+
+class Command(BaseCommand):
+    help = 'Bulk import listings for an entity from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--entity', type=int, required=True, help='Id of the entity the listings belong to.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--method', choices=IMPORT_METHODS, default='copy')
+
+    def handle(self, *args, **options):
+        if not Entity.objects.filter(pk=options['entity']).exists():
+            raise CommandError(f"Entity {options['entity']} does not exist")
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        try:
+            with open(path, 'rb') as f:
+                report = import_listings(f, options['entity'], fmt=fmt, chunk_size=options['chunk_size'], method=options['method'])
+        except (OSError, ListingImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {'; '.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f'Imported {report.created} listings, {report.failed} rows failed'))
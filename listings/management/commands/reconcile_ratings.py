@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from listings.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute listing and entity rating aggregates from reviews and repair any drift. Run after bulk loads, or nightly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that drifted.')
+
+    def handle(self, *args, **options):
+        listings, entities = reconcile_ratings(dry_run=options['dry_run'])
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {listings} listings and {entities} entities with drifted ratings'))
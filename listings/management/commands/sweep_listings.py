@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from listings.lifecycle import sweep_listings
+
+
+class Command(BaseCommand):
+    help = 'Expire listings past their expiry date and archive long-stale ones, in batches. Celery beat runs this every 15 minutes (CELERY_BEAT_SCHEDULE); the command is for manual runs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Listings changed per transaction.')
+
+    def handle(self, *args, **options):
+        expired, archived = sweep_listings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} and archived {archived} listings'))
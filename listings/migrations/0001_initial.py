@@ -0,0 +1,104 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:08
+
+from django.conf import settings
+import django.contrib.gis.db.models.fields
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('entities', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_name', models.CharField(max_length=255)),
+                ('parent_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subcategories', to='listings.category')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Listing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('listing_type', models.CharField(choices=[('product', 'Product'), ('service', 'Service'), ('event', 'Event')], max_length=10)),
+                ('condition', models.CharField(choices=[('new', 'New'), ('used', 'Used')], max_length=10)),
+                ('availability_status', models.CharField(choices=[('available', 'Available'), ('sold_out', 'Sold Out')], max_length=10)),
+                ('location', django.contrib.gis.db.models.fields.PointField(srid=4326)),
+                ('listing_date', models.DateTimeField(auto_now_add=True)),
+                ('expiry_date', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='listings.category')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='entities.entity')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='listings.listing')),
+                ('event_name', models.CharField(max_length=255)),
+                ('event_date', models.DateField()),
+                ('event_time', models.TimeField()),
+                ('event_location', models.CharField(max_length=255)),
+                ('event_description', models.TextField()),
+                ('tickets_available', models.PositiveIntegerField()),
+                ('ticket_price', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Service',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='listings.listing')),
+                ('service_type', models.CharField(max_length=100)),
+                ('service_duration', models.DurationField()),
+                ('service_area', models.CharField(max_length=255)),
+                ('service_provider_details', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('review_text', models.TextField()),
+                ('review_date', models.DateTimeField(auto_now_add=True)),
+                ('is_verified_purchase', models.BooleanField(default=False)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='listings.listing')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ListingImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_url', models.ImageField(upload_to='listing_images/')),
+                ('image_alt_text', models.CharField(max_length=255)),
+                ('upload_date', models.DateTimeField(auto_now_add=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='listings.listing')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Collection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collections', to='entities.entity')),
+                ('listings', models.ManyToManyField(blank=True, related_name='collections', to='listings.listing')),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    from django.contrib.postgres.search import SearchVector
+    Listing = apps.get_model('listings', 'Listing')
+    Listing.objects.update(
+        search_vector=SearchVector('title', weight='A') + SearchVector('description', weight='B')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='listing',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='listing_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='listing_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
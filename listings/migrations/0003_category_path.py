@@ -0,0 +1,43 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Category = apps.get_model('listings', 'Category')
+    children = {}
+    for pk, parent_id in Category.objects.values_list('id', 'parent_category_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    # Walk down from the roots; anything unreachable (a parent cycle) stays unset.
+    updates, level, depth = [], [(pk, f'{pk}/') for pk in children.get(None, [])], 0
+    while level:
+        updates.extend(Category(pk=pk, path=path, depth=depth) for pk, path in level)
+        level = [(child, f'{path}{child}/') for pk, path in level for child in children.get(pk, [])]
+        depth += 1
+    Category.objects.bulk_update(updates, ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_listing_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimage',
+            name='image_url_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
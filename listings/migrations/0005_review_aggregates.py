@@ -0,0 +1,81 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+BACKFILL = """
+    UPDATE listings_listing l SET
+        review_count = r.review_count,
+        rating_sum = r.rating_sum,
+        rating_average = r.rating_sum::float8 / r.review_count,
+        rating_1_count = r.rating_1_count,
+        rating_2_count = r.rating_2_count,
+        rating_3_count = r.rating_3_count,
+        rating_4_count = r.rating_4_count,
+        rating_5_count = r.rating_5_count
+    FROM (
+        SELECT listing_id, count(*) AS review_count, sum(rating) AS rating_sum,
+               count(*) FILTER (WHERE rating = 1) AS rating_1_count,
+               count(*) FILTER (WHERE rating = 2) AS rating_2_count,
+               count(*) FILTER (WHERE rating = 3) AS rating_3_count,
+               count(*) FILTER (WHERE rating = 4) AS rating_4_count,
+               count(*) FILTER (WHERE rating = 5) AS rating_5_count
+        FROM listings_review GROUP BY listing_id
+    ) r
+    WHERE r.listing_id = l.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listingimage_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='rating_1_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_2_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_3_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_4_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_5_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_average',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='review_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(models.OrderBy(models.F('rating_average'), descending=True, nulls_last=True), models.OrderBy(models.F('review_count'), descending=True), models.OrderBy(models.F('id'), descending=True), name='listing_rating_idx'),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['-listing_date', '-id'], name='listing_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['listing_type', '-listing_date', '-id'], name='listing_type_date_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:42
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_listing_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_type_date_idx',
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='availability_status',
+            field=models.CharField(choices=[('available', 'Available'), ('sold_out', 'Sold Out'), ('expired', 'Expired'), ('archived', 'Archived')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(models.OrderBy(models.F('rating_average'), descending=True, nulls_last=True), models.OrderBy(models.F('review_count'), descending=True), models.OrderBy(models.F('id'), descending=True), condition=models.Q(('availability_status', 'available')), name='listing_active_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('availability_status', 'available')), fields=['-listing_date', '-id'], name='listing_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('availability_status', 'available')), fields=['listing_type', '-listing_date', '-id'], name='listing_active_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GistIndex(condition=models.Q(('availability_status', 'available')), fields=['location'], name='listing_active_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('availability_status', 'available')), fields=['expiry_date', 'id'], name='listing_active_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('availability_status__in', ['sold_out', 'expired'])), fields=['expiry_date', 'id'], name='listing_stale_expiry_idx'),
+        ),
+    ]
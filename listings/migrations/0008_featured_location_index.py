@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:45
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_listing_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GistIndex(condition=models.Q(('availability_status', 'available'), ('is_featured', True)), fields=['location'], name='listing_featured_location_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+# When existing listings left 'available' is unknown; start their clock now, so
+# they are archived LISTING_ARCHIVE_AFTER_DAYS after this migration.
+BACKFILL = """
+UPDATE listings_listing SET status_changed_at = now()
+WHERE availability_status <> 'available' AND status_changed_at IS NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_featured_location_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_stale_expiry_idx',
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('availability_status__in', ['sold_out', 'expired'])), fields=['status_changed_at', 'id'], name='listing_stale_status_idx'),
+        ),
+    ]
@@ -1,15 +1,126 @@
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+RATING_STARS = range(1, 6)
+HISTOGRAM_FIELDS = [f'rating_{star}_count' for star in RATING_STARS]
+AGGREGATE_FIELDS = ['review_count', 'rating_sum', *HISTOGRAM_FIELDS]
+
+
+class RatingAggregates(models.Model):
+    """
+    Review statistics kept on the row so lists can filter and sort by rating
+    without aggregating reviews. Maintained by ``listings.ratings``.
+    """
+    review_count = models.IntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_average = models.FloatField(null=True, blank=True, editable=False)
+    rating_1_count = models.IntegerField(default=0, editable=False)
+    rating_2_count = models.IntegerField(default=0, editable=False)
+    rating_3_count = models.IntegerField(default=0, editable=False)
+    rating_4_count = models.IntegerField(default=0, editable=False)
+    rating_5_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_histogram(self):
+        return [getattr(self, f'rating_{star}_count') for star in RATING_STARS]
+
+    def save(self, *args, **kwargs):
+        # Only the F() deltas in listings.ratings write the aggregates; a full
+        # save of a loaded row would put back the counts it read, losing any
+        # review committed in between.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            skipped = {*AGGREGATE_FIELDS, 'rating_average', *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+CATEGORY_CYCLE_MESSAGE = 'A category cannot be moved under itself or one of its descendants.'
+
 
 class Category(models.Model):
     category_name = models.CharField(max_length=255)
     parent_category = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='subcategories')
+    # Materialized path of ancestor ids ending in this one, e.g. "3/17/42/".
+    # All descendants of a category are the rows whose path starts with its own.
+    path = models.CharField(max_length=255, blank=True, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.category_name
 
-class Listing(models.Model):
+    def can_move_under(self, parent):
+        """
+        Whether ``parent`` is outside this category's subtree.
+        """
+        return parent is None or not self.pk or not parent.path.startswith(self.path or f'{self.pk}/')
+
+    def save(self, *args, **kwargs):
+        parent = self.parent_category
+        # Backstop; API writes are refused earlier by CategorySerializer.
+        if not self.can_move_under(parent):
+            raise ValidationError(CATEGORY_CYCLE_MESSAGE)
+        # One transaction, so on_commit hooks (the tree cache) see the final paths.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._update_path(f'{parent.path if parent else ""}{self.pk}/')
+
+    def _update_path(self, path):
+        old_path, old_depth = self.path, self.depth
+        if path == old_path:
+            return
+        depth = path.count('/') - 1
+        Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+        if old_path:
+            # Re-root the subtree: swap the old prefix for the new one.
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (depth - old_depth),
+            )
+        self.path, self.depth = path, depth
+
+    def get_descendants(self, include_self=False):
+        descendants = Category.objects.filter(path__startswith=self.path)
+        return descendants if include_self else descendants.exclude(pk=self.pk)
+
+# The predicate of the partial indexes behind live-listing queries. ``now()``
+# is not allowed in an index predicate, so expiry is folded into the status by
+# the sweeper in ``listings.lifecycle``.
+LIVE_LISTING = Q(availability_status='available')
+
+
+class ListingQuerySet(models.QuerySet):
+    def active(self):
+        """
+        Live listings: available and unexpired. Served by the partial indexes;
+        the expiry check only rechecks rows the sweeper has not reached yet.
+        """
+        return self.filter(LIVE_LISTING, expiry_date__gt=timezone.now())
+
+
+class ActiveListingManager(models.Manager.from_queryset(ListingQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().active()
+
+
+class Listing(RatingAggregates):
     LISTING_TYPES = [
         ('product', 'Product'),
         ('service', 'Service'),
@@ -22,6 +133,8 @@ class Listing(models.Model):
     AVAILABILITY_CHOICES = [
         ('available', 'Available'),
         ('sold_out', 'Sold Out'),
+        ('expired', 'Expired'),
+        ('archived', 'Archived'),
     ]
 
     vendor = models.ForeignKey('entities.Entity', on_delete=models.CASCADE)
@@ -32,18 +145,66 @@ class Listing(models.Model):
     listing_type = models.CharField(max_length=10, choices=LISTING_TYPES)
     condition = models.CharField(max_length=10, choices=CONDITION_CHOICES)
     availability_status = models.CharField(max_length=10, choices=AVAILABILITY_CHOICES)
+    # When availability_status last changed; the sweeper archives by it.
+    status_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
     location = models.PointField()
     listing_date = models.DateTimeField(auto_now_add=True)
     expiry_date = models.DateTimeField()
     views = models.PositiveIntegerField(default=0)
     is_featured = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # The default manager sees every listing (admin, vendors editing their
+    # own, bookkeeping); list endpoints and the feed read through ``active``.
+    objects = models.Manager.from_queryset(ListingQuerySet)()
+    active = ActiveListingManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='listing_search_vector_idx'),
+            GinIndex(fields=['title'], name='listing_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Live-listing indexes: rating order, newest-first pagination
+            # (overall and per listing type), nearby lookups, and the sweeper.
+            models.Index(F('rating_average').desc(nulls_last=True), F('review_count').desc(), F('id').desc(), name='listing_active_rating_idx', condition=LIVE_LISTING),
+            models.Index(fields=['-listing_date', '-id'], name='listing_active_date_idx', condition=LIVE_LISTING),
+            models.Index(fields=['listing_type', '-listing_date', '-id'], name='listing_active_type_date_idx', condition=LIVE_LISTING),
+            GistIndex(fields=['location'], name='listing_active_location_idx', condition=LIVE_LISTING),
+            models.Index(fields=['expiry_date', 'id'], name='listing_active_expiry_idx', condition=LIVE_LISTING),
+            # Featured listings per geocell (listings.featured).
+            GistIndex(fields=['location'], name='listing_featured_location_idx', condition=LIVE_LISTING & Q(is_featured=True)),
+            # The archiving pass of the sweeper.
+            models.Index(fields=['status_changed_at', 'id'], name='listing_stale_status_idx', condition=Q(availability_status__in=['sold_out', 'expired'])),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('availability_status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        saves_status = update_fields is None or 'availability_status' in update_fields
+        # Extending an expired listing puts it back on sale.
+        if self.availability_status == 'expired' and (saves_status or 'expiry_date' in update_fields) \
+                and self.expiry_date and self.expiry_date > timezone.now():
+            self.availability_status = 'available'
+            saves_status = True
+        if saves_status and (self._state.adding or self.availability_status != getattr(self, '_loaded_status', None)):
+            self.status_changed_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'availability_status', 'status_changed_at'}
+        super().save(*args, **kwargs)
+        if saves_status:
+            self._loaded_status = self.availability_status
+
 class ListingImage(models.Model):
     listing = models.ForeignKey("listings.Listing", on_delete=models.CASCADE, related_name='images')
     image_url = models.ImageField(upload_to='listing_images/')
+    image_url_variants = models.JSONField(default=dict, blank=True, editable=False)
     image_alt_text = models.CharField(max_length=255)
     upload_date = models.DateTimeField(auto_now_add=True)
 
@@ -81,6 +242,11 @@ class Review(models.Model):
     review_date = models.DateTimeField(auto_now_add=True)
     is_verified_purchase = models.BooleanField(default=False)
 
+    def save(self, *args, **kwargs):
+        # The post_save receiver updates the rating aggregates; commit both or neither.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Review for {self.listing.title} by {self.user.username}"
 
@@ -0,0 +1,153 @@
+"""
+Denormalized review aggregates.
+
+Every listing and entity carries ``review_count``, ``rating_sum``,
+``rating_average`` and a per-star histogram (``rating_<n>_count``). Review
+signals apply each change as a single ``UPDATE ... SET col = col + delta`` on
+the listing and its vendor, inside the review's own transaction, so concurrent
+reviews never overwrite each other's counts. The average is recomputed in the
+same statement from the new sum and count.
+
+Writes that skip signals (``bulk_create``, raw SQL, fixtures) leave the
+aggregates behind; ``reconcile_ratings`` recomputes them from the reviews and
+repairs any row that drifted.
+"""
+from django.db import connection, transaction
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
+from rest_framework.exceptions import ValidationError
+
+from entities.models import Entity
+
+from .models import AGGREGATE_FIELDS, RATING_STARS, Listing, Review
+
+# Both walk the (rating_average, review_count, id) index; the paginator puts
+# unrated rows (NULL average) last when descending, as the index does.
+RATING_ORDERINGS = {
+    '-rating': ('-rating_average', '-review_count', '-id'),
+    'rating': ('rating_average', 'review_count', 'id'),
+}
+
+
+def aggregate_delta(histogram, sign=1):
+    """
+    ``update()`` kwargs adding (``sign=1``) or removing (``sign=-1``) the
+    ratings in ``histogram``, a ``{star: count}`` dict.
+    """
+    count = sum(histogram.values())
+    total = sum(star * n for star, n in histogram.items())
+    review_count = F('review_count') + sign * count
+    rating_sum = F('rating_sum') + sign * total
+    delta = {
+        'review_count': review_count,
+        'rating_sum': rating_sum,
+        # SET expressions read the old row, so this is the new average.
+        'rating_average': Cast(rating_sum, FloatField()) / NullIf(review_count, 0),
+    }
+    for star, n in histogram.items():
+        if n:
+            delta[f'rating_{star}_count'] = F(f'rating_{star}_count') + sign * n
+    return delta
+
+
+def apply_rating(listing_id, rating, sign=1):
+    """
+    Add or remove one rating on a listing and its vendor.
+    """
+    delta = aggregate_delta({rating: 1}, sign)
+    Listing.objects.filter(pk=listing_id).update(**delta)
+    Entity.objects.filter(listing=listing_id).update(**delta)
+
+
+def move_listing_ratings(listing, old_vendor_id):
+    """
+    Carry a listing's ratings from its previous vendor to its current one.
+    """
+    histogram = dict(zip(RATING_STARS, listing.rating_histogram))
+    if not sum(histogram.values()):
+        return
+    with transaction.atomic():
+        Entity.objects.filter(pk=old_vendor_id).update(**aggregate_delta(histogram, -1))
+        Entity.objects.filter(pk=listing.vendor_id).update(**aggregate_delta(histogram))
+
+
+def _listing_totals():
+    review = Review._meta.db_table
+    histogram = ', '.join(f'count(r.id) FILTER (WHERE r.rating = {star}) AS rating_{star}_count' for star in RATING_STARS)
+    return f'''
+        SELECT l.id, count(r.id) AS review_count, coalesce(sum(r.rating), 0) AS rating_sum, {histogram}
+        FROM {Listing._meta.db_table} l LEFT JOIN {review} r ON r.listing_id = l.id
+        GROUP BY l.id
+    '''
+
+
+def _entity_totals():
+    sums = ', '.join(f'coalesce(sum(l.{field}), 0) AS {field}' for field in AGGREGATE_FIELDS)
+    return f'''
+        SELECT e.id, {sums}
+        FROM {Entity._meta.db_table} e LEFT JOIN {Listing._meta.db_table} l ON l.vendor_id = e.id
+        GROUP BY e.id
+    '''
+
+
+def _reconcile(table, totals, dry_run):
+    expected = '(' + ', '.join(f'e.{field}' for field in AGGREGATE_FIELDS) + ')'
+    stored = '(' + ', '.join(f't.{field}' for field in AGGREGATE_FIELDS) + ')'
+    drifted = f'''
+        WITH expected AS ({totals}),
+        drifted AS (
+            SELECT e.* FROM expected e JOIN {table} t ON t.id = e.id
+            WHERE {stored} IS DISTINCT FROM {expected}
+               OR t.rating_average IS DISTINCT FROM e.rating_sum::float8 / NULLIF(e.review_count, 0)
+        )
+    '''
+    with connection.cursor() as cursor:
+        if dry_run:
+            cursor.execute(drifted + 'SELECT count(*) FROM drifted')
+            return cursor.fetchone()[0]
+        assignments = ', '.join(f'{field} = d.{field}' for field in AGGREGATE_FIELDS)
+        cursor.execute(drifted + f'''
+            UPDATE {table} t SET {assignments}, rating_average = d.rating_sum::float8 / NULLIF(d.review_count, 0)
+            FROM drifted d WHERE t.id = d.id
+        ''')
+        return cursor.rowcount
+
+
+def reconcile_ratings(dry_run=False):
+    """
+    Recompute listing aggregates from reviews, then entity aggregates from
+    listings. Returns the number of (listings, entities) that had drifted.
+    """
+    with transaction.atomic():
+        listings = _reconcile(Listing._meta.db_table, _listing_totals(), dry_run)
+        # A dry run leaves listings as they are, so entities are compared
+        # against possibly drifted listing totals.
+        entities = _reconcile(Entity._meta.db_table, _entity_totals(), dry_run)
+    return listings, entities
+
+
+def filter_min_rating(queryset, params):
+    """
+    ``?min_rating=<1-5>``: only rows whose average rating is at least that.
+    """
+    min_rating = params.get('min_rating')
+    if min_rating is None:
+        return queryset
+    try:
+        min_rating = float(min_rating)
+    except ValueError:
+        raise ValidationError({'error': 'min_rating must be a number'})
+    return queryset.filter(rating_average__gte=min_rating)
+
+
+def rating_ordering(params):
+    """
+    The pagination ordering for ``?ordering=-rating`` (best first) or
+    ``?ordering=rating``; ``None`` when no ordering was asked for.
+    """
+    ordering = params.get('ordering')
+    if ordering is None:
+        return None
+    if ordering not in RATING_ORDERINGS:
+        raise ValidationError({'error': f'Unknown ordering: {ordering}'})
+    return RATING_ORDERINGS[ordering]
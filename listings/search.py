@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import F, Q
+
+SEARCH_BACKENDS = ('postgres', 'basic')
+
+# Title matches outrank description matches.
+LISTING_SEARCH_VECTOR = SearchVector('title', weight='A') + SearchVector('description', weight='B')
+
+
+def update_search_vector(listing_ids):
+    """
+    Recompute the stored tsvector for the given listings in one UPDATE.
+    """
+    from .models import Listing
+    return Listing.objects.filter(pk__in=listing_ids).update(search_vector=LISTING_SEARCH_VECTOR)
+
+
+def basic_search(queryset, query):
+    """
+    The original substring search. Scans the whole table; kept as a fallback.
+    """
+    return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+
+def postgres_search(queryset, query):
+    """
+    Full-text search over the indexed tsvector, with trigram similarity on the
+    title so that typos still match. Results are ordered by relevance.
+    """
+    search_query = SearchQuery(query, search_type='websearch')
+    # Both predicates are GIN-indexable: ``@@`` on search_vector and the pg_trgm
+    # ``%`` operator on title.
+    return queryset.filter(
+        Q(search_vector=search_query) | Q(title__trigram_similar=query)
+    ).annotate(
+        rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query),
+    ).order_by('-rank', '-listing_date')
+
+
+def search_listings(queryset, query, backend=None):
+    """
+    Search listings with the configured backend (``LISTING_SEARCH_BACKEND``).
+    """
+    if not query:
+        return queryset
+    backend = backend or settings.LISTING_SEARCH_BACKEND
+    if backend == 'basic':
+        return basic_search(queryset, query)
+    return postgres_search(queryset, query)
@@ -1,15 +1,28 @@
+from django.db import models
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Category, Listing, ListingImage, Service, Event, Review, Collection
+from utils.image_variants import ImageVariantsField, variant_urls
+from utils.query_plan import QueryPlanMixin, nested_spec
+from .models import CATEGORY_CYCLE_MESSAGE, Category, Listing, ListingImage, Service, Event, Review, Collection
+from .view_counter import apply_pending_views
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'category_name', 'parent_category']
+        fields = ['id', 'category_name', 'parent_category', 'path', 'depth']
+        read_only_fields = ['path', 'depth']
+
+    def validate_parent_category(self, value):
+        if self.instance is not None and not self.instance.can_move_under(value):
+            raise serializers.ValidationError(CATEGORY_CYCLE_MESSAGE)
+        return value
 
 class ListingImageSerializer(serializers.ModelSerializer):
+    image_url_variants = ImageVariantsField()
+
     class Meta:
         model = ListingImage
-        fields = ['id', 'listing', 'image_url', 'image_alt_text', 'upload_date']
+        fields = ['id', 'listing', 'image_url', 'image_url_variants', 'image_alt_text', 'upload_date']
 
 class ServiceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -26,19 +39,86 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ['id', 'listing', 'user', 'rating', 'review_text', 'review_date', 'is_verified_purchase']
 
-class ListingSerializer(serializers.ModelSerializer):
+class PendingViewsListSerializer(serializers.ListSerializer):
+    """
+    Merges buffered view counts into a page of listings with one lookup.
+    """
+
+    def to_representation(self, data):
+        listings = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        apply_pending_views(listings)
+        return super().to_representation(listings)
+
+class ListingSerializer(QueryPlanMixin, serializers.ModelSerializer):
     images = ListingImageSerializer(many=True, read_only=True)
     service = ServiceSerializer(read_only=True)
     event = EventSerializer(read_only=True)
     reviews = ReviewSerializer(many=True, read_only=True)
+    review_average = serializers.FloatField(source='rating_average', read_only=True)
+    rating_histogram = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    select_related_fields = ('service', 'event')
+    prefetch_related_fields = ('images', 'reviews')
+    expandable_fields = ('reviews',)
 
     class Meta:
         model = Listing
-        fields = ['id', 'vendor', 'category', 'title', 'description', 'price', 'listing_type', 'condition', 'availability_status', 'location', 'listing_date', 'expiry_date', 'views', 'is_featured', 'images', 'service', 'event', 'reviews']
+        fields = ['id', 'vendor', 'category', 'title', 'description', 'price', 'listing_type', 'condition', 'availability_status', 'location', 'listing_date', 'expiry_date', 'views', 'is_featured', 'images', 'service', 'event', 'reviews', 'review_count', 'review_average', 'rating_histogram']
+        read_only_fields = ['views']
 
-class CollectionSerializer(serializers.ModelSerializer):
-    listings = ListingSerializer(many=True, read_only=True)
+class ListingListSerializer(QueryPlanMixin, serializers.ModelSerializer):
+    """
+    Compact listing representation for list views: the stored review summary
+    instead of every review body.
+    """
+    images = ListingImageSerializer(many=True, read_only=True)
+    service = ServiceSerializer(read_only=True)
+    event = EventSerializer(read_only=True)
+    review_average = serializers.FloatField(source='rating_average', read_only=True)
+    rating_histogram = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    select_related_fields = ('service', 'event')
+    prefetch_related_fields = ('images',)
+
+    class Meta:
+        model = Listing
+        fields = ['id', 'vendor', 'category', 'title', 'description', 'price', 'listing_type', 'condition', 'availability_status', 'location', 'listing_date', 'expiry_date', 'views', 'is_featured', 'images', 'service', 'event', 'review_count', 'review_average', 'rating_histogram']
+        read_only_fields = ['views']
+        list_serializer_class = PendingViewsListSerializer
+
+class ListingCardSerializer(QueryPlanMixin, serializers.ModelSerializer):
+    """
+    The small listing card cached by ``listings.featured``. Rendered without a
+    request (relative URLs), so one payload serves every client.
+    """
+    review_average = serializers.FloatField(source='rating_average', read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+
+    prefetch_related_fields = ('images',)
+
+    class Meta:
+        model = Listing
+        fields = ['id', 'vendor', 'category', 'title', 'price', 'listing_type', 'location', 'is_featured', 'review_count', 'review_average', 'thumbnail']
+
+    def get_thumbnail(self, listing):
+        # Iterate the prefetched images rather than .first(), which would query.
+        image = next(iter(listing.images.all()), None)
+        if image is None:
+            return None
+        return {'url': image.image_url.url, 'variants': variant_urls(image.image_url_variants, storage=image.image_url.storage)}
+
+class CollectionSerializer(QueryPlanMixin, serializers.ModelSerializer):
+    listings = ListingListSerializer(many=True, read_only=True)
+
+    expandable_fields = ('listings',)
 
     class Meta:
         model = Collection
         fields = ['id', 'name', 'description', 'entity', 'listings', 'created_at', 'updated_at']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, spec=(None, ())):
+        if cls.field_selector(spec)('listings') != 'full':
+            return queryset
+        listings = ListingListSerializer.setup_eager_loading(Listing.objects.all(), nested_spec(spec, 'listings'))
+        return queryset.prefetch_related(Prefetch('listings', queryset=listings))
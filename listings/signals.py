@@ -0,0 +1,203 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .category_tree import bump_tree_version
+from .featured import invalidate_listing, placement
+from accounts.models import User, UserPreferences
+from utils.conditional import bump_version_on_commit, bump_versions
+from utils.image_variants import schedule_image_variants, variants_ready
+
+from .models import Category, Collection, Listing, ListingImage, Review
+from .ratings import apply_rating, move_listing_ratings
+from .search import update_search_vector
+from .tasks import add_listing_to_feeds, refresh_user_feed
+
+
+@receiver(post_save, sender=Listing)
+def refresh_listing_search_vector(sender, instance, update_fields=None, **kwargs):
+    # Only the indexed text columns affect the vector.
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    update_search_vector([instance.pk])
+
+
+@receiver(post_delete, sender=Category)
+def reroot_orphaned_categories(sender, instance, **kwargs):
+    # Children were detached by SET_NULL; drop the deleted prefix from their subtrees.
+    if instance.path:
+        Category.objects.filter(path__startswith=instance.path).update(
+            path=Substr('path', len(instance.path) + 1),
+            depth=F('depth') - (instance.depth + 1),
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, **kwargs):
+    transaction.on_commit(bump_tree_version)
+
+
+@receiver(post_save, sender=ListingImage)
+def queue_listing_image_variants(sender, instance, **kwargs):
+    schedule_image_variants(instance, 'image_url')
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._rated = (instance.__dict__.get('listing_id'), instance.__dict__.get('rating'))
+
+
+@receiver(post_save, sender=Review)
+def update_ratings_on_save(sender, instance, created, **kwargs):
+    rated = (instance.listing_id, instance.rating)
+    if created:
+        apply_rating(*rated)
+    elif rated != instance._rated:
+        if None not in instance._rated:
+            apply_rating(*instance._rated, sign=-1)
+        apply_rating(*rated)
+    instance._rated = rated
+
+
+@receiver(post_delete, sender=Review)
+def update_ratings_on_delete(sender, instance, **kwargs):
+    apply_rating(instance.listing_id, instance.rating, sign=-1)
+
+
+@receiver(post_init, sender=Listing)
+def remember_listing_vendor(sender, instance, **kwargs):
+    instance._rated_vendor_id = instance.__dict__.get('vendor_id')
+
+
+@receiver(post_save, sender=Listing)
+def move_ratings_with_vendor(sender, instance, created, **kwargs):
+    old_vendor_id = instance._rated_vendor_id
+    instance._rated_vendor_id = instance.vendor_id
+    if not created and old_vendor_id is not None and old_vendor_id != instance.vendor_id:
+        move_listing_ratings(instance, old_vendor_id)
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+def bump_collection_version(sender, instance, **kwargs):
+    bump_version_on_commit(Collection, instance.pk)
+
+
+@receiver(m2m_changed, sender=Collection.listings.through)
+def bump_versions_for_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_version_on_commit(Collection, instance.pk)
+    else:
+        # listing.collections.clear() has no pk_set; fall back to a lookup made beforehand.
+        collection_ids = list(pk_set or instance._cleared_collection_ids)
+        transaction.on_commit(lambda: bump_versions(Collection, collection_ids))
+
+
+@receiver(m2m_changed, sender=Collection.listings.through)
+def remember_cleared_collections(sender, instance, action, reverse, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_collection_ids = list(instance.collections.values_list('id', flat=True))
+
+
+def bump_collections_with_listing(listing_id):
+    collection_ids = list(Collection.objects.filter(listings=listing_id).values_list('id', flat=True))
+    if collection_ids:
+        transaction.on_commit(lambda: bump_versions(Collection, collection_ids))
+
+
+@receiver(post_save, sender=Listing)
+def bump_collections_for_listing(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'views'}:
+        return
+    bump_collections_with_listing(instance.pk)
+
+
+@receiver(pre_delete, sender=Listing)
+def bump_collections_for_deleted_listing(sender, instance, **kwargs):
+    # Before the cascade removes the membership rows.
+    bump_collections_with_listing(instance.pk)
+
+
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=ListingImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_collections_for_listing_detail(sender, instance, **kwargs):
+    bump_collections_with_listing(instance.listing_id)
+
+
+@receiver(variants_ready, sender=ListingImage)
+def refresh_listing_for_image_variants(sender, pk, **kwargs):
+    # Variants are written with update(), which skips post_save.
+    listing_id = ListingImage.objects.filter(pk=pk).values_list('listing_id', flat=True).first()
+    if listing_id is not None:
+        bump_collections_with_listing(listing_id)
+        invalidate_listing(listing_id)
+
+
+@receiver(post_save, sender=Listing)
+def push_new_listing_to_feeds(sender, instance, created, **kwargs):
+    if created:
+        listing_id = instance.pk
+        transaction.on_commit(lambda: add_listing_to_feeds.delay(listing_id))
+
+
+@receiver(post_init, sender=User)
+def remember_user_location(sender, instance, **kwargs):
+    instance._feed_location = instance.__dict__.get('location')
+
+
+@receiver(post_save, sender=User)
+def refresh_feed_on_move(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'location' not in update_fields:
+        return
+    old_location = instance._feed_location
+    instance._feed_location = instance.location
+    if not created and old_location != instance.location:
+        user_id = instance.pk
+        transaction.on_commit(lambda: refresh_user_feed.delay(user_id))
+
+
+@receiver(post_save, sender=UserPreferences)
+def refresh_feed_on_preferences(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: refresh_user_feed.delay(user_id))
+
+
+@receiver(post_init, sender=Listing)
+def remember_featured_placement(sender, instance, **kwargs):
+    instance._featured_placement = placement(instance)
+
+
+@receiver(post_save, sender=Listing)
+def invalidate_featured_on_save(sender, instance, created, update_fields=None, **kwargs):
+    old, new = instance._featured_placement, placement(instance)
+    instance._featured_placement = new
+    # Neither featured before nor after: nothing of it is cached. View-count
+    # flushes do not show on cards.
+    if not (old[0] or new[0]) or (update_fields is not None and set(update_fields) <= {'views'}):
+        return
+    placements = [new] if created else [old, new] if old != new else []
+    listing_id = instance.pk
+    transaction.on_commit(lambda: invalidate_listing(listing_id, placements))
+
+
+@receiver(post_delete, sender=Listing)
+def invalidate_featured_on_delete(sender, instance, **kwargs):
+    listing_id, placements = instance.pk, [placement(instance)]
+    transaction.on_commit(lambda: invalidate_listing(listing_id, placements))
+
+
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=ListingImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_featured_card(sender, instance, **kwargs):
+    # Cards show the thumbnail and the listing's rating aggregates.
+    listing_id = instance.listing_id
+    transaction.on_commit(lambda: invalidate_listing(listing_id))
@@ -0,0 +1,24 @@
+from celery import shared_task
+
+from . import feed, lifecycle
+from .view_counter import flush_pending_views
+
+
+@shared_task(ignore_result=True)
+def refresh_user_feed(user_id):
+    feed.refresh_feed(user_id)
+
+
+@shared_task(ignore_result=True)
+def add_listing_to_feeds(listing_id):
+    feed.add_listing_to_feeds(listing_id)
+
+
+@shared_task(ignore_result=True)
+def sweep_listings():
+    lifecycle.sweep_listings()
+
+
+@shared_task(ignore_result=True)
+def flush_listing_views():
+    flush_pending_views()
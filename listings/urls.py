@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, ServiceViewSet, CategoryViewSet, SubCategoryViewSet, CollectionViewSet, BaseListingViewSet
+from .views import ProductViewSet, ServiceViewSet, CategoryViewSet, SubCategoryViewSet, CollectionViewSet, BaseListingViewSet, FeaturedListingsView
 
 router = DefaultRouter()
 router.register(r'listings', BaseListingViewSet, basename='listing')
@@ -11,5 +11,7 @@ router.register(r'subcategories', SubCategoryViewSet, basename='subcategory')
 router.register(r'collections', CollectionViewSet, basename='collection')
 
 urlpatterns = [
+    # Ahead of the router, whose listings/<pk>/ would otherwise match it.
+    path('listings/featured/', FeaturedListingsView.as_view(), name='featured-listings'),
     path('', include(router.urls)),
 ]
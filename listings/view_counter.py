@@ -0,0 +1,152 @@
+"""
+Write-behind buffering for ``Listing.views``.
+
+Detail reads only bump a counter in Redis (or an in-process stand-in); a
+periodic flush folds the buffered increments into Postgres with one batched
+UPDATE, so popular listings never become row-lock hot spots.
+"""
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+
+PENDING_KEY = 'listing_views:pending'
+FLUSH_BATCH_SIZE = 1000
+
+
+class LocalViewCounter:
+    """
+    In-process counter for development and tests. Increments are only visible
+    to (and flushed from) the process that recorded them.
+    """
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, listing_id, amount=1):
+        with self._lock:
+            self._pending[listing_id] += amount
+
+    def get_many(self, listing_ids):
+        with self._lock:
+            return {pk: self._pending[pk] for pk in listing_ids if self._pending.get(pk)}
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = dict(self._pending), Counter()
+        return pending
+
+    def restore(self, pending):
+        with self._lock:
+            self._pending.update(pending)
+
+
+class RedisViewCounter:
+    """
+    Counter kept in a single Redis hash of listing id -> pending increments.
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def incr(self, listing_id, amount=1):
+        self.client.hincrby(PENDING_KEY, listing_id, amount)
+
+    def get_many(self, listing_ids):
+        listing_ids = list(listing_ids)
+        if not listing_ids:
+            return {}
+        values = self.client.hmget(PENDING_KEY, listing_ids)
+        return {pk: int(value) for pk, value in zip(listing_ids, values) if value}
+
+    def drain(self):
+        # Move the hash aside atomically so increments arriving during the
+        # flush land in a fresh hash instead of being lost.
+        from redis.exceptions import ResponseError
+
+        flushing_key = f'{PENDING_KEY}:flushing:{uuid.uuid4().hex}'
+        try:
+            self.client.rename(PENDING_KEY, flushing_key)
+        except ResponseError:
+            # Nothing buffered since the last flush.
+            return {}
+        pipe = self.client.pipeline()
+        pipe.hgetall(flushing_key)
+        pipe.delete(flushing_key)
+        pending, _ = pipe.execute()
+        return {int(pk): int(value) for pk, value in pending.items()}
+
+    def restore(self, pending):
+        pipe = self.client.pipeline()
+        for pk, amount in pending.items():
+            pipe.hincrby(PENDING_KEY, pk, amount)
+        pipe.execute()
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                if settings.LISTING_VIEW_COUNTER_BACKEND == 'redis':
+                    _counter = RedisViewCounter(settings.REDIS_URL)
+                else:
+                    _counter = LocalViewCounter()
+    return _counter
+
+
+def record_view(listing_id):
+    """
+    Buffer one view of a listing. Never touches the database.
+    """
+    get_view_counter().incr(listing_id)
+
+
+def apply_pending_views(listings):
+    """
+    Add buffered, not yet flushed views to ``listing.views`` in place.
+    """
+    pending = get_view_counter().get_many([listing.pk for listing in listings])
+    for listing in listings:
+        listing.views += pending.get(listing.pk, 0)
+    return listings
+
+
+def flush_pending_views():
+    """
+    Write all buffered increments to the database and return how many listings
+    were updated. Increments are put back if the write fails.
+    """
+    from .models import Listing
+
+    counter = get_view_counter()
+    pending = counter.drain()
+    if not pending:
+        return 0
+
+    table = connection.ops.quote_name(Listing._meta.db_table)
+    items = list(pending.items())
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                    batch = items[start:start + FLUSH_BATCH_SIZE]
+                    values = ', '.join(['(%s, %s)'] * len(batch))
+                    params = [value for item in batch for value in item]
+                    cursor.execute(
+                        f'UPDATE {table} AS l SET views = l.views + v.delta '
+                        f'FROM (VALUES {values}) AS v(id, delta) WHERE l.id = v.id',
+                        params,
+                    )
+    except Exception:
+        counter.restore(pending)
+        raise
+    return len(items)
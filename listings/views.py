@@ -1,18 +1,74 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
+from .category_tree import get_category_tree, get_subtree_ids
+from .featured import featured_listings
+from .feed import feed_page, get_feed, is_feed_cursor
 from .models import Listing, Category, Collection
-from .serializers import ListingSerializer, CategorySerializer, CollectionSerializer
+from .ratings import filter_min_rating, rating_ordering
+from .search import SEARCH_BACKENDS, search_listings
+from .serializers import ListingSerializer, ListingListSerializer, CategorySerializer, CollectionSerializer
+from .view_counter import apply_pending_views, record_view
+from utils.conditional import ConditionalGetMixin
+from utils.pagination import KeysetCursorPagination
+from utils.query_plan import QueryPlanViewSetMixin, plan_queryset
+from utils.validators import validate_coordinates
 
-class BaseListingViewSet(viewsets.ModelViewSet):
+class BaseListingViewSet(QueryPlanViewSetMixin, viewsets.ModelViewSet):
     serializer_class = ListingSerializer
     queryset = Listing.objects.all()  # Add a default queryset
+    listing_type = None
+
+    def get_serializer_class(self):
+        if self.action in ['list', 'search', 'feed']:
+            return ListingListSerializer
+        return ListingSerializer
 
     def get_queryset(self):
         # Override get_queryset to filter based on listing_type
-        return self.queryset.filter(listing_type=self.listing_type)
+        queryset = super().get_queryset()
+        if self.listing_type:
+            queryset = queryset.filter(listing_type=self.listing_type)
+        if self.action in ['list', 'search', 'feed']:
+            queryset = queryset.active()
+        if self.action in ['list', 'search']:
+            queryset = self.filter_category_subtree(queryset)
+            queryset = filter_min_rating(queryset, self.request.query_params)
+        return queryset
+
+    @property
+    def ordering(self):
+        # Keyset pagination order; both are backed by an index.
+        return rating_ordering(self.request.query_params) or ('-listing_date', '-id')
+
+    def filter_category_subtree(self, queryset):
+        """
+        ``?category_subtree=<id>``: listings in that category or any of its
+        descendants. The ids come from the cached tree, so no join is needed.
+        """
+        category_id = self.request.query_params.get('category_subtree')
+        if category_id is None:
+            return queryset
+        try:
+            category_id = int(category_id)
+        except ValueError:
+            raise ValidationError({'error': 'category_subtree must be a category id'})
+        return queryset.filter(category_id__in=get_subtree_ids(category_id))
+
+    def retrieve(self, request, *args, **kwargs):
+        listing = self.get_object()
+        # Buffered; the row is only written by the periodic flush.
+        record_view(listing.pk)
+        apply_pending_views([listing])
+        serializer = self.get_serializer(listing)
+        return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def add_to_collection(self, request, pk=None):
@@ -21,17 +77,42 @@ class BaseListingViewSet(viewsets.ModelViewSet):
         try:
             collection = Collection.objects.get(id=collection_id)
             collection.listings.add(listing)
-            return Response({'status': f'{self.listing_type.capitalize()} added to collection'}, status=status.HTTP_200_OK)
+            return Response({'status': f'{(self.listing_type or "listing").capitalize()} added to collection'}, status=status.HTTP_200_OK)
         except Collection.DoesNotExist:
             return Response({'error': 'Collection not found'}, status=status.HTTP_404_NOT_FOUND)
 
     @action(detail=False, methods=['get'])
     def search(self, request):
         query = request.query_params.get('q', '')
-        listings = self.queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+        backend = request.query_params.get('backend')
+        if backend is not None and backend not in SEARCH_BACKENDS:
+            return Response({'error': f'Unknown search backend: {backend}'}, status=status.HTTP_400_BAD_REQUEST)
+        listings = search_listings(self.get_queryset(), query, backend=backend)
         serializer = self.get_serializer(listings, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """
+        The user's home feed (see ``listings.feed``), best first. The cursor
+        is the score and id of the last listing on the previous page.
+        """
+        paginator = KeysetCursorPagination()
+        cursor = paginator.decode_cursor(request)
+        if cursor is not None and not is_feed_cursor(cursor):
+            raise NotFound(paginator.invalid_cursor_message)
+        ids, next_cursor = feed_page(get_feed(request.user.pk), cursor, paginator.get_page_size(request))
+        # One query for the page; listings sold or expired since the build drop out.
+        listings = self.get_queryset().filter(pk__in=ids)
+        by_id = {listing.pk: listing for listing in listings}
+        serializer = self.get_serializer([by_id[pk] for pk in ids if pk in by_id], many=True)
+        next_link = None
+        if next_cursor is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), paginator.cursor_query_param, paginator.encode_cursor(*next_cursor)
+            )
+        return Response({'next': next_link, 'results': serializer.data})
+
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def media_upload(self, request, pk=None):
         listing = self.get_object()
@@ -49,21 +130,59 @@ class ServiceViewSet(BaseListingViewSet):
     queryset = Listing.objects.filter(listing_type='service')
     listing_type = 'service'
 
+class FeaturedListingsView(APIView):
+    """
+    ``/listings/featured/?lat=&lon=[&category=]``: featured listings nearest
+    the point, as cached cards (see ``listings.featured``).
+
+    Public and unauthenticated on purpose: token and session lookups would
+    cost a query, and a warm cache answers without any.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        lat = request.query_params.get('lat')
+        lon = request.query_params.get('lon')
+        if lat is None or lon is None:
+            return Response({'error': 'lat and lon are required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            validate_coordinates(lat, lon)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        category_id = request.query_params.get('category')
+        if category_id is not None:
+            try:
+                category_id = int(category_id)
+            except ValueError:
+                return Response({'error': 'category must be a category id'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': featured_listings(float(lon), float(lat), category_id)})
+
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.filter(parent_category__isnull=True)
     serializer_class = CategorySerializer
 
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        return Response(get_category_tree()['roots'])
+
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        category = get_object_or_404(Category, pk=pk)
+        serializer = self.get_serializer(category.get_descendants().order_by('path'), many=True)
+        return Response(serializer.data)
+
 class SubCategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.filter(parent_category__isnull=False)
     serializer_class = CategorySerializer
 
-class CollectionViewSet(viewsets.ModelViewSet):
+class CollectionViewSet(ConditionalGetMixin, QueryPlanViewSetMixin, viewsets.ModelViewSet):
     queryset = Collection.objects.all()
     serializer_class = CollectionSerializer
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], serializer_class=ListingListSerializer)
     def items(self, request, pk=None):
         collection = self.get_object()
-        listings = collection.listings.all()
-        serializer = ListingSerializer(listings, many=True)
+        listings = plan_queryset(collection.listings.all(), ListingListSerializer, request)
+        serializer = self.get_serializer(listings, many=True)
         return Response(serializer.data)
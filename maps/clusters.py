@@ -0,0 +1,127 @@
+"""
+Grid clustering of entity and listing locations for the map.
+
+Each XYZ tile is split into ``MAP_CLUSTER_GRID_SIZE`` x ``MAP_CLUSTER_GRID_SIZE``
+cells in web mercator and points are grouped by cell in SQL, so the response
+carries at most a fixed number of clusters per tile however many points fall
+inside it. Clusters are cached per tile; only uncached tiles are queried, all
+of them in a single statement.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from entities.models import Entity
+from listings.models import Category, Listing
+
+from .tiles import MERCATOR_EXTENT, tile_lonlat_bounds, tile_size
+
+LAYERS = ('entities', 'listings')
+MAX_TILES = 64
+TOP_CATEGORIES = 3
+
+
+def _layer_sql(layer):
+    """
+    ``(from clause, categories expression, extra condition)`` for a layer.
+    Every layer exposes ``t.id`` and ``t.location``.
+    """
+    if layer == 'entities':
+        return f'{Entity._meta.db_table} AS t', 't.deals_in', 't.is_active'
+    return (
+        f'{Listing._meta.db_table} AS t LEFT JOIN {Category._meta.db_table} AS c ON c.id = t.category_id',
+        'ARRAY_REMOVE(ARRAY[c.category_name], NULL)',
+        # LIVE_LISTING, so the partial location index applies.
+        "t.availability_status = 'available'",
+    )
+
+
+CLUSTER_SQL = """
+WITH points AS (
+    SELECT t.id, t.location, {categories} AS categories,
+           floor((ST_X(p) + %(extent)s) / %(cell)s)::int AS cx,
+           floor((%(extent)s - ST_Y(p)) / %(cell)s)::int AS cy
+    FROM {source}, ST_Transform(t.location, 3857) AS p
+    WHERE t.location && ST_MakeEnvelope(%(min_lon)s, %(min_lat)s, %(max_lon)s, %(max_lat)s, 4326)
+      AND {condition}
+),
+clusters AS (
+    SELECT cx, cy, count(*) AS n, avg(ST_X(location)) AS lon, avg(ST_Y(location)) AS lat, min(id) AS first_id
+    FROM points
+    GROUP BY cx, cy
+),
+ranked AS (
+    SELECT cx, cy, category, row_number() OVER (PARTITION BY cx, cy ORDER BY count(*) DESC, category) AS rank
+    FROM points, unnest(categories) AS category
+    GROUP BY cx, cy, category
+)
+SELECT c.cx, c.cy, c.n, c.lon, c.lat, c.first_id,
+       COALESCE(array_agg(r.category ORDER BY r.rank) FILTER (WHERE r.category IS NOT NULL), '{{}}')
+FROM clusters c
+LEFT JOIN ranked r ON r.cx = c.cx AND r.cy = c.cy AND r.rank <= %(top)s
+GROUP BY c.cx, c.cy, c.n, c.lon, c.lat, c.first_id
+"""
+
+
+def cluster_cache_key(layer, zoom, x, y):
+    return f'map:clusters:{layer}:{zoom}:{x}:{y}'
+
+
+def cluster_payload(count, lon, lat, first_id, categories):
+    cluster = {'count': count, 'lat': round(lat, 6), 'lon': round(lon, 6), 'top_categories': list(categories)}
+    if count == 1:
+        # A lone point can be opened directly.
+        cluster['id'] = first_id
+    return cluster
+
+
+def query_clusters(layer, zoom, x_range, y_range):
+    """
+    Cluster a rectangular block of tiles in one query. Returns
+    ``{(x, y): [cluster, ...]}`` with an entry, possibly empty, for every tile
+    in the block.
+    """
+    grid = settings.MAP_CLUSTER_GRID_SIZE
+    (min_x, max_x), (min_y, max_y) = x_range, y_range
+    min_lon, min_lat, _, _ = tile_lonlat_bounds(zoom, min_x, max_y)
+    _, _, max_lon, max_lat = tile_lonlat_bounds(zoom, max_x, min_y)
+    source, categories, condition = _layer_sql(layer)
+    params = {
+        'extent': MERCATOR_EXTENT,
+        'cell': tile_size(zoom) / grid,
+        'min_lon': min_lon, 'min_lat': min_lat, 'max_lon': max_lon, 'max_lat': max_lat,
+        'top': TOP_CATEGORIES,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(CLUSTER_SQL.format(source=source, categories=categories, condition=condition), params)
+        rows = cursor.fetchall()
+
+    tiles = {(x, y): [] for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)}
+    for cx, cy, count, lon, lat, first_id, top_categories in rows:
+        # Points on the block's outer edge can land in a neighbouring tile.
+        tile = tiles.get((cx // grid, cy // grid))
+        if tile is not None:
+            tile.append(cluster_payload(count, lon, lat, first_id, top_categories))
+    return tiles
+
+
+def get_clusters(layer, zoom, tiles):
+    """
+    Clusters for the given ``(x, y)`` tiles, served from the cache where
+    possible.
+    """
+    keys = {tile: cluster_cache_key(layer, zoom, *tile) for tile in tiles}
+    cached = cache.get_many(list(keys.values()))
+    by_tile = {tile: cached[key] for tile, key in keys.items() if key in cached}
+
+    missing = [tile for tile in tiles if tile not in by_tile]
+    if missing:
+        xs, ys = [x for x, _ in missing], [y for _, y in missing]
+        computed = query_clusters(layer, zoom, (min(xs), max(xs)), (min(ys), max(ys)))
+        cache.set_many(
+            {cluster_cache_key(layer, zoom, *tile): clusters for tile, clusters in computed.items()},
+            settings.MAP_CLUSTER_CACHE_TIMEOUT,
+        )
+        by_tile.update(computed)
+
+    return [cluster for tile in tiles for cluster in by_tile[tile]]
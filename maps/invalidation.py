@@ -0,0 +1,33 @@
+"""
+Drop cached vector tiles and clusters for the tiles a point falls in.
+
+A point sits in exactly one tile per zoom level, so an edit invalidates
+``MAX_ZOOM + 1`` tiles for its old location and as many for its new one,
+leaving the rest of the map cached.
+"""
+from django.core.cache import cache
+
+from .clusters import cluster_cache_key
+from .tiles import MAX_ZOOM, lonlat_to_tile
+from .vector_tiles import tile_cache_key
+
+INVALIDATION_BATCH_SIZE = 1000
+
+
+def affected_tiles(points, max_zoom=MAX_ZOOM):
+    """
+    The ``(zoom, x, y)`` tiles containing any of the ``(lon, lat)`` points.
+    """
+    return {(zoom, *lonlat_to_tile(lon, lat, zoom)) for lon, lat in points for zoom in range(max_zoom + 1)}
+
+
+def invalidate_points(layer, points):
+    """
+    Invalidate the vector tiles, and the ``layer`` clusters, covering ``points``.
+    """
+    keys = []
+    for zoom, x, y in affected_tiles(points):
+        keys.append(tile_cache_key(zoom, x, y))
+        keys.append(cluster_cache_key(layer, zoom, x, y))
+    for start in range(0, len(keys), INVALIDATION_BATCH_SIZE):
+        cache.delete_many(keys[start:start + INVALIDATION_BATCH_SIZE])
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from entities.models import Entity
+from listings.models import Listing
+
+from .invalidation import invalidate_points
+
+# Fields that are drawn on the map; saves touching none of them keep the tiles.
+TILE_FIELDS = {
+    Entity: {'name', 'location', 'is_active'},
+    Listing: {'title', 'listing_type', 'price', 'location', 'vendor', 'availability_status'},
+}
+LAYERS = {Entity: 'entities', Listing: 'listings'}
+
+
+def _coords(point):
+    return None if point is None else (point.x, point.y)
+
+
+@receiver(post_init, sender=Entity)
+@receiver(post_init, sender=Listing)
+def remember_tile_location(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred location is not fetched just for this.
+    instance._tile_location = _coords(instance.__dict__.get('location'))
+
+
+@receiver(post_save, sender=Entity)
+@receiver(post_save, sender=Listing)
+def invalidate_saved_tiles(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not TILE_FIELDS[sender] & set(update_fields):
+        return
+    points = {_coords(instance.__dict__.get('location')), instance._tile_location} - {None}
+    instance._tile_location = _coords(instance.__dict__.get('location'))
+    transaction.on_commit(lambda: invalidate_points(LAYERS[sender], points))
+
+
+@receiver(post_delete, sender=Entity)
+@receiver(post_delete, sender=Listing)
+def invalidate_deleted_tiles(sender, instance, **kwargs):
+    points = {_coords(instance.__dict__.get('location')), instance._tile_location} - {None}
+    transaction.on_commit(lambda: invalidate_points(LAYERS[sender], points))
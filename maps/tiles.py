@@ -0,0 +1,73 @@
+"""
+XYZ (web mercator) tile arithmetic.
+"""
+import math
+
+# Half the width of the EPSG:3857 world square, in metres.
+MERCATOR_EXTENT = 20037508.342789244
+MAX_LATITUDE = 85.0511287798
+MAX_ZOOM = 22
+
+
+def tile_size(zoom):
+    return 2 * MERCATOR_EXTENT / (2 ** zoom)
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """
+    The ``(x, y)`` of the tile containing a lon/lat point at ``zoom``.
+    """
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """
+    The tile's extent in EPSG:3857 metres, ``(minx, miny, maxx, maxy)``.
+    """
+    size = tile_size(zoom)
+    minx = -MERCATOR_EXTENT + x * size
+    maxy = MERCATOR_EXTENT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tile_lonlat_bounds(zoom, x, y):
+    """
+    The tile's extent in degrees, ``(min_lon, min_lat, max_lon, max_lat)``.
+    """
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tiles_for_bbox(bbox, zoom):
+    """
+    Every ``(x, y)`` tile at ``zoom`` that intersects a lon/lat bbox.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    min_x, max_y = lonlat_to_tile(min_lon, min_lat, zoom)
+    max_x, min_y = lonlat_to_tile(max_lon, max_lat, zoom)
+    return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+
+def is_valid_tile(zoom, x, y):
+    return 0 <= zoom <= MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
+
+
+def parse_bbox(value):
+    """
+    Parse ``min_lon,min_lat,max_lon,max_lat``. Raises ``ValueError``.
+    """
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+    min_lon, min_lat, max_lon, max_lat = parts
+    if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError('bbox is out of range or inverted')
+    return min_lon, min_lat, max_lon, max_lat
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import MapViewSet, VectorTileView
+
+router = DefaultRouter()
+router.register(r'map', MapViewSet, basename='map')
+
+urlpatterns = [
+    path('', include(router.urls)),
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', VectorTileView.as_view(), name='vector-tile'),
+]
@@ -0,0 +1,71 @@
+"""
+Mapbox Vector Tiles for entity and listing locations.
+
+Each tile is rendered by PostGIS with ``ST_AsMVT`` (one ``entities`` and one
+``listings`` layer) and cached as bytes with its ETag, so repeat requests never
+touch the database and clients holding the current ETag get a 304.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from entities.models import Entity
+from listings.models import Listing
+
+from .tiles import tile_bounds, tile_lonlat_bounds
+
+MVT_EXTENT = 4096
+
+TILE_SQL = """
+WITH entities AS (
+    SELECT t.id, t.name,
+           ST_AsMVTGeom(ST_Transform(t.location, 3857), ST_MakeEnvelope(%(minx)s, %(miny)s, %(maxx)s, %(maxy)s, 3857), %(extent)s) AS geom
+    FROM {entity_table} AS t
+    WHERE t.location && ST_MakeEnvelope(%(min_lon)s, %(min_lat)s, %(max_lon)s, %(max_lat)s, 4326)
+      AND t.is_active
+),
+listings AS (
+    SELECT t.id, t.title, t.listing_type, t.price::float8 AS price, t.vendor_id,
+           ST_AsMVTGeom(ST_Transform(t.location, 3857), ST_MakeEnvelope(%(minx)s, %(miny)s, %(maxx)s, %(maxy)s, 3857), %(extent)s) AS geom
+    FROM {listing_table} AS t
+    WHERE t.location && ST_MakeEnvelope(%(min_lon)s, %(min_lat)s, %(max_lon)s, %(max_lat)s, 4326)
+      AND t.availability_status = 'available'
+)
+SELECT COALESCE((SELECT ST_AsMVT(entities, 'entities', %(extent)s, 'geom') FROM entities WHERE geom IS NOT NULL), ''::bytea)
+    || COALESCE((SELECT ST_AsMVT(listings, 'listings', %(extent)s, 'geom') FROM listings WHERE geom IS NOT NULL), ''::bytea)
+"""
+
+
+def tile_cache_key(zoom, x, y):
+    return f'map:tile:{zoom}:{x}:{y}'
+
+
+def render_tile(zoom, x, y):
+    minx, miny, maxx, maxy = tile_bounds(zoom, x, y)
+    min_lon, min_lat, max_lon, max_lat = tile_lonlat_bounds(zoom, x, y)
+    params = {
+        'minx': minx, 'miny': miny, 'maxx': maxx, 'maxy': maxy,
+        'min_lon': min_lon, 'min_lat': min_lat, 'max_lon': max_lon, 'max_lat': max_lat,
+        'extent': MVT_EXTENT,
+    }
+    sql = TILE_SQL.format(entity_table=Entity._meta.db_table, listing_table=Listing._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return bytes(cursor.fetchone()[0])
+
+
+def get_tile(zoom, x, y):
+    """
+    ``(tile bytes, etag)``, from the cache when possible.
+    """
+    key = tile_cache_key(zoom, x, y)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = render_tile(zoom, x, y)
+    tile = (data, f'"{hashlib.md5(data).hexdigest()}"')
+    cache.set(key, tile, settings.MAP_TILE_CACHE_TIMEOUT)
+    return tile
@@ -0,0 +1,65 @@
+from django.http import HttpResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .clusters import LAYERS, MAX_TILES, get_clusters
+from .tiles import MAX_ZOOM, is_valid_tile, parse_bbox, tiles_for_bbox
+from .vector_tiles import get_tile
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+
+class MapViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """
+        Clustered entity or listing locations inside ``bbox`` at ``zoom``.
+        """
+        layer = request.query_params.get('layer', 'entities')
+        if layer not in LAYERS:
+            return Response({'error': f"layer must be one of: {', '.join(LAYERS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bbox = parse_bbox(request.query_params.get('bbox', ''))
+        except ValueError:
+            return Response({'error': 'bbox must be min_lon,min_lat,max_lon,max_lat'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            zoom = int(request.query_params.get('zoom', ''))
+        except ValueError:
+            return Response({'error': 'zoom must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= zoom <= MAX_ZOOM:
+            return Response({'error': f'zoom must be between 0 and {MAX_ZOOM}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tiles = tiles_for_bbox(bbox, zoom)
+        if len(tiles) > MAX_TILES:
+            return Response({'error': 'bbox is too large for this zoom level'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'layer': layer, 'zoom': zoom, 'clusters': get_clusters(layer, zoom, tiles)})
+
+
+class VectorTileView(APIView):
+    """
+    ``/tiles/{z}/{x}/{y}.mvt``: entities and listings as a Mapbox Vector Tile.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, z, x, y):
+        if not is_valid_tile(z, x, y):
+            raise NotFound('No such tile')
+
+        data, etag = get_tile(z, x, y)
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif not data:
+            response = HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        else:
+            response = HttpResponse(data, content_type=MVT_CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
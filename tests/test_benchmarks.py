@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from benchmarks.runner import EndpointResult, compare, percentile
+
+
+def make_result(name, p95_ms, queries):
+    return EndpointResult(name, 100, 0, p95_ms / 2, p95_ms, p95_ms * 2, 50.0, queries)
+
+
+class BenchmarkReportTest(SimpleTestCase):
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertAlmostEqual(percentile(samples, 50), 50.5)
+        self.assertAlmostEqual(percentile(samples, 99), 99.01)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+
+    def test_compare_flags_regressions_over_threshold(self):
+        baseline = {
+            'listing_search': {'p95_ms': 100.0, 'queries_per_request': 4},
+            'notifications': {'p95_ms': 10.0, 'queries_per_request': 3},
+        }
+        results = [make_result('listing_search', 150.0, 4), make_result('notifications', 10.5, 3)]
+        rows = {(name, metric): (change, regressed) for name, metric, _, _, change, regressed in compare(results, baseline)}
+        self.assertEqual(rows[('listing_search', 'p95_ms')], (50.0, True))
+        self.assertEqual(rows[('listing_search', 'queries_per_request')], (0.0, False))
+        self.assertEqual(rows[('notifications', 'p95_ms')], (5.0, False))
+
+    def test_compare_skips_endpoints_missing_from_baseline(self):
+        self.assertEqual(compare([make_result('new_endpoint', 10.0, 1)], {}), [])
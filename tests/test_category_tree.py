@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+from rest_framework import serializers
+
+from listings import category_tree
+from listings.category_tree import build_tree, bump_tree_version, get_category_tree, get_subtree_ids
+from listings.models import Category
+from listings.serializers import CategorySerializer
+
+ROWS = [
+    (1, 'Electronics', None, '1/', 0),
+    (4, 'Mobiles', 1, '1/4/', 1),
+    (9, 'Chargers', 4, '1/4/9/', 2),
+    (5, 'Laptops', 1, '1/5/', 1),
+    (2, 'Home', None, '2/', 0),
+]
+
+
+class BuildTreeTest(SimpleTestCase):
+    def test_nesting(self):
+        tree = build_tree(ROWS)
+        self.assertEqual([root['id'] for root in tree['roots']], [1, 2])
+        electronics = tree['roots'][0]
+        self.assertEqual([child['id'] for child in electronics['children']], [4, 5])
+        self.assertEqual(electronics['children'][0]['children'][0]['category_name'], 'Chargers')
+
+    def test_subtree_ids(self):
+        tree = build_tree(ROWS)
+        self.assertEqual(sorted(get_subtree_ids(1, tree)), [1, 4, 5, 9])
+        self.assertEqual(get_subtree_ids(4, tree), [4, 9])
+        self.assertEqual(get_subtree_ids(99, tree), [])
+
+    def test_prefix_is_per_segment(self):
+        tree = build_tree([(1, 'A', None, '1/', 0), (12, 'B', None, '12/', 0)])
+        self.assertEqual(get_subtree_ids(1, tree), [1])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TreeCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tree_is_cached_until_the_version_moves(self):
+        with mock.patch.object(category_tree, 'Category') as Category:
+            Category.objects.order_by.return_value.values_list.return_value = ROWS
+            get_category_tree()
+            get_category_tree()
+            self.assertEqual(Category.objects.order_by.call_count, 1)
+
+            bump_tree_version()
+            get_category_tree()
+            self.assertEqual(Category.objects.order_by.call_count, 2)
+
+
+class CategoryMoveTest(SimpleTestCase):
+    def setUp(self):
+        self.mobiles = Category(id=4, category_name='Mobiles', path='1/4/', depth=1)
+
+    def test_serializer_refuses_a_descendant_as_parent(self):
+        serializer = CategorySerializer(instance=self.mobiles)
+        for parent in (Category(id=9, path='1/4/9/'), self.mobiles):
+            with self.subTest(parent=parent.pk), self.assertRaises(serializers.ValidationError):
+                serializer.validate_parent_category(parent)
+        sibling = Category(id=5, path='1/5/')
+        self.assertIs(serializer.validate_parent_category(sibling), sibling)
+        self.assertIsNone(serializer.validate_parent_category(None))
+
+    def test_new_categories_take_any_parent(self):
+        parent = Category(id=9, path='1/4/9/')
+        self.assertIs(CategorySerializer().validate_parent_category(parent), parent)
+
+    def test_model_keeps_the_check_as_a_backstop(self):
+        self.mobiles.parent_category = Category(id=9, path='1/4/9/')
+        with self.assertRaises(ValidationError):
+            self.mobiles.save()
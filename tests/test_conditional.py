@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework import viewsets
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from accounts import signals
+from listings import signals as listing_signals
+from accounts.models import User
+from listings.models import Collection, ListingImage
+from utils.conditional import ConditionalGetMixin, bump_version, get_version
+from utils.image_variants import variants_ready
+
+factory = APIRequestFactory()
+
+
+class CountingViewSet(viewsets.GenericViewSet):
+    queryset = Collection.objects.none()
+    permission_classes = [AllowAny]
+    calls = 0
+
+    def list(self, request):
+        CountingViewSet.calls += 1
+        return Response([{'id': 1}])
+
+    def retrieve(self, request, pk=None):
+        CountingViewSet.calls += 1
+        return Response({'id': pk})
+
+
+class ConditionalViewSet(ConditionalGetMixin, CountingViewSet):
+    pass
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConditionalGetTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        CountingViewSet.calls = 0
+        self.detail = ConditionalViewSet.as_view({'get': 'retrieve'})
+        self.list = ConditionalViewSet.as_view({'get': 'list'})
+
+    def test_not_modified_skips_the_handler(self):
+        response = self.detail(factory.get('/collections/4/'), pk='4')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.detail(factory.get('/collections/4/', HTTP_IF_NONE_MATCH=etag), pk='4')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(CountingViewSet.calls, 1)
+
+    def test_bump_changes_the_etag(self):
+        etag = self.detail(factory.get('/collections/4/'), pk='4')['ETag']
+        with mock.patch('utils.conditional.time.time', return_value=get_version(Collection, 4) + 1):
+            bump_version(Collection, 4)
+        response = self.detail(factory.get('/collections/4/', HTTP_IF_NONE_MATCH=etag), pk='4')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bump_within_the_same_second_moves_last_modified(self):
+        with mock.patch('utils.conditional.time.time', return_value=1700000000.2):
+            last_modified = self.detail(factory.get('/collections/4/'), pk='4')['Last-Modified']
+            bump_version(Collection, 4)
+            bump_version(Collection, 4)
+            response = self.detail(factory.get('/collections/4/', HTTP_IF_MODIFIED_SINCE=last_modified), pk='4')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(get_version(Collection, 4), 1700000002)
+            self.assertEqual(get_version(Collection), 1700000001)
+
+    def test_stamps_expire(self):
+        with mock.patch('utils.conditional.cache') as fake_cache:
+            fake_cache.get.return_value = None
+            fake_cache.get_many.return_value = {}
+            get_version(Collection, 999)
+            bump_version(Collection, 4)
+        self.assertEqual(fake_cache.add.call_args.kwargs['timeout'], settings.CONDITIONAL_VERSION_TIMEOUT)
+        self.assertEqual(fake_cache.set_many.call_args.kwargs['timeout'], settings.CONDITIONAL_VERSION_TIMEOUT)
+        self.assertIsNotNone(settings.CONDITIONAL_VERSION_TIMEOUT)
+
+    def test_list_etag_varies_with_the_query(self):
+        first = self.list(factory.get('/collections/'))
+        second = self.list(factory.get('/collections/', {'fields': 'id'}))
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        response = self.list(factory.get('/collections/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']))
+        self.assertEqual(response.status_code, 304)
+
+
+class UserVersionSignalTest(SimpleTestCase):
+    def test_logins_do_not_bump(self):
+        with mock.patch.object(signals, 'bump_version_on_commit') as bump:
+            signals.bump_user_version(User, SimpleNamespace(pk=3), update_fields=frozenset(['last_login']))
+            signals.bump_user_version(User, SimpleNamespace(pk=3), update_fields=None)
+        bump.assert_called_once_with(User, 3)
+
+
+
+class ListingImageVariantsSignalTest(SimpleTestCase):
+    def test_variants_bump_collections_with_the_listing(self):
+        with mock.patch.object(listing_signals, 'ListingImage') as images, \
+                mock.patch.object(listing_signals, 'bump_collections_with_listing') as bump, \
+                mock.patch.object(listing_signals, 'invalidate_listing') as invalidate:
+            images.objects.filter.return_value.values_list.return_value.first.return_value = 7
+            variants_ready.send(sender=ListingImage, pk=3, field_name='image_url')
+        images.objects.filter.assert_called_once_with(pk=3)
+        bump.assert_called_once_with(7)
+        invalidate.assert_called_once_with(7)
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from accounts.consumers import NotificationConsumer
+from accounts.push import user_group_name
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, NOTIFICATION_PUSH_COALESCE_SECONDS=0.05)
+class NotificationConsumerTest(SimpleTestCase):
+    def make_communicator(self, user):
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+        communicator.scope['user'] = user
+        return communicator
+
+    async def test_anonymous_connections_are_rejected(self):
+        communicator = self.make_communicator(SimpleNamespace(pk=None, is_authenticated=False))
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_bursts_are_coalesced_into_one_frame(self):
+        communicator = self.make_communicator(SimpleNamespace(pk=42, is_authenticated=True))
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        channel_layer = get_channel_layer()
+        for notification_id in (1, 2, 3):
+            await channel_layer.group_send(user_group_name(42), {
+                'type': 'notification.created',
+                'notification': {'id': notification_id},
+            })
+
+        message = await communicator.receive_json_from(timeout=1)
+        self.assertEqual(message['type'], 'notifications')
+        self.assertEqual([n['id'] for n in message['notifications']], [1, 2, 3])
+        self.assertTrue(await communicator.receive_nothing(timeout=0.1))
+        await communicator.disconnect()
+
+    async def test_other_users_notifications_are_not_delivered(self):
+        communicator = self.make_communicator(SimpleNamespace(pk=42, is_authenticated=True))
+        await communicator.connect()
+        await get_channel_layer().group_send(user_group_name(43), {
+            'type': 'notification.created',
+            'notification': {'id': 1},
+        })
+        self.assertTrue(await communicator.receive_nothing(timeout=0.1))
+        await communicator.disconnect()
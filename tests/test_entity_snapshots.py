@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework import viewsets
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from entities import snapshots
+from entities.views import EntityViewSet
+from entities.snapshots import get_snapshot, schedule_snapshot_rebuild, snapshot_key
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@mock.patch.object(snapshots.transaction, 'on_commit', lambda func: func())
+class SnapshotTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_snapshot_is_built_once_then_served_from_cache(self):
+        with mock.patch.object(snapshots, 'render_snapshot', return_value=b'{"id":1}') as render:
+            self.assertEqual(get_snapshot(1), b'{"id":1}')
+            self.assertEqual(get_snapshot(1), b'{"id":1}')
+        render.assert_called_once_with(1)
+
+    def test_missing_entity(self):
+        cache.set(snapshot_key(2), b'stale')
+        with mock.patch.object(snapshots, 'render_snapshot', return_value=None):
+            self.assertIsNone(snapshots.rebuild_snapshot(2))
+        self.assertIsNone(cache.get(snapshot_key(2)))
+
+    def test_rebuilds_are_debounced(self):
+        with mock.patch('entities.tasks.rebuild_entity_snapshot') as task:
+            schedule_snapshot_rebuild(3)
+            schedule_snapshot_rebuild(3)
+        task.delay.assert_called_once_with(3)
+
+        # Once the rebuild starts, new changes schedule another one.
+        with mock.patch.object(snapshots, 'render_snapshot', return_value=b'{}'):
+            snapshots.rebuild_snapshot(3)
+        with mock.patch('entities.tasks.rebuild_entity_snapshot') as task:
+            schedule_snapshot_rebuild(3)
+        task.delay.assert_called_once_with(3)
+
+
+class RetrieveSnapshotTest(SimpleTestCase):
+    def test_custom_shapes_skip_the_second_conditional_check(self):
+        request = Request(APIRequestFactory().get('/entities/1/', {'fields': 'id'}))
+        view = EntityViewSet(request=request, kwargs={'pk': '1'}, format_kwarg=None, action='retrieve')
+        with mock.patch.object(viewsets.ModelViewSet, 'retrieve', return_value=Response({'id': 1})) as retrieve, \
+                mock.patch('utils.conditional.get_version') as get_version:
+            response = view.retrieve_snapshot(request, pk='1')
+        self.assertEqual(response.data, {'id': 1})
+        retrieve.assert_called_once_with(view, request, pk='1')
+        get_version.assert_not_called()
@@ -0,0 +1,93 @@
+import time
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from listings import featured, signals
+from listings.models import Listing, Review
+from listings.views import FeaturedListingsView
+
+factory = APIRequestFactory()
+TREE = {'roots': [], 'paths': {3: '3/', 17: '3/17/', 42: '3/17/42/', 31: '31/'}}
+LON, LAT = 77.2, 28.6
+
+
+def warm(entries, category_id=None):
+    """Cache the 3x3 buckets around (LON, LAT), all entries in the centre one."""
+    cells = featured.neighbourhood(featured.cell_for(LON, LAT))
+    cache.set_many({featured.bucket_key(cell, category_id): [] for cell in cells})
+    cache.set(featured.bucket_key(cells[4], category_id), entries)
+    cache.set_many({featured.card_key(entry[0]): {'id': entry[0]} for entry in entries})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class FeaturedListingsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_cache_answers_without_the_database(self):
+        later = time.time() + 3600
+        warm([(1, later, LON + 0.02, LAT), (2, later, LON, LAT + 0.001), (3, time.time() - 1, LON, LAT)])
+        # SimpleTestCase fails any query.
+        response = FeaturedListingsView.as_view()(factory.get('/listings/featured/', {'lat': LAT, 'lon': LON}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['id'] for card in response.data['results']], [2, 1])
+        self.assertAlmostEqual(response.data['results'][0]['distance'], 0.111, places=2)
+
+    def test_cold_buckets_and_cards_are_built(self):
+        later = time.time() + 3600
+        with mock.patch.object(featured, 'build_bucket', return_value=[(5, later, LON, LAT)]) as build, \
+                mock.patch.object(featured, 'build_cards', return_value={featured.card_key(5): {'id': 5}}) as cards:
+            results = featured.featured_listings(LON, LAT, category_id=17)
+        self.assertEqual(build.call_count, 9)
+        self.assertEqual(build.call_args.args[1], 17)
+        # Every mocked bucket holds the same listing; it is returned once.
+        cards.assert_called_once_with([5])
+        self.assertEqual([card['id'] for card in results], [5])
+
+    def test_invalid_coordinates(self):
+        response = FeaturedListingsView.as_view()(factory.get('/listings/featured/', {'lat': 95, 'lon': LON}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_buckets_cover_the_category_and_its_ancestors(self):
+        self.assertEqual(featured.bucket_categories(42, TREE), [None, 3, 17, 42])
+        self.assertEqual(featured.bucket_categories(None, TREE), [None])
+
+
+class FeaturedSignalTest(SimpleTestCase):
+    def invalidations(self, listing, created=False, **changes):
+        for name, value in changes.items():
+            setattr(listing, name, value)
+        with mock.patch('listings.signals.transaction.on_commit', lambda func: func()), \
+                mock.patch.object(signals, 'invalidate_listing') as invalidate:
+            signals.invalidate_featured_on_save(Listing, listing, created=created)
+        return invalidate.call_args_list
+
+    def listing(self, **kwargs):
+        return Listing(id=7, is_featured=True, availability_status='available',
+                       location=Point(LON, LAT), category_id=42, **kwargs)
+
+    def test_price_change_drops_the_card_only(self):
+        calls = self.invalidations(self.listing(), price=10)
+        self.assertEqual(calls, [mock.call(7, [])])
+
+    def test_unfeaturing_drops_the_old_buckets(self):
+        listing = self.listing()
+        old = featured.placement(listing)
+        calls = self.invalidations(listing, is_featured=False)
+        self.assertEqual(calls, [mock.call(7, [old, featured.placement(listing)])])
+
+    def test_unfeatured_listings_are_ignored(self):
+        listing = self.listing()
+        listing.is_featured = False
+        listing._featured_placement = featured.placement(listing)
+        self.assertEqual(self.invalidations(listing, price=10), [])
+
+    def test_reviews_drop_the_card(self):
+        with mock.patch('listings.signals.transaction.on_commit', lambda func: func()), \
+                mock.patch.object(signals, 'invalidate_listing') as invalidate:
+            signals.invalidate_featured_card(Review, Review(listing_id=7, rating=4), created=True)
+        invalidate.assert_called_once_with(7)
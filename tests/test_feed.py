@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from accounts.models import User
+from listings import feed, signals
+
+NOW = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+HOME = Point(77.2, 28.6, srid=4326)
+
+
+def record(ids, scores, **params):
+    params = {'location': (HOME.x, HOME.y), 'radius_km': 10, 'category_ids': None, **params}
+    return {
+        'ids': np.asarray(ids, dtype='<i8').tobytes(),
+        'scores': np.asarray(scores, dtype='<f8').tobytes(),
+        'built_at': 0,
+        **params,
+    }
+
+
+class ScoreTest(SimpleTestCase):
+    def test_order_does_not_change_with_age(self):
+        timestamps = np.array([NOW.timestamp(), NOW.timestamp() - 3600])
+        today = feed.log_scores(timestamps, [False, True], [5.0, 1.0])
+        later = feed.log_scores(timestamps + 86400, [False, True], [5.0, 1.0])
+        self.assertAlmostEqual(today[0] - today[1], later[0] - later[1])
+
+    @override_settings(FEED_RECENCY_HALF_LIFE_HOURS=1)
+    def test_one_half_life_halves_the_score(self):
+        scores = feed.log_scores([NOW.timestamp(), NOW.timestamp() - 3600], [False, False], [0.0, 0.0])
+        self.assertAlmostEqual(np.exp(scores[1] - scores[0]), 0.5)
+
+    def test_rank_drops_listings_outside_the_radius(self):
+        rows = [
+            (1, NOW - timedelta(hours=5), False, Point(77.21, 28.6)),
+            (2, NOW, False, Point(77.2, 28.61)),
+            (3, NOW, False, Point(78.5, 28.6)),
+            (4, NOW - timedelta(hours=5), True, Point(77.2, 28.6)),
+        ]
+        ids, scores = feed.rank(rows, HOME, 10)
+        self.assertEqual(ids.tolist(), [4, 2, 1])
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+
+class InsertTest(SimpleTestCase):
+    def test_inserts_by_score(self):
+        updated = feed.insert_listing(record([1, 2, 3], [3.0, 2.0, 1.0]), 9, 2.5)
+        self.assertEqual(feed.unpack(updated)[0].tolist(), [1, 9, 2, 3])
+
+    def test_reinsert_replaces_the_old_entry(self):
+        updated = feed.insert_listing(record([1, 9, 3], [3.0, 2.0, 1.0]), 9, 0.5)
+        self.assertEqual(feed.unpack(updated)[0].tolist(), [1, 3, 9])
+
+    @override_settings(FEED_SIZE=3)
+    def test_full_feed_drops_the_tail(self):
+        self.assertIsNone(feed.insert_listing(record([1, 2, 3], [3.0, 2.0, 1.0]), 9, 0.5))
+        updated = feed.insert_listing(record([1, 2, 3], [3.0, 2.0, 1.0]), 9, 4.0)
+        self.assertEqual(feed.unpack(updated)[0].tolist(), [9, 1, 2])
+
+    def test_page_cursor_survives_insertions(self):
+        current = record([1, 2, 3, 4], [4.0, 3.0, 2.0, 1.0])
+        page, cursor = feed.feed_page(current, size=2)
+        self.assertEqual(page, [1, 2])
+        current = feed.insert_listing(current, 9, 3.5)
+        page, cursor = feed.feed_page(current, cursor, size=2)
+        self.assertEqual((page, cursor), ([3, 4], None))
+
+    def test_tied_scores_are_all_served(self):
+        ids, scores = feed.rank([(pk, NOW, False, HOME) for pk in range(1, 51)], None, 10)
+        self.assertEqual(ids.tolist(), list(range(50, 0, -1)))
+        current = record(ids, scores)
+        served, cursor = feed.feed_page(current, size=20)
+        while cursor is not None:
+            page, cursor = feed.feed_page(current, cursor, size=20)
+            served += page
+        self.assertEqual(served, list(range(50, 0, -1)))
+
+    def test_insert_among_ties_is_ordered_by_id(self):
+        updated = feed.insert_listing(record([8, 5, 2], [1.0, 1.0, 1.0]), 6, 1.0)
+        self.assertEqual(feed.unpack(updated)[0].tolist(), [8, 6, 5, 2])
+
+    def test_cursor_shape(self):
+        self.assertTrue(feed.is_feed_cursor((1.5, 3)))
+        for cursor in [(1.5,), (1.5, 3, 4), ('1.5', 3), (1.5, True), (float('nan'), 3), (1.5, 3.0)]:
+            with self.subTest(cursor=cursor):
+                self.assertFalse(feed.is_feed_cursor(cursor))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class FanOutTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_new_listing_reaches_matching_feeds_only(self):
+        cache.set_many({
+            feed.feed_key(1): record([5], [0.0]),
+            feed.feed_key(2): record([5], [0.0], category_ids=[7]),
+            feed.feed_key(3): record([5], [0.0], radius_km=0.1),
+        })
+        changed = feed._add_to_feeds([1, 2, 3, 4], 9, NOW, False, Point(77.21, 28.6), 3)
+        self.assertEqual(changed, 1)
+        self.assertEqual(feed.unpack(cache.get(feed.feed_key(1)))[0].tolist(), [9, 5])
+        self.assertEqual(feed.unpack(cache.get(feed.feed_key(2)))[0].tolist(), [5])
+
+    def test_small_moves_keep_the_feed(self):
+        current = record([5], [0.0])
+        self.assertTrue(feed.feed_is_current(current, Point(77.201, 28.6), 10, None))
+        self.assertFalse(feed.feed_is_current(current, Point(77.3, 28.6), 10, None))
+        self.assertFalse(feed.feed_is_current(current, HOME, 20, None))
+
+
+class FeedSignalTest(SimpleTestCase):
+    def test_refresh_only_when_the_location_changes(self):
+        user = SimpleNamespace(pk=3, location=HOME, _feed_location=HOME)
+        with mock.patch('listings.signals.transaction.on_commit', lambda func: func()), \
+                mock.patch.object(signals, 'refresh_user_feed') as refresh:
+            signals.refresh_feed_on_move(User, user, created=False)
+            user.location = Point(77.3, 28.6, srid=4326)
+            signals.refresh_feed_on_move(User, user, created=False, update_fields=frozenset(['last_login']))
+            signals.refresh_feed_on_move(User, user, created=False)
+        refresh.delay.assert_called_once_with(3)
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import numpy as np
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase
+
+from utils.geo_utils import (
+    annotate_distances, bounding_box, calculate_distance, haversine_km, initial_bearing, vincenty_km, within_radius,
+)
+
+CONNAUGHT_PLACE = (28.6315, 77.2167)
+INDIA_GATE = (28.6129, 77.2295)
+
+
+class DistanceTest(SimpleTestCase):
+    def test_calculate_distance_is_in_kilometers(self):
+        self.assertAlmostEqual(calculate_distance(Point(0, 0), Point(1, 1)), 157.2, places=1)
+
+    def test_haversine_broadcasts(self):
+        lats = np.array([CONNAUGHT_PLACE[0], INDIA_GATE[0]])
+        lons = np.array([CONNAUGHT_PLACE[1], INDIA_GATE[1]])
+        distances = haversine_km(*CONNAUGHT_PLACE, lats, lons)
+        self.assertEqual(distances.shape, (2,))
+        self.assertAlmostEqual(distances[0], 0.0)
+        self.assertAlmostEqual(distances[1], 2.416, places=3)
+
+    def test_vincenty_matches_reference(self):
+        # Flinders Peak to Buninyong, from Vincenty's paper: 54972.271 m.
+        distance = vincenty_km(-37.95103342, 144.42486789, -37.65282114, 143.92649554)
+        self.assertAlmostEqual(float(distance), 54.972271, places=5)
+
+    def test_vincenty_handles_coincident_and_equatorial_points(self):
+        distances = vincenty_km([0.0, 10.0], [0.0, 20.0], [0.0, 10.0], [1.0, 20.0])
+        self.assertAlmostEqual(distances[0], 111.3195, places=3)
+        self.assertEqual(distances[1], 0.0)
+
+    def test_bearings(self):
+        bearings = initial_bearing(0, 0, [1, 0, -1, 0], [0, 1, 0, -1])
+        np.testing.assert_allclose(bearings, [0, 90, 180, 270], atol=1e-9)
+
+
+class BoundingBoxTest(SimpleTestCase):
+    def test_longitude_span_widens_with_latitude(self):
+        equator = bounding_box(0, 0, 100)
+        north = bounding_box(60, 0, 100)
+        self.assertAlmostEqual(equator[3] - equator[1], north[3] - north[1])
+        self.assertGreater(north[2] - north[0], 1.9 * (equator[2] - equator[0]))
+
+    def test_box_contains_the_radius(self):
+        min_lon, min_lat, max_lon, max_lat = bounding_box(*CONNAUGHT_PLACE, 10)
+        self.assertAlmostEqual(haversine_km(CONNAUGHT_PLACE[0], min_lon, *CONNAUGHT_PLACE), 10, places=1)
+        self.assertAlmostEqual(haversine_km(max_lat, CONNAUGHT_PLACE[1], *CONNAUGHT_PLACE), 10, places=6)
+
+    def test_poles_and_antimeridian_cover_all_longitudes(self):
+        self.assertEqual(bounding_box(89.9, 0, 50)[::2], (-180.0, 180.0))
+        self.assertEqual(bounding_box(0, 179.9, 50)[::2], (-180.0, 180.0))
+
+
+class PrefilterTest(SimpleTestCase):
+    def test_within_radius(self):
+        mask, distances = within_radius([28.6129, 28.7, 19.07], [77.2295, 77.2167, 72.87], *CONNAUGHT_PLACE, 5)
+        self.assertEqual(mask.tolist(), [True, False, False])
+        self.assertTrue(np.isinf(distances[2]))
+
+    def test_annotate_distances(self):
+        objects = [SimpleNamespace(location=Point(INDIA_GATE[1], INDIA_GATE[0])), SimpleNamespace(location=Point(72.87, 19.07))]
+        kept = annotate_distances(objects, Point(CONNAUGHT_PLACE[1], CONNAUGHT_PLACE[0]), radius_km=5)
+        self.assertEqual(kept, objects[:1])
+        self.assertAlmostEqual(kept[0].distance.km, 2.416, places=3)
@@ -0,0 +1,131 @@
+import io
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db.models.fields.files import FieldFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from utils import blurhash, image_variants
+from listings.models import ListingImage
+from listings.serializers import ListingImageSerializer
+from utils.image_variants import delete_variant_files, render_variants, schedule_image_variants, variant_urls
+
+
+def png_bytes(size=(800, 600), color=(200, 40, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class BlurHashTest(SimpleTestCase):
+    def test_solid_image(self):
+        # Matches the reference implementation for the same pixels.
+        self.assertEqual(blurhash.encode(Image.new('RGB', (64, 48), (255, 255, 255))), 'LDTSUA_3fQ_3~qoffQoffQfQfQfQ')
+
+    def test_component_count(self):
+        self.assertEqual(len(blurhash.encode(Image.new('RGB', (10, 10)), 1, 1)), 6)
+
+
+@override_settings(IMAGE_VARIANT_SIZES={'thumb': 160, 'large': 1280})
+class RenderVariantsTest(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.media_root, base_url='/media/')
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def test_variants_are_resized_and_stored(self):
+        name = self.storage.save('listing_images/sofa.png', ContentFile(png_bytes()))
+        field_file = FieldFile(None, SimpleNamespace(storage=self.storage), name)
+        record = render_variants(field_file)
+
+        self.assertEqual((record['width'], record['height'], record['source']), (800, 600, name))
+        self.assertEqual(set(record['variants']), {'thumb', 'large'})
+        with self.storage.open(record['variants']['thumb']['webp']) as f:
+            thumb = Image.open(f)
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (160, 120)))
+        with self.storage.open(record['variants']['large']['jpeg']) as f:
+            # Smaller originals are never upscaled.
+            self.assertEqual(Image.open(f).size, (800, 600))
+
+    def test_replaced_variants_are_deleted(self):
+        old = render_variants(FieldFile(None, SimpleNamespace(storage=self.storage), self.storage.save('a.png', ContentFile(png_bytes()))))
+        new = render_variants(FieldFile(None, SimpleNamespace(storage=self.storage), self.storage.save('b.png', ContentFile(png_bytes()))))
+        shared = old['variants']['thumb']['webp']
+        new['variants']['thumb']['webp'] = shared
+        delete_variant_files(self.storage, old, keep=new)
+        self.assertTrue(self.storage.exists(shared))
+        self.assertFalse(self.storage.exists(old['variants']['large']['jpeg']))
+        self.assertTrue(self.storage.exists(new['variants']['large']['jpeg']))
+
+
+@mock.patch.object(image_variants, 'transaction')
+class GenerateVariantsTest(SimpleTestCase):
+    def run_task(self, stored_row):
+        model = mock.MagicMock()
+        field_file = mock.MagicMock()
+        field_file.name = 'a.png'
+        model.objects.filter.return_value.only.return_value.first.return_value = SimpleNamespace(image_url=field_file)
+        model.objects.select_for_update.return_value.filter.return_value.values_list.return_value.first.return_value = stored_row
+        new = {'source': 'a.png', 'variants': {'thumb': {'webp': 'variants/a_thumb_new.webp'}}}
+        with mock.patch.object(image_variants, 'apps') as apps, \
+                mock.patch.object(image_variants, 'render_variants', return_value=new), \
+                mock.patch.object(image_variants, 'delete_variant_files') as delete, \
+                mock.patch.object(image_variants.variants_ready, 'send') as send:
+            apps.get_model.return_value = model
+            image_variants.generate_image_variants.run('listings.ListingImage', 1, 'image_url')
+        return model, new, delete, send
+
+    def test_previous_variants_are_deleted(self, transaction):
+        old = {'source': 'z.png', 'variants': {'thumb': {'webp': 'variants/z_thumb.webp'}}}
+        model, new, delete, send = self.run_task((1, old))
+        model.objects.filter.return_value.update.assert_called_once_with(image_url_variants=new)
+        model.objects.select_for_update.return_value.filter.assert_called_once_with(pk=1, image_url='a.png')
+        delete.assert_called_once_with(mock.ANY, old, keep=new)
+        send.assert_called_once()
+
+    def test_variants_of_a_replaced_upload_are_discarded(self, transaction):
+        model, new, delete, send = self.run_task(None)
+        model.objects.filter.return_value.update.assert_not_called()
+        delete.assert_called_once_with(mock.ANY, new)
+        send.assert_not_called()
+
+
+class ScheduleTest(SimpleTestCase):
+    def instance(self, name, variants):
+        image = SimpleNamespace(name=name) if name else None
+        return SimpleNamespace(image_url=image, image_url_variants=variants, pk=1, _meta=SimpleNamespace(label='listings.ListingImage'))
+
+    def test_unchanged_image_is_skipped(self):
+        with mock.patch.object(image_variants.transaction, 'on_commit') as on_commit:
+            schedule_image_variants(self.instance('a.png', {'source': 'a.png'}), 'image_url')
+            schedule_image_variants(self.instance('', {}), 'image_url')
+        on_commit.assert_not_called()
+
+    def test_new_image_is_queued(self):
+        with mock.patch.object(image_variants.transaction, 'on_commit', lambda func: func()), \
+                mock.patch.object(image_variants, 'generate_image_variants') as task:
+            schedule_image_variants(self.instance('b.png', {'source': 'a.png'}), 'image_url')
+        task.delay.assert_called_once_with('listings.ListingImage', 1, 'image_url')
+
+
+class VariantUrlsTest(SimpleTestCase):
+    def test_pending_and_failed_records(self):
+        self.assertIsNone(variant_urls({}))
+        self.assertIsNone(variant_urls({'source': 'a.png', 'error': 'cannot identify image file'}))
+
+    def test_urls(self):
+        record = {'width': 10, 'height': 5, 'blurhash': 'L00000fQfQfQ', 'variants': {'thumb': {'webp': 'variants/a_thumb.webp'}}}
+        self.assertEqual(variant_urls(record)['variants']['thumb']['webp'], '/media/variants/a_thumb.webp')
+
+    def test_urls_come_from_the_file_fields_storage(self):
+        record = {'width': 10, 'height': 5, 'blurhash': 'L00000fQfQfQ', 'variants': {'thumb': {'webp': 'variants/a_thumb.webp'}}}
+        storage = FileSystemStorage(location=tempfile.gettempdir(), base_url='https://cdn.example.com/')
+        self.assertEqual(variant_urls(record, storage=storage)['variants']['thumb']['webp'], 'https://cdn.example.com/variants/a_thumb.webp')
+        with mock.patch.object(ListingImage._meta.get_field('image_url'), 'storage', storage):
+            data = ListingImageSerializer(ListingImage(id=1, image_url='listing_images/a.png', image_url_variants=record)).data
+        self.assertEqual(data['image_url_variants']['variants']['thumb']['webp'], 'https://cdn.example.com/variants/a_thumb.webp')
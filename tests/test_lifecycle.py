@@ -0,0 +1,94 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from listings import lifecycle
+from listings.models import Listing
+
+
+class ActiveListingTest(SimpleTestCase):
+    def test_active_matches_the_partial_index_predicate(self):
+        sql = str(Listing.active.filter(listing_type='product').query)
+        self.assertIn('"availability_status" = available', sql)
+        self.assertIn('"expiry_date" >', sql)
+
+    def test_default_manager_sees_every_listing(self):
+        self.assertNotIn('WHERE', str(Listing.objects.all().query))
+        self.assertIs(Listing._default_manager, Listing.objects)
+
+
+class SweepTest(SimpleTestCase):
+    def test_batches_until_a_short_one(self):
+        with mock.patch.object(lifecycle, '_move_batch', side_effect=[3, 3, 1]) as move:
+            self.assertEqual(lifecycle._move_all(Listing.objects.none(), 'expired', 3, ('id',)), 7)
+        self.assertEqual(move.call_count, 3)
+
+    def test_moved_listings_drop_their_map_tiles(self):
+        queryset = mock.MagicMock()
+        queryset.order_by.return_value.select_for_update.return_value.values_list.return_value = [
+            (1, 10, Point(77.2, 28.6)), (2, 10, None),
+        ]
+        with mock.patch.multiple(
+            lifecycle, Listing=mock.DEFAULT, Collection=mock.DEFAULT, transaction=mock.DEFAULT,
+            schedule_snapshot_rebuild=mock.DEFAULT, invalidate_points=mock.DEFAULT,
+        ) as patched:
+            patched['transaction'].on_commit.side_effect = lambda func: func()
+            patched['Collection'].listings.through.objects.filter.return_value.values_list.return_value.distinct.return_value = []
+            self.assertEqual(lifecycle._move_batch(queryset, 'expired', 10, ('id',)), 2)
+        patched['invalidate_points'].assert_called_once_with('listings', {(77.2, 28.6)})
+        patched['schedule_snapshot_rebuild'].assert_called_once_with(10)
+
+    def test_archive_only_touches_stale_listings(self):
+        with mock.patch.object(lifecycle, '_move_all', return_value=0) as move:
+            lifecycle.archive_listings(batch_size=10)
+        queryset, status, batch_size, order_by = move.call_args.args
+        sql = str(queryset.query).split('WHERE')[1]
+        self.assertEqual((status, batch_size, order_by), ('archived', 10, ('status_changed_at', 'id')))
+        self.assertIn('"availability_status" IN (sold_out, expired)', sql)
+        # Time since the status changed, not the expiry date, decides.
+        self.assertIn('"status_changed_at" <=', sql)
+        self.assertNotIn('"expiry_date"', sql)
+
+    def test_sweeps_are_scheduled(self):
+        scheduled = {entry['task'] for entry in settings.CELERY_BEAT_SCHEDULE.values()}
+        self.assertLessEqual({'listings.tasks.sweep_listings', 'listings.tasks.flush_listing_views'}, scheduled)
+
+
+class ListingStatusTest(SimpleTestCase):
+    def saved(self, listing, **kwargs):
+        with mock.patch('django.db.models.Model.save') as save:
+            listing.save(**kwargs)
+        return save.call_args.kwargs
+
+    def loaded(self, status, expiry_date):
+        # from_db takes values in the model's field order.
+        return Listing.from_db('default', ['id', 'availability_status', 'status_changed_at', 'expiry_date'],
+                               [7, status, None, expiry_date])
+
+    def test_status_changes_are_stamped(self):
+        listing = self.loaded('available', timezone.now() + timedelta(days=3))
+        self.saved(listing)
+        self.assertIsNone(listing.status_changed_at)
+        listing.availability_status = 'sold_out'
+        kwargs = self.saved(listing, update_fields=['availability_status'])
+        self.assertIsNotNone(listing.status_changed_at)
+        self.assertEqual(kwargs['update_fields'], {'availability_status', 'status_changed_at'})
+
+    def test_extending_an_expired_listing_makes_it_available(self):
+        listing = self.loaded('expired', timezone.now() - timedelta(days=1))
+        self.saved(listing)
+        self.assertEqual(listing.availability_status, 'expired')
+        listing.expiry_date = timezone.now() + timedelta(days=30)
+        kwargs = self.saved(listing, update_fields=['expiry_date'])
+        self.assertEqual(listing.availability_status, 'available')
+        self.assertEqual(kwargs['update_fields'], {'expiry_date', 'availability_status', 'status_changed_at'})
+
+    def test_sold_out_listings_are_not_revived(self):
+        listing = self.loaded('sold_out', timezone.now() - timedelta(days=1))
+        listing.expiry_date = timezone.now() + timedelta(days=30)
+        self.saved(listing)
+        self.assertEqual(listing.availability_status, 'sold_out')
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from maps import clusters
+from maps.clusters import get_clusters
+from maps.tiles import lonlat_to_tile, parse_bbox, tile_lonlat_bounds, tiles_for_bbox
+
+
+class TileMathTest(SimpleTestCase):
+    def test_lonlat_to_tile(self):
+        self.assertEqual(lonlat_to_tile(0, 0, 0), (0, 0))
+        self.assertEqual(lonlat_to_tile(-179.9, 85, 1), (0, 0))
+        self.assertEqual(lonlat_to_tile(179.9, -85, 1), (1, 1))
+
+    def test_bounds_contain_the_point(self):
+        lon, lat = 77.2167, 28.6315
+        x, y = lonlat_to_tile(lon, lat, 14)
+        min_lon, min_lat, max_lon, max_lat = tile_lonlat_bounds(14, x, y)
+        self.assertTrue(min_lon <= lon < max_lon and min_lat < lat <= max_lat)
+
+    def test_tiles_for_bbox(self):
+        self.assertEqual(len(tiles_for_bbox((-180, -85, 180, 85), 2)), 16)
+        self.assertEqual(tiles_for_bbox((77.2, 28.6, 77.21, 28.61), 10), [lonlat_to_tile(77.2, 28.6, 10)])
+
+    def test_parse_bbox(self):
+        self.assertEqual(parse_bbox('77.1,28.5,77.3,28.7'), (77.1, 28.5, 77.3, 28.7))
+        for value in ['', '1,2,3', '77.3,28.5,77.1,28.7', '77,28,200,29']:
+            with self.assertRaises(ValueError):
+                parse_bbox(value)
+
+
+@override_settings(MAP_CLUSTER_GRID_SIZE=8, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class GetClustersTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rows_are_bucketed_into_tiles(self):
+        rows = [
+            (8 * 3 + 2, 8 * 5 + 7, 4, 77.2, 28.6, 10, ['Food']),
+            (8 * 4, 8 * 5, 1, 77.3, 28.6, 42, []),
+            (8 * 9, 8 * 5, 1, 78.0, 28.6, 43, []),  # outside the block
+        ]
+        with mock.patch.object(clusters, 'connection') as connection:
+            connection.cursor.return_value.__enter__.return_value.fetchall.return_value = rows
+            tiles = clusters.query_clusters('entities', 12, (3, 4), (5, 5))
+        self.assertEqual(tiles[(3, 5)], [{'count': 4, 'lat': 28.6, 'lon': 77.2, 'top_categories': ['Food']}])
+        self.assertEqual(tiles[(4, 5)][0]['id'], 42)
+        self.assertEqual(len(tiles), 2)
+
+    def test_only_live_listings_are_clustered(self):
+        with mock.patch.object(clusters, 'connection') as connection:
+            cursor = connection.cursor.return_value.__enter__.return_value
+            cursor.fetchall.return_value = []
+            clusters.query_clusters('listings', 12, (3, 4), (5, 5))
+        self.assertIn("AND t.availability_status = 'available'", cursor.execute.call_args.args[0])
+
+    def test_only_uncached_tiles_are_queried(self):
+        computed = {(1, 1): [{'count': 2}], (2, 1): []}
+        with mock.patch.object(clusters, 'query_clusters', return_value=computed) as query:
+            self.assertEqual(get_clusters('entities', 3, [(1, 1), (2, 1)]), [{'count': 2}])
+            self.assertEqual(get_clusters('entities', 3, [(1, 1), (2, 1)]), [{'count': 2}])
+        query.assert_called_once_with('entities', 3, (1, 2), (1, 1))
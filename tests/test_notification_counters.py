@@ -0,0 +1,55 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from accounts import notification_counters
+from accounts.models import Notification, User
+from accounts.notification_counters import (
+    decrement_unread_count, get_unread_count, increment_unread_counts, reset_unread_count,
+)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UnreadCounterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User(pk=1)
+
+    def test_miss_is_counted_once_then_cached(self):
+        with mock.patch.object(notification_counters, 'count_unread', return_value=3) as count:
+            self.assertEqual(get_unread_count(self.user), 3)
+            self.assertEqual(get_unread_count(self.user), 3)
+        count.assert_called_once_with(self.user)
+
+    def test_cached_counter_is_adjusted_in_place(self):
+        reset_unread_count(1)
+        increment_unread_counts([1, 2], amount=2)
+        decrement_unread_count(1)
+        self.assertEqual(get_unread_count(self.user), 1)
+        # User 2 was never cached, so it is still left to the database.
+        self.assertIsNone(cache.get('notifications:unread:2'))
+
+    def test_negative_counter_is_dropped(self):
+        reset_unread_count(1)
+        decrement_unread_count(1)
+        self.assertIsNone(cache.get('notifications:unread:1'))
+
+
+class ReadWatermarkTest(SimpleTestCase):
+    def test_notifications_before_watermark_are_read(self):
+        now = timezone.now()
+        user = User(pk=1, notifications_read_until=now)
+        old = Notification(recipient=user, created_at=now - timedelta(minutes=1))
+        new = Notification(recipient=user, created_at=now + timedelta(minutes=1))
+        self.assertFalse(old.is_unread)
+        self.assertTrue(new.is_unread)
+
+    def test_no_watermark_uses_is_read(self):
+        user = User(pk=1)
+        self.assertTrue(Notification(recipient=user, created_at=timezone.now()).is_unread)
+        self.assertFalse(Notification(recipient=user, created_at=timezone.now(), is_read=True).is_unread)
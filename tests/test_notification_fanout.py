@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from accounts import tasks
+from accounts.models import NotificationFanout
+from accounts.views import create_entity_update_notification
+
+FOLLOWERS = [3, 8, 11, 20, 21]
+
+
+def next_followers(entity_id, after_id, limit):
+    return [user_id for user_id in FOLLOWERS if user_id > after_id][:limit]
+
+
+def fanout(**kwargs):
+    values = {'pk': 1, 'entity_id': 9, 'notification_type': 'entity_update', 'content': 'News',
+              'last_recipient_id': 0, 'sent_count': 0, 'status': 'pending', **kwargs}
+    return SimpleNamespace(save=mock.Mock(), **values)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, NOTIFICATION_FANOUT_CHUNK_SIZE=2)
+class FanOutTaskTest(SimpleTestCase):
+    def run_fanout(self, record):
+        with mock.patch.object(tasks, 'transaction') as transaction, \
+                mock.patch.object(tasks.NotificationFanout.objects, 'select_for_update') as select, \
+                mock.patch.object(tasks, '_next_follower_ids', side_effect=next_followers), \
+                mock.patch.object(tasks.Notification.objects, 'bulk_create', side_effect=lambda rows: rows) as create, \
+                mock.patch.object(tasks, 'push_notifications'), \
+                mock.patch.object(tasks, 'increment_unread_counts') as counts:
+            transaction.on_commit.side_effect = lambda func: func()
+            select.return_value.get.return_value = record
+            result = tasks.fan_out_notification.delay(record.pk).get()
+        chunks = [[n.recipient_id for n in call.args[0]] for call in create.call_args_list]
+        return result, chunks, counts
+
+    def test_followers_are_notified_in_chunks(self):
+        record = fanout()
+        result, chunks, counts = self.run_fanout(record)
+        self.assertEqual(chunks, [[3, 8], [11, 20], [21]])
+        self.assertEqual((result, record.status, record.last_recipient_id), (5, 'done', 21))
+        self.assertEqual(counts.call_count, 3)
+
+    def test_resumes_from_the_saved_cursor(self):
+        record = fanout(last_recipient_id=11, sent_count=3)
+        result, chunks, _ = self.run_fanout(record)
+        self.assertEqual(chunks, [[20, 21]])
+        self.assertEqual(result, 5)
+
+    def test_finished_fanout_notifies_nobody(self):
+        result, chunks, _ = self.run_fanout(fanout(status='done', sent_count=5))
+        self.assertEqual((result, chunks), (5, []))
+
+
+class EntityUpdateEventTest(SimpleTestCase):
+    def notify(self, existing=None, **kwargs):
+        entity = SimpleNamespace(pk=9, name='Bakery')
+        record = existing or fanout()
+        with mock.patch.object(NotificationFanout.objects, 'get_or_create', return_value=(record, existing is None)) as get, \
+                mock.patch('accounts.views.transaction.on_commit', lambda func: func()), \
+                mock.patch('accounts.views.fan_out_notification') as task:
+            create_entity_update_notification(entity, 'offer', **kwargs)
+        return get.call_args.kwargs['event_key'], task
+
+    def test_same_update_gives_the_same_key(self):
+        offer = SimpleNamespace(pk=4, _meta=SimpleNamespace(model_name='listing'))
+        first, _ = self.notify(update_object=offer)
+        second, _ = self.notify(update_object=offer)
+        self.assertEqual(first, second)
+        self.assertEqual(self.notify(event_id='menu-2026-10')[0], 'entity:9:offer:menu-2026-10')
+
+    def test_duplicate_of_a_finished_event_is_not_requeued(self):
+        _, task = self.notify(existing=fanout(status='done'), event_id='menu-2026-10')
+        task.delay.assert_not_called()
+
+    def test_update_must_be_identified(self):
+        with self.assertRaises(ValueError):
+            create_entity_update_notification(SimpleNamespace(pk=9, name='Bakery'), 'offer')
+
+
+class ResumeFanoutsTest(SimpleTestCase):
+    def test_stalled_fanouts_are_requeued(self):
+        with mock.patch.object(NotificationFanout.objects, 'filter') as pending, \
+                mock.patch.object(tasks, 'fan_out_notification') as task:
+            pending.return_value.values_list.return_value = [4, 7]
+            self.assertEqual(tasks.resume_notification_fanouts(), 2)
+        self.assertEqual(pending.call_args.kwargs['status'], 'pending')
+        self.assertEqual([call.args for call in task.delay.call_args_list], [(4,), (7,)])
+
+    def test_resume_is_scheduled(self):
+        tasks_scheduled = {entry['task'] for entry in settings.CELERY_BEAT_SCHEDULE.values()}
+        self.assertIn('accounts.tasks.resume_notification_fanouts', tasks_scheduled)
@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Notification
+from listings.models import Listing
+from utils import pagination
+from utils.pagination import DistanceCursorPagination, KeysetCursorPagination, approximate_count
+
+factory = APIRequestFactory()
+
+
+class DistanceCursorPaginationTest(SimpleTestCase):
+    def setUp(self):
+        self.paginator = DistanceCursorPagination()
+
+    def test_cursor_round_trip(self):
+        cursor = self.paginator.encode_cursor(0.012345678901234567, 42)
+        request = Request(factory.get('/entities/nearby/', {'cursor': cursor}))
+        self.assertEqual(self.paginator.decode_cursor(request), (0.012345678901234567, 42))
+
+    def test_missing_cursor(self):
+        request = Request(factory.get('/entities/nearby/'))
+        self.assertIsNone(self.paginator.decode_cursor(request))
+
+    def test_invalid_cursor(self):
+        request = Request(factory.get('/entities/nearby/', {'cursor': 'not-a-cursor'}))
+        with self.assertRaises(NotFound):
+            self.paginator.decode_cursor(request)
+
+    def test_page_size_is_clamped(self):
+        request = Request(factory.get('/entities/nearby/', {'page_size': 1000}))
+        self.assertEqual(self.paginator.get_page_size(request), self.paginator.max_page_size)
+        request = Request(factory.get('/entities/nearby/', {'page_size': 'abc'}))
+        self.assertEqual(self.paginator.get_page_size(request), DistanceCursorPagination.page_size)
+
+
+class KeysetCursorPaginationTest(SimpleTestCase):
+    def setUp(self):
+        self.paginator = KeysetCursorPagination()
+
+    def filtered_sql(self, model, ordering, cursor):
+        keys = self.paginator.get_keys(model, ordering)
+        queryset = model.objects.order_by(*self.paginator.order_by(keys)).filter(self.paginator.seek(keys, cursor))
+        return str(queryset.query)
+
+    def test_id_is_appended_as_tiebreaker(self):
+        keys = self.paginator.get_keys(Notification, ('-created_at',))
+        self.assertEqual(keys, [('created_at', True, False), ('id', True, False)])
+        self.assertEqual(len(self.paginator.get_keys(Notification, ('-id',))), 1)
+
+    def test_seek_starts_at_the_cursor(self):
+        sql = self.filtered_sql(Notification, ('-created_at', '-id'), ('2024-05-01 10:00:00+00:00', 42))
+        self.assertIn('"created_at" <= 2024-05-01 10:00:00+00:00', sql)
+        self.assertIn('"created_at" < 2024-05-01 10:00:00+00:00', sql)
+        self.assertIn('"id" < 42', sql)
+        self.assertIn('ORDER BY "accounts_notification"."created_at" DESC, "accounts_notification"."id" DESC', sql)
+
+    def test_nullable_keys_sort_nulls_lowest(self):
+        sql = self.filtered_sql(Listing, ('-rating_average', '-review_count', '-id'), (4.5, 10, 7))
+        self.assertIn('"rating_average" IS NULL', sql)
+        self.assertIn('DESC NULLS LAST', sql)
+        # Past the rated rows only unrated ones remain.
+        sql = self.filtered_sql(Listing, ('-rating_average', '-review_count', '-id'), (None, 0, 7))
+        self.assertNotIn('"rating_average" <', sql)
+        self.assertIn('"review_count" < 0', sql)
+
+    def test_cursor_round_trip(self):
+        cursor = self.paginator.encode_cursor(datetime(2024, 5, 1, 10, tzinfo=timezone.utc), Decimal('19.99'), None, 42)
+        request = Request(factory.get('/listings/', {'cursor': cursor}))
+        self.assertEqual(self.paginator.decode_cursor(request), ('2024-05-01 10:00:00+00:00', '19.99', None, 42))
+
+    def test_cursor_values_are_typed(self):
+        keys = self.paginator.get_keys(Notification, ('-created_at', '-id'))
+        created_at, pk = self.paginator.coerce_cursor(Notification, keys, ('2024-05-01 10:00:00+00:00', '42'))
+        self.assertEqual((created_at, pk), (datetime(2024, 5, 1, 10, tzinfo=timezone.utc), 42))
+
+    def test_tampered_cursors_are_not_found(self):
+        notification_keys = self.paginator.get_keys(Notification, ('-created_at', '-id'))
+        listing_keys = self.paginator.get_keys(Listing, ('-rating_average', '-review_count', '-id'))
+        distance_keys = DistanceCursorPagination().get_keys(Listing, DistanceCursorPagination.ordering)
+        tampered = [
+            (Notification, notification_keys, ('not a date', 1)),
+            (Notification, notification_keys, ('2024-05-01 10:00:00+00:00', 'x')),
+            (Notification, notification_keys, ('2024-05-01 10:00:00+00:00', None)),
+            (Notification, notification_keys, ({'a': 1}, [1])),
+            (Notification, notification_keys, ('2024-05-01 10:00:00+00:00', True)),
+            (Notification, notification_keys, (1,)),
+            (Listing, listing_keys, ('high', 1, 1)),
+            (Listing, distance_keys, ('near', 1)),
+            (Listing, distance_keys, ('NaN', 1)),
+        ]
+        for model, keys, cursor in tampered:
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.paginator.coerce_cursor(model, keys, cursor)
+
+    def test_tampered_cursor_is_a_404_from_the_view(self):
+        cursor = self.paginator.encode_cursor('x')
+        request = Request(factory.get('/notifications/', {'cursor': cursor}))
+        with mock.patch.object(pagination, 'approximate_count'), self.assertRaises(NotFound):
+            self.paginator.paginate_queryset(Notification.objects.all(), request, SimpleNamespace(ordering=('-id',)))
+
+    def test_ordering_comes_from_the_view(self):
+        self.assertEqual(self.paginator.get_ordering(SimpleNamespace(ordering='-created_at')), ('-created_at',))
+        self.assertEqual(self.paginator.get_ordering(None), ('-id',))
+        self.assertEqual(DistanceCursorPagination().get_ordering(SimpleNamespace(ordering='-id')), ('knn_distance', 'id'))
+
+    def test_approximate_count_reads_the_plan(self):
+        connection = mock.MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = ([{'Plan': {'Plan Rows': 1234}}],)
+        with mock.patch.object(pagination, 'connections', {'default': connection}):
+            self.assertEqual(approximate_count(Notification.objects.filter(is_read=False)), 1234)
+        self.assertTrue(cursor.execute.call_args.args[0].startswith('EXPLAIN (FORMAT JSON) SELECT'))
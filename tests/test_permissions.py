@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from entities import roles
+from entities.models import Entity
+from listings.models import Listing
+from utils.permissions import CanManageProducts, IsEntityAdmin, IsEntityCollaborator
+
+ROLES = {1: ('admin', None), 2: ('collaborator', 'edit'), 3: ('collaborator', 'view')}
+
+
+def make_request(method='POST'):
+    return SimpleNamespace(method=method, user=SimpleNamespace(pk=7, is_authenticated=True))
+
+
+@override_settings(ENTITY_ROLE_CACHE_TIMEOUT=0)
+class EntityPermissionTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(roles, 'load_entity_roles', return_value=ROLES)
+        self.load_entity_roles = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_roles_are_loaded_once_per_request(self):
+        request = make_request()
+        for entity_id in (1, 2, 3, 4):
+            IsEntityCollaborator().has_object_permission(request, None, Entity(pk=entity_id))
+            IsEntityAdmin().has_object_permission(request, None, Entity(pk=entity_id))
+        self.load_entity_roles.assert_called_once_with(7)
+
+    def test_admin_only(self):
+        permission = IsEntityAdmin()
+        self.assertTrue(permission.has_object_permission(make_request(), None, Entity(pk=1)))
+        self.assertFalse(permission.has_object_permission(make_request(), None, Entity(pk=2)))
+        self.assertTrue(permission.has_object_permission(make_request('GET'), None, Entity(pk=4)))
+
+    def test_collaborators_need_edit_permission(self):
+        permission = IsEntityCollaborator()
+        self.assertTrue(permission.has_object_permission(make_request(), None, Entity(pk=1)))
+        self.assertTrue(permission.has_object_permission(make_request(), None, Entity(pk=2)))
+        self.assertFalse(permission.has_object_permission(make_request(), None, Entity(pk=3)))
+        self.assertFalse(permission.has_object_permission(make_request(), None, Entity(pk=4)))
+
+    def test_objects_resolve_to_their_entity(self):
+        permission = IsEntityCollaborator()
+        self.assertTrue(permission.has_object_permission(make_request(), None, Listing(vendor_id=2)))
+        self.assertFalse(permission.has_object_permission(make_request(), None, Listing(vendor_id=3)))
+
+    def test_view_level_entity_permission(self):
+        permission = CanManageProducts()
+        self.assertTrue(permission.has_permission(make_request(), SimpleNamespace(kwargs={'entity_id': '2'})))
+        self.assertFalse(permission.has_permission(make_request(), SimpleNamespace(kwargs={'entity_id': '3'})))
+        self.assertFalse(permission.has_permission(make_request(), SimpleNamespace(kwargs={})))
+
+    @override_settings(ENTITY_ROLE_CACHE_TIMEOUT=30)
+    def test_roles_are_shared_through_the_cache(self):
+        cache.clear()
+        roles.get_entity_roles(make_request())
+        roles.get_entity_roles(make_request())
+        self.load_entity_roles.assert_called_once_with(7)
+        roles.invalidate_entity_roles(7)
+        roles.get_entity_roles(make_request())
+        self.assertEqual(self.load_entity_roles.call_count, 2)
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Notification, User
+from accounts.serializers import NotificationSerializer
+from entities.models import Entity
+from listings.models import Collection, Listing
+from listings.serializers import CollectionSerializer, ListingListSerializer, ListingSerializer
+from utils.query_plan import plan_queryset
+
+factory = APIRequestFactory()
+
+
+def get(path):
+    return Request(factory.get(path))
+
+
+class QueryPlanTest(SimpleTestCase):
+    def test_detail_plan_prefetches_nested_relations(self):
+        queryset = plan_queryset(Listing.objects.all(), ListingSerializer)
+        self.assertEqual(queryset.query.select_related, {'service': {}, 'event': {}})
+        self.assertEqual(queryset._prefetch_related_lookups, ('images',))
+
+    def test_expanded_relations_are_prefetched(self):
+        queryset = plan_queryset(Listing.objects.all(), ListingSerializer, get('/listings/1/?expand=reviews'))
+        self.assertEqual(queryset._prefetch_related_lookups, ('images', 'reviews'))
+
+    def test_sparse_fields_trim_the_plan(self):
+        queryset = plan_queryset(Listing.objects.all(), ListingSerializer, get('/listings/1/?fields=id,title,service'))
+        self.assertEqual(queryset.query.select_related, {'service': {}})
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+
+    def test_list_plan_reads_stored_review_summary(self):
+        queryset = plan_queryset(Listing.objects.all(), ListingListSerializer)
+        self.assertEqual(queryset._prefetch_related_lookups, ('images',))
+        self.assertEqual(queryset.query.annotations, {})
+
+    def test_nested_plan_is_composed(self):
+        self.assertEqual(plan_queryset(Collection.objects.all(), CollectionSerializer)._prefetch_related_lookups, ())
+        queryset = plan_queryset(Collection.objects.all(), CollectionSerializer, get('/collections/?expand=listings'))
+        prefetch, = queryset._prefetch_related_lookups
+        self.assertEqual(prefetch.prefetch_through, 'listings')
+        self.assertEqual(prefetch.queryset.query.select_related, {'service': {}, 'event': {}})
+
+    def test_plan_is_skipped_for_other_models(self):
+        queryset = Entity.objects.all()
+        self.assertIs(plan_queryset(queryset, ListingSerializer), queryset)
+
+
+class SparseFieldsetTest(SimpleTestCase):
+    def listing(self):
+        listing = Listing(id=3, vendor_id=5, title='Sofa', description='Teak', price='100.00', listing_type='product',
+                          condition='used', availability_status='available')
+        listing.rating_5_count = 1
+        return listing
+
+    def test_fields_limit_the_output(self):
+        data = ListingListSerializer(self.listing(), context={'request': get('/listings/?fields=id,title')}).data
+        self.assertEqual(data, {'id': 3, 'title': 'Sofa'})
+
+    def test_fields_are_ignored_on_writes(self):
+        request = Request(factory.post('/listings/?fields=id'))
+        self.assertIn('price', ListingSerializer(context={'request': request}).fields)
+
+    def test_unexpanded_foreign_keys_collapse_to_ids(self):
+        notification = Notification(id=1, sender_id=7, recipient_id=8, notification_type='review', content='New review')
+        notification.recipient = User(id=8)
+        data = NotificationSerializer(notification, context={'request': get('/notifications/')}).data
+        self.assertEqual((data['sender'], data['recipient']), (7, 8))
+
+    def test_dotted_names_reach_nested_serializers(self):
+        collection = Collection(id=1, name='Picks', entity_id=5)
+        request = get('/collections/1/?fields=id,listings.title&expand=listings')
+        with mock.patch.object(Collection, 'listings', [self.listing()]), \
+                mock.patch('listings.serializers.apply_pending_views'):
+            data = CollectionSerializer(collection, context={'request': request}).data
+        self.assertEqual(data, {'id': 1, 'listings': [{'title': 'Sofa'}]})
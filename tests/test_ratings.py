@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.db.models import F
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from entities.models import Entity
+from listings import ratings, signals
+from listings.models import Listing, Review
+from listings.ratings import AGGREGATE_FIELDS, aggregate_delta, filter_min_rating, rating_ordering, reconcile_ratings
+
+
+class AggregateDeltaTest(SimpleTestCase):
+    def test_single_rating(self):
+        delta = aggregate_delta({4: 1})
+        self.assertEqual(delta['review_count'], F('review_count') + 1)
+        self.assertEqual(delta['rating_sum'], F('rating_sum') + 4)
+        self.assertEqual(delta['rating_4_count'], F('rating_4_count') + 1)
+        self.assertNotIn('rating_3_count', delta)
+
+    def test_removing_a_histogram(self):
+        delta = aggregate_delta({1: 2, 5: 3, 3: 0}, sign=-1)
+        self.assertEqual(delta['review_count'], F('review_count') + -5)
+        self.assertEqual(delta['rating_sum'], F('rating_sum') + -17)
+        self.assertEqual(delta['rating_5_count'], F('rating_5_count') + -3)
+        self.assertEqual(set(delta) - {'review_count', 'rating_sum', 'rating_average'}, {'rating_1_count', 'rating_5_count'})
+
+
+@mock.patch.object(signals, 'apply_rating')
+class ReviewSignalTest(SimpleTestCase):
+    def loaded(self, **values):
+        # As if fetched from the database, so post_init sees the stored rating.
+        return Review.from_db('default', ['id', 'listing_id', 'rating'], [1, values['listing_id'], values['rating']])
+
+    def test_create_adds_the_rating(self, apply_rating):
+        review = Review(listing_id=7, rating=4)
+        signals.update_ratings_on_save(Review, review, created=True)
+        apply_rating.assert_called_once_with(7, 4)
+
+    def test_rating_change_moves_one_rating(self, apply_rating):
+        review = self.loaded(listing_id=7, rating=2)
+        review.rating = 5
+        signals.update_ratings_on_save(Review, review, created=False)
+        self.assertEqual(apply_rating.call_args_list, [mock.call(7, 2, sign=-1), mock.call(7, 5)])
+
+        apply_rating.reset_mock()
+        signals.update_ratings_on_save(Review, review, created=False)
+        apply_rating.assert_not_called()
+
+    def test_unrelated_edit_is_ignored(self, apply_rating):
+        review = self.loaded(listing_id=7, rating=3)
+        review.review_text = 'Still good'
+        signals.update_ratings_on_save(Review, review, created=False)
+        apply_rating.assert_not_called()
+
+    def test_delete_removes_the_rating(self, apply_rating):
+        signals.update_ratings_on_delete(Review, self.loaded(listing_id=7, rating=3))
+        apply_rating.assert_called_once_with(7, 3, sign=-1)
+
+
+class ListingVendorTest(SimpleTestCase):
+    def test_ratings_follow_the_vendor(self):
+        listing = Listing.from_db('default', ['id', 'rating_5_count', 'vendor_id'], [1, 2, 3])
+        listing.vendor_id = 8
+        with mock.patch.object(signals, 'move_listing_ratings') as move:
+            signals.move_ratings_with_vendor(Listing, listing, created=False)
+            signals.move_ratings_with_vendor(Listing, listing, created=False)
+        self.assertEqual(move.call_count, 1)
+        self.assertEqual(move.call_args.args[1], 3)
+
+
+class AggregateSaveTest(SimpleTestCase):
+    def saved_fields(self, instance, **kwargs):
+        with mock.patch('django.db.models.Model.save') as save:
+            instance.save(**kwargs)
+        return save.call_args.kwargs.get('update_fields')
+
+    def test_full_saves_leave_the_aggregates_alone(self):
+        fields = [field.attname for field in Entity._meta.concrete_fields]
+        entity = Entity.from_db('default', fields, [1] + [None] * (len(fields) - 1))
+        saved = self.saved_fields(entity)
+        self.assertIn('name', saved)
+        self.assertFalse({*AGGREGATE_FIELDS, 'rating_average', 'id'} & set(saved))
+
+        fields = [field.attname for field in Listing._meta.concrete_fields]
+        listing = Listing.from_db('default', fields, [1] + [None] * (len(fields) - 1))
+        saved = self.saved_fields(listing)
+        # Field names, as the post_save receivers compare them.
+        self.assertLessEqual({'vendor', 'category', 'title'}, set(saved))
+        self.assertFalse({*AGGREGATE_FIELDS, 'rating_average'} & set(saved))
+
+    def test_deferred_fields_stay_deferred(self):
+        entity = Entity.from_db('default', ['id', 'name', 'review_count'], [1, 'Shop', 3])
+        self.assertEqual(self.saved_fields(entity), ['name'])
+
+    def test_new_rows_and_explicit_fields_are_untouched(self):
+        self.assertIsNone(self.saved_fields(Entity(name='Shop')))
+        entity = Entity.from_db('default', ['id', 'name', 'review_count'], [1, 'Shop', 3])
+        self.assertEqual(self.saved_fields(entity, update_fields=['review_count']), ['review_count'])
+
+
+class RatingParamsTest(SimpleTestCase):
+    def test_min_rating(self):
+        queryset = filter_min_rating(Listing.objects.all(), QueryDict('min_rating=4.5'))
+        self.assertIn('"rating_average" >= 4.5', str(queryset.query))
+        with self.assertRaises(ValidationError):
+            filter_min_rating(Listing.objects.all(), QueryDict('min_rating=good'))
+
+    def test_ordering(self):
+        self.assertEqual(rating_ordering(QueryDict('ordering=-rating')), ('-rating_average', '-review_count', '-id'))
+        self.assertIsNone(rating_ordering(QueryDict()))
+        with self.assertRaises(ValidationError):
+            rating_ordering(QueryDict('ordering=price'))
+
+
+class ReconcileTest(SimpleTestCase):
+    def test_dry_run_only_counts(self):
+        connection = mock.MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [(3,), (1,)]
+        with mock.patch.object(ratings, 'connection', connection), mock.patch.object(ratings.transaction, 'atomic'):
+            self.assertEqual(reconcile_ratings(dry_run=True), (3, 1))
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertTrue(all('UPDATE' not in sql for sql in statements))
+        self.assertIn('listings_review', statements[0])
+        self.assertIn('entities_entity', statements[1])
@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase, override_settings
+
+from listings.models import Listing
+from listings.search import search_listings
+
+
+class ListingSearchBackendTest(SimpleTestCase):
+    def test_empty_query_is_a_noop(self):
+        queryset = Listing.objects.all()
+        self.assertIs(search_listings(queryset, ''), queryset)
+
+    def test_basic_backend_uses_substring_match(self):
+        sql = str(search_listings(Listing.objects.all(), 'phone', backend='basic').query)
+        self.assertIn('LIKE', sql)
+        self.assertNotIn('@@', sql)
+
+    @override_settings(LISTING_SEARCH_BACKEND='postgres')
+    def test_postgres_backend_uses_indexed_predicates(self):
+        sql = str(search_listings(Listing.objects.all(), 'phone').query)
+        self.assertIn('@@', sql)
+        self.assertIn('"title" %', sql)
+        self.assertIn('ORDER BY', sql)
+
+    @override_settings(LISTING_SEARCH_BACKEND='basic')
+    def test_backend_setting_is_honoured(self):
+        sql = str(search_listings(Listing.objects.all(), 'phone').query)
+        self.assertIn('LIKE', sql)
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts import social_graph
+from accounts.models import User
+from accounts.views import UserViewSet
+
+factory = APIRequestFactory()
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class FakeGraph:
+    """
+    Stand-ins for the User model and the join tables, answering the queries
+    social_graph makes with fixed rows.
+    """
+
+    def __init__(self, users=(), blocks=(), follows=()):
+        self.User = mock.Mock()
+        self.User.objects.filter.return_value.values_list.return_value = list(users)
+        self.tables = {name: mock.MagicMock(name=name) for name in ('following', 'blocked_users')}
+        self.tables['blocked_users'].objects.filter.return_value.values_list.return_value = list(blocks)
+        follow_rows = self.tables['following'].objects.filter.return_value
+        follow_rows.values_list.return_value = list(follows)
+        follow_rows.filter.return_value.delete.return_value = (len(follows), {})
+
+    def patch(self):
+        return mock.patch.multiple(
+            social_graph, _user_model=lambda: self.User, _through=lambda name: self.tables[name]
+        )
+
+
+@override_settings(CACHES=LOCMEM)
+class FollowManyTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User(id=1)
+
+    def test_skips_self_unknown_blocked_and_duplicates(self):
+        # 99 does not exist, 3 blocked us, 4 is already followed.
+        graph = FakeGraph(users=[2, 3, 4, 5], blocks=[(3, 1)], follows=[4])
+        cache.set_many({'social:followers:4': 10, 'social:followers:5': 10})
+        with graph.patch():
+            followed = social_graph.follow_many(self.user, [1, 2, 3, 4, 5, 99, 5])
+        self.assertEqual(followed, 2)
+        graph.User.objects.filter.assert_called_once_with(pk__in={2, 3, 4, 5, 99})
+        Follow = graph.tables['following']
+        (rows,), _ = Follow.objects.bulk_create.call_args
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({call.kwargs['to_user_id'] for call in Follow.call_args_list}, {2, 5})
+        self.assertEqual(cache.get('social:followers:4'), 10)
+        self.assertIsNone(cache.get('social:followers:5'))
+
+    def test_only_unknown_ids_insert_nothing(self):
+        graph = FakeGraph(users=[])
+        with graph.patch():
+            self.assertEqual(social_graph.follow_many(self.user, [98, 99]), 0)
+        graph.tables['following'].objects.bulk_create.assert_not_called()
+
+    def test_unfollow_drops_counts_of_deleted_rows_only(self):
+        graph = FakeGraph(follows=[2])
+        cache.set_many({'social:followers:2': 5, 'social:followers:3': 5})
+        with graph.patch():
+            self.assertEqual(social_graph.unfollow_many(self.user, [2, 3]), 1)
+        self.assertIsNone(cache.get('social:followers:2'))
+        self.assertEqual(cache.get('social:followers:3'), 5)
+
+    def test_counts_are_cached(self):
+        graph = FakeGraph()
+        graph.tables['following'].objects.filter.return_value.count.return_value = 7
+        with graph.patch():
+            self.assertEqual(social_graph.follower_count(self.user), 7)
+            self.assertEqual(social_graph.follower_count(self.user), 7)
+            self.assertEqual(graph.tables['following'].objects.filter.return_value.count.call_count, 1)
+            social_graph._invalidate_follow_counts([self.user.pk])
+            social_graph.follower_count(self.user)
+            self.assertEqual(graph.tables['following'].objects.filter.return_value.count.call_count, 2)
+
+
+class SocialEndpointTest(SimpleTestCase):
+    def setUp(self):
+        self.user = User(id=1, username='me')
+        self.other = User(id=2, username='other')
+
+    def call(self, action, target=None, data=None, detail=True):
+        request = factory.post('/users/x/', data or {}, format='json')
+        force_authenticate(request, user=self.user)
+        view = UserViewSet.as_view({'post': action})
+        with mock.patch.object(UserViewSet, 'get_object', return_value=target):
+            return view(request, pk=getattr(target, 'pk', None)) if detail else view(request)
+
+    def test_cannot_block_or_follow_yourself(self):
+        with mock.patch.object(social_graph, 'block') as block, mock.patch.object(social_graph, 'follow_many') as follow:
+            self.assertEqual(self.call('block', self.user).status_code, 400)
+            self.assertEqual(self.call('follow', self.user).status_code, 400)
+        block.assert_not_called()
+        follow.assert_not_called()
+
+    def test_block(self):
+        with mock.patch.object(social_graph, 'block') as block:
+            self.assertEqual(self.call('block', self.other).status_code, 200)
+        block.assert_called_once_with(self.user, self.other)
+
+    def test_follow_refused_across_a_block(self):
+        with mock.patch.object(social_graph, 'is_blocked', return_value=True):
+            self.assertEqual(self.call('follow', self.other).status_code, 403)
+
+    def test_follow_many_reports_new_follows(self):
+        with mock.patch.object(social_graph, 'follow_many', return_value=1) as follow:
+            response = self.call('follow_many', data={'user_ids': [2, 2, 99]}, detail=False)
+        self.assertEqual(response.data, {'followed': 1})
+        follow.assert_called_once_with(self.user, [2, 2, 99])
+
+    def test_follow_many_validates_ids(self):
+        for user_ids in ('2', [2, 'x'], [True], None):
+            with self.subTest(user_ids=user_ids):
+                response = self.call('follow_many', data={'user_ids': user_ids}, detail=False)
+                self.assertEqual(response.status_code, 400)
+                response = self.call('unfollow_many', data={'user_ids': user_ids}, detail=False)
+                self.assertEqual(response.status_code, 400)
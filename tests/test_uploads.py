@@ -0,0 +1,82 @@
+import io
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from utils.uploads import SniffingUploadHandler, UploadTooLarge, UploadTypeMismatch
+from utils.validators import validate_document_file, validate_image_file
+
+PDF = b'%PDF-1.4\n' + b'0' * 4000
+HTML = b'<!DOCTYPE html><html><body><script>alert(1)</script></body></html>\n'
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (10, 20, 30)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(UPLOAD_MAX_SIZES={'image': 10_000, 'video': 10_000, 'document': 10_000}, UPLOAD_MAX_REQUEST_SIZE=50_000)
+class SniffingUploadHandlerTest(SimpleTestCase):
+    def stream(self, file_name, data, chunk_size=1024, field_name='file'):
+        handler = SniffingUploadHandler()
+        handler.new_file(field_name, file_name, 'application/octet-stream', None)
+        for start in range(0, len(data), chunk_size):
+            self.assertEqual(handler.receive_data_chunk(data[start:start + chunk_size], start), data[start:start + chunk_size])
+        return handler.file_complete(len(data))
+
+    def test_matching_file_passes_through(self):
+        self.assertIsNone(self.stream('logo.png', png_bytes()))
+        self.assertIsNone(self.stream('brochure.pdf', PDF))
+
+    def test_mismatched_type_is_rejected_at_the_first_chunks(self):
+        handler = SniffingUploadHandler()
+        handler.new_file('file', 'logo.png', 'image/png', None)
+        handler.receive_data_chunk(PDF[:1024], 0)
+        with self.assertRaises(UploadTypeMismatch):
+            handler.receive_data_chunk(PDF[1024:2048], 1024)
+
+    def test_oversized_file_is_rejected_mid_stream(self):
+        with self.assertRaises(UploadTooLarge) as cm:
+            self.stream('brochure.pdf', PDF + b'0' * 10_000)
+        self.assertEqual(cm.exception.status_code, 413)
+
+    def test_unknown_extensions_are_not_checked(self):
+        self.assertIsNone(self.stream('listings.csv', b'x' * 20_000))
+
+    def test_validated_fields_refuse_unknown_extensions(self):
+        for file_name in ('logo', 'logo.svg', 'logo.png.html'):
+            with self.subTest(file_name=file_name), self.assertRaises(UploadTypeMismatch):
+                self.stream(file_name, png_bytes(), field_name='logo')
+        self.assertIsNone(self.stream('logo.png', png_bytes(), field_name='logo'))
+
+    def test_validated_fields_keep_the_size_limit(self):
+        with self.assertRaises(UploadTooLarge):
+            self.stream('brochure.pdf', PDF + b'0' * 10_000, field_name='documents')
+
+    def test_sniffed_type_must_match_the_extension(self):
+        with self.assertRaises(UploadTypeMismatch):
+            self.stream('brochure.pdf', HTML, field_name='documents')
+        with self.assertRaises(UploadTypeMismatch):
+            self.stream('notes.txt', PDF, field_name='documents')
+        self.assertIsNone(self.stream('notes.txt', b'plain text\n', field_name='documents'))
+
+    def test_oversized_body_is_refused_before_reading(self):
+        with self.assertRaises(UploadTooLarge):
+            SniffingUploadHandler().handle_raw_input(None, {}, 60_000, b'boundary')
+
+
+class FileValidatorTest(SimpleTestCase):
+    def test_content_must_match_extension(self):
+        validate_image_file(SimpleUploadedFile('logo.png', png_bytes()))
+        validate_document_file(SimpleUploadedFile('notes.txt', b'plain text\n'))
+        with self.assertRaises(ValidationError):
+            validate_image_file(SimpleUploadedFile('logo.png', PDF))
+        with self.assertRaises(ValidationError):
+            validate_image_file(SimpleUploadedFile('logo.bmp', png_bytes()))
+        with self.assertRaises(ValidationError):
+            validate_document_file(SimpleUploadedFile('brochure.pdf', HTML))
+        with self.assertRaises(ValidationError):
+            validate_document_file(SimpleUploadedFile('brochure', PDF))
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from entities.models import Entity
+from listings.models import Listing
+from maps import signals, vector_tiles
+from maps.clusters import cluster_cache_key
+from maps.invalidation import affected_tiles, invalidate_points
+from maps.tiles import MAX_ZOOM, lonlat_to_tile
+from maps.vector_tiles import tile_cache_key
+from maps.views import VectorTileView
+
+DELHI = (77.2167, 28.6315)
+MUMBAI = (72.8777, 19.0760)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class InvalidationTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_one_tile_per_zoom(self):
+        tiles = affected_tiles([DELHI])
+        self.assertEqual(len(tiles), MAX_ZOOM + 1)
+        self.assertIn((12, *lonlat_to_tile(*DELHI, 12)), tiles)
+
+    def test_only_covering_tiles_are_dropped(self):
+        x, y = lonlat_to_tile(*DELHI, 12)
+        far_x, far_y = lonlat_to_tile(*MUMBAI, 12)
+        cache.set_many({
+            tile_cache_key(12, x, y): (b'tile', '"etag"'),
+            cluster_cache_key('entities', 12, x, y): [],
+            cluster_cache_key('listings', 12, x, y): [],
+            tile_cache_key(12, far_x, far_y): (b'tile', '"etag"'),
+        })
+        invalidate_points('entities', [DELHI])
+        self.assertIsNone(cache.get(tile_cache_key(12, x, y)))
+        self.assertIsNone(cache.get(cluster_cache_key('entities', 12, x, y)))
+        self.assertIsNotNone(cache.get(cluster_cache_key('listings', 12, x, y)))
+        self.assertIsNotNone(cache.get(tile_cache_key(12, far_x, far_y)))
+
+
+@mock.patch.object(signals.transaction, 'on_commit', lambda func: func())
+class TileSignalTest(SimpleTestCase):
+    def test_moving_invalidates_old_and_new_location(self):
+        entity = Entity(location=Point(*DELHI, srid=4326))
+        entity.location = Point(*MUMBAI, srid=4326)
+        with mock.patch.object(signals, 'invalidate_points') as invalidate:
+            signals.invalidate_saved_tiles(Entity, entity)
+        invalidate.assert_called_once_with('entities', {DELHI, MUMBAI})
+
+        with mock.patch.object(signals, 'invalidate_points') as invalidate:
+            signals.invalidate_saved_tiles(Entity, entity)
+        invalidate.assert_called_once_with('entities', {MUMBAI})
+
+    def test_unrelated_field_updates_keep_tiles(self):
+        entity = Entity(location=Point(*DELHI, srid=4326))
+        with mock.patch.object(signals, 'invalidate_points') as invalidate:
+            signals.invalidate_saved_tiles(Entity, entity, update_fields=['description'])
+        invalidate.assert_not_called()
+
+    def test_status_changes_drop_listing_tiles(self):
+        listing = Listing(location=Point(*DELHI, srid=4326))
+        with mock.patch.object(signals, 'invalidate_points') as invalidate:
+            signals.invalidate_saved_tiles(Listing, listing, update_fields=['availability_status'])
+        invalidate.assert_called_once_with('listings', {DELHI})
+
+
+class RenderTileTest(SimpleTestCase):
+    def test_only_live_listings_are_drawn(self):
+        with mock.patch.object(vector_tiles, 'connection') as connection:
+            cursor = connection.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (b'',)
+            vector_tiles.render_tile(12, 2925, 1708)
+        listings = cursor.execute.call_args.args[0].split('listings AS (')[1]
+        self.assertIn("AND t.availability_status = 'available'", listings)
+
+
+class VectorTileViewTest(SimpleTestCase):
+    def get(self, z, x, y, **headers):
+        request = APIRequestFactory().get(f'/tiles/{z}/{x}/{y}.mvt', **headers)
+        force_authenticate(request, user=mock.Mock(is_authenticated=True))
+        return VectorTileView.as_view()(request, z=z, x=x, y=y)
+
+    @mock.patch('maps.views.get_tile', return_value=(b'\x1a\x02', '"abc"'))
+    def test_tile_and_etag(self, get_tile):
+        response = self.get(12, 2925, 1708)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertEqual(response['ETag'], '"abc"')
+
+        response = self.get(12, 2925, 1708, HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    @mock.patch('maps.views.get_tile', return_value=(b'', '"empty"'))
+    def test_empty_tile(self, get_tile):
+        self.assertEqual(self.get(3, 1, 1).status_code, 204)
+
+    def test_out_of_range_tile(self):
+        self.assertEqual(self.get(2, 4, 0).status_code, 404)
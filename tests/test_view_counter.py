@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from listings import view_counter
+from listings.view_counter import LocalViewCounter, apply_pending_views, record_view
+
+
+class LocalViewCounterTest(SimpleTestCase):
+    def setUp(self):
+        self.counter = LocalViewCounter()
+
+    def test_increments_are_buffered(self):
+        self.counter.incr(1)
+        self.counter.incr(1)
+        self.counter.incr(2, amount=5)
+        self.assertEqual(self.counter.get_many([1, 2, 3]), {1: 2, 2: 5})
+
+    def test_drain_empties_the_buffer(self):
+        self.counter.incr(1)
+        self.assertEqual(self.counter.drain(), {1: 1})
+        self.assertEqual(self.counter.drain(), {})
+
+    def test_restore_merges_with_new_increments(self):
+        self.counter.incr(1)
+        pending = self.counter.drain()
+        self.counter.incr(1)
+        self.counter.restore(pending)
+        self.assertEqual(self.counter.get_many([1]), {1: 2})
+
+
+class PendingViewsTest(SimpleTestCase):
+    def test_pending_views_are_merged_into_reads(self):
+        with mock.patch.object(view_counter, '_counter', LocalViewCounter()):
+            record_view(7)
+            record_view(7)
+            listings = [SimpleNamespace(pk=7, views=10), SimpleNamespace(pk=8, views=3)]
+            apply_pending_views(listings)
+        self.assertEqual([listing.views for listing in listings], [12, 3])
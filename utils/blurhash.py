@@ -0,0 +1,64 @@
+"""
+BlurHash encoder (https://blurha.sh) on NumPy.
+
+Encodes a small, blurred placeholder for an image as a short string that
+clients decode while the real image loads.
+"""
+import math
+
+import numpy as np
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+# Components are averaged over the whole image, so a thumbnail is plenty.
+SAMPLE_SIZE = 32
+
+
+def _base83(value, length):
+    return ''.join(ALPHABET[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(values):
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _quantise_ac(value, max_value):
+    scaled = math.copysign(abs(value / max_value) ** 0.5, value)
+    return max(0, min(18, int(math.floor(scaled * 9 + 9.5))))
+
+
+def encode(image, x_components=4, y_components=3):
+    """
+    BlurHash of a Pillow image.
+    """
+    sample = image.convert('RGB')
+    sample.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+    pixels = _srgb_to_linear(np.asarray(sample, dtype=float) / 255)
+    height, width = pixels.shape[:2]
+
+    cos_x = np.cos(np.pi * np.outer(np.arange(x_components), np.arange(width)) / width)
+    cos_y = np.cos(np.pi * np.outer(np.arange(y_components), np.arange(height)) / height)
+    # factors[j, i] = mean over pixels of cos_y[j] * cos_x[i] * rgb
+    factors = np.einsum('jy,ix,yxc->jic', cos_y, cos_x, pixels) / (width * height)
+    factors[1:] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+
+    blurhash = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if len(ac):
+        quantised_max = max(0, min(82, int(math.floor(np.abs(ac).max() * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, max_value = 0, 1
+    blurhash += _base83(quantised_max, 1)
+    blurhash += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for r, g, b in ac:
+        blurhash += _base83(_quantise_ac(r, max_value) * 361 + _quantise_ac(g, max_value) * 19 + _quantise_ac(b, max_value), 2)
+    return blurhash
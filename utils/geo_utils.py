@@ -1,8 +1,18 @@
+import math
+
+import numpy as np
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import D
-from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.db.models.functions import Distance, GeometryDistance
 from django.conf import settings
 
+KM_PER_DEGREE = 111.32
+# Mean earth radius (IUGG) and the WGS84 ellipsoid.
+EARTH_RADIUS_KM = 6371.0088
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
 
 def validate_coordinates(latitude, longitude):
     """
@@ -27,9 +37,144 @@ def create_point(latitude, longitude):
 
 def calculate_distance(point1, point2):
     """
-    Calculate the distance between two points in kilometers.
+    Calculate the great-circle distance between two lon/lat points in kilometers.
+    """
+    return float(haversine_km(point1.y, point1.x, point2.y, point2.x))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in kilometers. Arguments are degrees and may be
+    scalars or NumPy arrays; they broadcast, so one point against an array of
+    points is a single call.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def vincenty_km(lat1, lon1, lat2, lon2, max_iterations=200, tolerance=1e-12):
+    """
+    Ellipsoidal (WGS84) distance in kilometers using Vincenty's inverse
+    formula, vectorized like ``haversine_km``. Accurate to well under a metre;
+    nearly antipodal pairs that fail to converge come back as NaN.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    L = lon2 - lon1
+    U1 = np.arctan((1 - WGS84_F) * np.tan(lat1))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(lat2))
+    sin_U1, cos_U1 = np.sin(U1), np.cos(U1)
+    sin_U2, cos_U2 = np.sin(U2), np.cos(U2)
+
+    lam = L
+    converged = np.zeros(np.broadcast(lam, U1, U2).shape, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_U2 * sin_lam, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam)
+            cos_sigma = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            # Coincident points have sin_sigma == 0; their distance is 0 anyway.
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_U1 * cos_U2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # Points on the equator have cos2_alpha == 0.
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_U1 * sin_U2 / cos2_alpha)
+            C = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+            previous = lam
+            lam = L + (1 - C) * WGS84_F * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            converged = np.abs(lam - previous) < tolerance
+            if converged.all():
+                break
+
+        u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+        ))
+        metres = WGS84_B * A * (sigma - delta_sigma)
+    return np.where(converged, metres / 1000, np.nan)
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """
+    Initial compass bearing in degrees [0, 360) from the first point(s) towards
+    the second, vectorized like ``haversine_km``.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+def bounding_box(latitude, longitude, distance_km):
+    """
+    The smallest lon/lat box ``(min_lon, min_lat, max_lon, max_lat)`` that
+    contains every point within ``distance_km`` of the centre. The longitude
+    span widens with latitude; boxes reaching a pole or crossing the
+    antimeridian cover every longitude.
     """
-    return point1.distance(point2) * 100
+    angular = distance_km / EARTH_RADIUS_KM
+    lat, lon = math.radians(float(latitude)), math.radians(float(longitude))
+    min_lat, max_lat = lat - angular, lat + angular
+
+    if min_lat <= -math.pi / 2 or max_lat >= math.pi / 2:
+        return (-180.0, math.degrees(max(min_lat, -math.pi / 2)), 180.0, math.degrees(min(max_lat, math.pi / 2)))
+
+    dlon = math.asin(min(math.sin(angular) / math.cos(lat), 1.0))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -math.pi or max_lon > math.pi:
+        min_lon, max_lon = -math.pi, math.pi
+    return (math.degrees(min_lon), math.degrees(min_lat), math.degrees(max_lon), math.degrees(max_lat))
+
+
+def points_to_arrays(points):
+    """
+    Split a sequence of GEOS points into ``(latitudes, longitudes)`` arrays.
+    """
+    count = len(points)
+    lats = np.fromiter((point.y for point in points), dtype=float, count=count)
+    lons = np.fromiter((point.x for point in points), dtype=float, count=count)
+    return lats, lons
+
+
+def within_radius(lats, lons, latitude, longitude, distance_km):
+    """
+    Vectorized radius filter. Candidates are first cut down with the bounding
+    box, and exact distances are computed only for those. Returns
+    ``(mask, distances_km)``; distances outside the box are ``inf``.
+    """
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    min_lon, min_lat, max_lon, max_lat = bounding_box(latitude, longitude, distance_km)
+    in_box = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+
+    distances = np.full(lats.shape, np.inf)
+    distances[in_box] = haversine_km(latitude, longitude, lats[in_box], lons[in_box])
+    return distances <= distance_km, distances
+
+
+def annotate_distances(objects, point, radius_km=None, field_name='location', attr='distance'):
+    """
+    Set ``attr`` to a ``D`` measure from ``point`` on every object in one
+    vectorized pass, instead of one GEOS or database call per row. With
+    ``radius_km`` only the objects inside the radius are returned.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    lats, lons = points_to_arrays([getattr(obj, field_name) for obj in objects])
+    if radius_km is None:
+        mask, distances = np.ones(len(objects), dtype=bool), haversine_km(point.y, point.x, lats, lons)
+    else:
+        mask, distances = within_radius(lats, lons, point.y, point.x, radius_km)
+
+    for obj, distance in zip(objects, distances.tolist()):
+        setattr(obj, attr, D(km=distance))
+    return [obj for obj, keep in zip(objects, mask.tolist()) if keep]
 
 
 def perform_spatial_query(model, point, distance_km):
@@ -49,12 +194,35 @@ def get_nearby_objects(model, latitude, longitude, distance_km):
     ).order_by('distance')
 
 
+def order_by_nearest(queryset, point, radius_km=None, field_name='location'):
+    """
+    Order a queryset nearest-first using the index-assisted ``<->`` operator.
+
+    Annotates ``knn_distance`` (the KNN ordering key, in SRID units) and
+    ``distance`` (the geodesic distance). When ``radius_km`` is given the
+    candidates are first narrowed with an index-backed ``ST_DWithin`` on a
+    conservative degree radius before the exact distance check.
+    """
+    if radius_km is not None:
+        # A degree of longitude shrinks with latitude, so dividing by the
+        # longitude span gives a radius that always covers the circle.
+        degrees = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(point.y)), 0.01))
+        queryset = queryset.filter(**{
+            f'{field_name}__dwithin': (point, degrees),
+            f'{field_name}__distance_lte': (point, D(km=radius_km)),
+        })
+    return queryset.annotate(
+        knn_distance=GeometryDistance(field_name, point),
+        distance=Distance(field_name, point),
+    ).order_by('knn_distance', 'pk')
+
+
 def get_bounding_box(latitude, longitude, distance_km):
     """
-    Calculate a bounding box for a given point and distance.
+    Calculate a bounding box for a given point and distance, as a GEOS-style
+    extent ``(xmin, ymin, xmax, ymax)``.
     """
-    point = create_point(latitude, longitude)
-    return point.buffer(distance_km / 111.32).extent
+    return bounding_box(latitude, longitude, distance_km)
 
 
 def format_address(street, city, state, country, postal_code):
@@ -0,0 +1,188 @@
+"""
+Background generation of resized image variants.
+
+Uploads are stored as-is. After the row commits, a Celery task renders a WebP
+and a JPEG copy at each size in ``IMAGE_VARIANT_SIZES``, computes a BlurHash
+placeholder and the original dimensions, and records them in the model's
+``<field>_variants`` JSON field::
+
+    {'source': 'listing_images/sofa.png', 'width': 3024, 'height': 4032,
+     'blurhash': 'LEHV6nWB2yk8pyo0adR*.7kCMdnj',
+     'variants': {'thumb': {'webp': 'variants/listing_images/sofa_thumb.webp', ...}, ...}}
+
+``source`` is the file the variants were made from, so re-saving a row without
+a new upload does not queue any work. Variant names are relative to the
+storage of the model's file field, which also serves their URLs; the variants
+of a replaced upload are deleted once the new ones are recorded.
+"""
+import io
+import os
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from . import blurhash
+
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+# Sent with (sender=model, pk=..., field_name=...) after variants are stored.
+variants_ready = Signal()
+
+
+def variants_field_name(field_name):
+    return f'{field_name}_variants'
+
+
+def file_field_name(variants_name):
+    return variants_name[:-len('_variants')]
+
+
+def variant_names(record):
+    """
+    Storage names of every variant file in a record.
+    """
+    return {name for formats in (record or {}).get('variants', {}).values() for name in formats.values()}
+
+
+def delete_variant_files(storage, record, keep=None):
+    """
+    Delete a record's variant files, except those also in ``keep``.
+    """
+    for name in variant_names(record) - variant_names(keep):
+        storage.delete(name)
+
+
+def render_variants(field_file):
+    """
+    Render and store every variant of an image file; returns the record to
+    keep in ``<field>_variants``.
+    """
+    with field_file.open('rb') as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+    width, height = image.size
+    image = image.convert('RGB')
+
+    base, _ = os.path.splitext(field_file.name)
+    variants = {}
+    for size_name, max_side in settings.IMAGE_VARIANT_SIZES.items():
+        resized = image.copy()
+        # Never upscale; a small original is just re-encoded.
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        variants[size_name] = {}
+        for extension, options in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, **options)
+            name = field_file.storage.save(f'variants/{base}_{size_name}.{extension}', ContentFile(buffer.getvalue()))
+            variants[size_name][extension] = name
+
+    return {
+        'source': field_file.name,
+        'width': width,
+        'height': height,
+        'blurhash': blurhash.encode(image),
+        'variants': variants,
+    }
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60, ignore_result=True)
+def generate_image_variants(self, model_label, pk, field_name):
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('pk', field_name).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return
+
+    try:
+        record = render_variants(field_file)
+    except (OSError, Image.DecompressionBombError) as e:
+        # Unreadable or not an image: record the failure rather than retrying forever.
+        if isinstance(e, Image.DecompressionBombError) or self.request.retries >= self.max_retries:
+            record = {'source': field_file.name, 'error': str(e)}
+        else:
+            raise self.retry(exc=e)
+
+    variants_field = variants_field_name(field_name)
+    with transaction.atomic():
+        # Only store the result if the file was not replaced while we worked.
+        row = (
+            model.objects.select_for_update().filter(pk=pk, **{field_name: field_file.name})
+            .values_list('pk', variants_field).first()
+        )
+        if row is not None:
+            model.objects.filter(pk=pk).update(**{variants_field: record})
+    if row is None:
+        # The upload was replaced (or the row deleted); nothing refers to these.
+        delete_variant_files(field_file.storage, record)
+        return
+    delete_variant_files(field_file.storage, row[1], keep=record)
+    variants_ready.send(sender=model, pk=pk, field_name=field_name)
+
+
+def schedule_image_variants(instance, field_name):
+    """
+    Queue variant generation after commit if the image changed since the
+    variants were last made. Call from a ``post_save`` receiver.
+    """
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field_name(field_name)) or {}
+    if not field_file or variants.get('source') == field_file.name:
+        return
+    model_label, pk = instance._meta.label, instance.pk
+    transaction.on_commit(lambda: generate_image_variants.delay(model_label, pk, field_name))
+
+
+def variant_urls(record, request=None, storage=None):
+    """
+    The public form of a variants record: URLs instead of storage names, from
+    ``storage`` (the file field's; ``default_storage`` if not given). ``None``
+    until the variants exist.
+    """
+    if not record or 'variants' not in record:
+        return None
+    storage = storage or default_storage
+
+    def url(name):
+        location = storage.url(name)
+        return request.build_absolute_uri(location) if request is not None else location
+
+    return {
+        'width': record['width'],
+        'height': record['height'],
+        'blurhash': record['blurhash'],
+        'variants': {
+            size_name: {extension: url(name) for extension, name in formats.items()}
+            for size_name, formats in record['variants'].items()
+        },
+    }
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only serializer field for a ``<field>_variants`` record. URLs come
+    from the storage of ``<field>``.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        storage = instance._meta.get_field(file_field_name(self.source)).storage
+        return super().get_attribute(instance), storage
+
+    def to_representation(self, value):
+        record, storage = value
+        return variant_urls(record, self.context.get('request'), storage)
@@ -1,5 +1,29 @@
 from rest_framework import permissions
 
+from entities.roles import can_edit_entity, is_entity_admin
+
+
+def get_entity_id(obj):
+    """
+    The id of the entity an object belongs to: the entity itself, or the
+    ``entity``/``vendor`` it points at.
+    """
+    from entities.models import Entity
+    if isinstance(obj, Entity):
+        return obj.pk
+    for attr in ('entity_id', 'vendor_id'):
+        entity_id = getattr(obj, attr, None)
+        if entity_id is not None:
+            return entity_id
+    return None
+
+
+def get_view_entity_id(view):
+    try:
+        return int(view.kwargs.get('entity_id'))
+    except (TypeError, ValueError):
+        return None
+
 class IsEntityAdmin(permissions.BasePermission):
     """
     Custom permission to only allow entity admins to edit the entity.
@@ -12,7 +36,7 @@ class IsEntityAdmin(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the admin of the entity.
-        return obj.admin == request.user
+        return is_entity_admin(request, get_entity_id(obj))
 
 class IsEntityCollaborator(permissions.BasePermission):
     """
@@ -25,8 +49,8 @@ class IsEntityCollaborator(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        # Check if the user is a collaborator of the entity
-        return request.user in obj.collaborators.all()
+        # Check if the user is a collaborator of the entity (admins included)
+        return can_edit_entity(request, get_entity_id(obj))
 
 class IsEntityAdminOrCollaborator(permissions.BasePermission):
     """
@@ -40,7 +64,7 @@ class IsEntityAdminOrCollaborator(permissions.BasePermission):
             return True
 
         # Check if the user is either the admin or a collaborator
-        return obj.admin == request.user or request.user in obj.collaborators.all()
+        return can_edit_entity(request, get_entity_id(obj))
 
 class CanManageProducts(permissions.BasePermission):
     """
@@ -48,11 +72,9 @@ class CanManageProducts(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        entity_id = view.kwargs.get('entity_id')
+        entity_id = get_view_entity_id(view)
         if entity_id:
-            from entities.models import Entity
-            entity = Entity.objects.get(id=entity_id)
-            return entity.admin == request.user or request.user in entity.collaborators.all()
+            return can_edit_entity(request, entity_id)
         return False
 
 class CanManageCollections(permissions.BasePermission):
@@ -61,11 +83,9 @@ class CanManageCollections(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        entity_id = view.kwargs.get('entity_id')
+        entity_id = get_view_entity_id(view)
         if entity_id:
-            from entities.models import Entity
-            entity = Entity.objects.get(id=entity_id)
-            return entity.admin == request.user or request.user in entity.collaborators.all()
+            return can_edit_entity(request, entity_id)
         return False
 
 class CanPostContent(permissions.BasePermission):
@@ -74,11 +94,9 @@ class CanPostContent(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        entity_id = view.kwargs.get('entity_id')
+        entity_id = get_view_entity_id(view)
         if entity_id:
-            from entities.models import Entity
-            entity = Entity.objects.get(id=entity_id)
-            return entity.admin == request.user or request.user in entity.collaborators.all()
+            return can_edit_entity(request, entity_id)
         return False
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -93,4 +111,4 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the owner of the object.
-        return obj.user == request.user
\ No newline at end of file
+        return obj.user_id == request.user.pk
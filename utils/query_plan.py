@@ -0,0 +1,156 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def parse_names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def field_spec(request):
+    """
+    ``(fields, expand)`` from ``?fields=`` and ``?expand=``. Only read on
+    safe methods, so a write always validates and returns the full shape.
+    ``fields`` is ``None`` when not given.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    fields = parse_names(request.query_params.get('fields'))
+    return fields or None, parse_names(request.query_params.get('expand'))
+
+
+def nested_spec(spec, name):
+    """
+    The part of a spec addressed to the nested field ``name``: ``listings.title``
+    becomes ``title`` for the ``listings`` serializer.
+    """
+    fields, expand = spec
+    prefix = f'{name}.'
+    nested_fields = {field[len(prefix):] for field in fields or () if field.startswith(prefix)}
+    return nested_fields or None, {field[len(prefix):] for field in expand if field.startswith(prefix)}
+
+
+def _lookup_root(lookup):
+    path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+    return path.split('__')[0]
+
+
+class QueryPlanMixin:
+    """
+    Lets a serializer declare the related rows it reads, so the view can load
+    them up front instead of issuing queries per serialized object.
+
+    Also gives the serializer sparse fieldsets: ``?fields=id,title`` keeps
+    only those fields, and relations named in ``expandable_fields`` are left
+    out unless ``?expand=`` asks for them (a foreign key then collapses to
+    its id). Dotted names (``?expand=listings.images``) reach nested
+    serializers. The query plan follows the same selection, so an unrequested
+    relation is neither serialized nor loaded.
+
+    Nested serializers with a different shape override ``setup_eager_loading``.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    annotations = {}
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._field_spec = None if fields is None and expand is None else (fields, set(expand or ()))
+
+    @classmethod
+    def field_selector(cls, spec=(None, ())):
+        """
+        A function telling, for a field name, whether it is serialized in
+        full (``'full'``), as the id of an unexpanded foreign key (``'id'``),
+        or not at all (``None``).
+        """
+        fields, expand = spec
+        fields = fields and {name.split('.')[0] for name in fields}
+        expand = {name.split('.')[0] for name in expand}
+
+        def select(name):
+            if name in expand:
+                return 'full'
+            if fields and name not in fields:
+                return None
+            if name not in cls.expandable_fields:
+                return 'full'
+            if cls._is_foreign_key(name):
+                return 'id'
+            # Naming an unexpanded reverse relation in ?fields= expands it.
+            return 'full' if fields else None
+        return select
+
+    @classmethod
+    def _is_foreign_key(cls, name):
+        try:
+            field = cls.Meta.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and (field.many_to_one or field.one_to_one)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, spec=(None, ())):
+        select = cls.field_selector(spec)
+
+        def selected(name):
+            return select(name) == 'full'
+
+        select_related = [lookup for lookup in cls.select_related_fields if selected(_lookup_root(lookup))]
+        prefetch_related = [lookup for lookup in cls.prefetch_related_fields if selected(_lookup_root(lookup))]
+        annotations = {name: expression for name, expression in cls.annotations.items() if selected(name)}
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def get_field_spec(self):
+        if self._field_spec is not None:
+            return self._field_spec
+        parent = getattr(self, 'parent', None)
+        is_root = parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+        return field_spec(self.context.get('request')) if is_root else (None, set())
+
+    def get_fields(self):
+        spec = self.get_field_spec()
+        select = self.field_selector(spec)
+        fields = {}
+        for name, field in super().get_fields().items():
+            mode = select(name)
+            if mode == 'full':
+                child = getattr(field, 'child', field)
+                if isinstance(child, QueryPlanMixin):
+                    child._field_spec = nested_spec(spec, name)
+                fields[name] = field
+            elif mode == 'id':
+                # Read from <name>_id, so no query.
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+
+def plan_queryset(queryset, serializer_class, request=None):
+    """
+    Apply the serializer's query plan to a queryset, if it declares one for
+    the queryset's model, trimmed to the fields the request asked for.
+    """
+    setup = getattr(serializer_class, 'setup_eager_loading', None)
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    if setup is None or model is not queryset.model:
+        return queryset
+    return setup(queryset, field_spec(request))
+
+
+class QueryPlanViewSetMixin:
+    """
+    Applies the active serializer's query plan to ``get_queryset()``. Custom
+    actions that build their own querysets should call ``plan_queryset``.
+    """
+
+    def get_queryset(self):
+        return plan_queryset(super().get_queryset(), self.get_serializer_class(), self.request)
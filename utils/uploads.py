@@ -0,0 +1,175 @@
+"""
+Streaming upload checks.
+
+``SniffingUploadHandler`` sits in front of Django's temporary-file handler. It
+looks at each chunk as it streams past: the form field (for the fields in
+``UPLOAD_FIELD_KINDS``) or else the declared extension picks an upload kind
+(image, video, document), the first bytes are sniffed with libmagic and must
+be a type allowed for that extension, and the running size is compared with
+the kind's limit. A mismatched or oversized file aborts the request at that
+chunk, before the rest of the body is read. A validated field refuses
+extensions its kind does not list; files in other fields with other
+extensions (e.g. CSV imports) stream through untouched.
+
+Chunks go straight to a temporary file, so memory per upload is one chunk
+whatever the file size.
+"""
+import os
+
+import magic
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Enough for libmagic to recognise every type below.
+SNIFF_BYTES = 2048
+
+# Per kind, each accepted extension and the sniffed types allowed for it.
+UPLOAD_KINDS = {
+    'image': {
+        'extensions': {
+            'jpg': {'image/jpeg'},
+            'jpeg': {'image/jpeg'},
+            'png': {'image/png'},
+            'gif': {'image/gif'},
+        },
+        'message': _("Unsupported image format. Please use JPG, JPEG, PNG, or GIF."),
+    },
+    'video': {
+        'extensions': {
+            'mp4': {'video/mp4', 'video/x-m4v'},
+            'avi': {'video/x-msvideo'},
+            'mov': {'video/quicktime'},
+            'wmv': {'video/x-ms-wmv', 'video/x-ms-asf'},
+        },
+        'message': _("Unsupported video format. Please use MP4, AVI, MOV, or WMV."),
+    },
+    'document': {
+        'extensions': {
+            'pdf': {'application/pdf'},
+            # Word 97-2003 files are OLE containers; libmagic names them either way.
+            'doc': {'application/msword', 'application/CDFV2'},
+            # .docx is a zip container; some libmagic builds only report that.
+            'docx': {'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/zip'},
+            'txt': {'text/plain'},
+        },
+        'message': _("Unsupported document format. Please use PDF, DOC, DOCX, or TXT."),
+    },
+}
+
+# Multipart fields that only accept one kind, whatever the file is called.
+UPLOAD_FIELD_KINDS = {
+    'logo': 'image',
+    'image': 'image',
+    'profile_picture': 'image',
+    'documents': 'document',
+}
+
+
+class UploadRejected(APIException, SuspiciousOperation):
+    """
+    Raised from the upload handler. DRF views turn it into a JSON error;
+    plain Django views answer 400 as for any SuspiciousOperation.
+    """
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = 'upload_rejected'
+
+
+class UploadTooLarge(UploadRejected):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = 'upload_too_large'
+
+
+class UploadTypeMismatch(UploadRejected):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_code = 'upload_type_mismatch'
+
+
+def file_extension(file_name):
+    return os.path.splitext(file_name or '')[1].lstrip('.').lower()
+
+
+def upload_kind(file_name, field_name=None):
+    """
+    The kind a file is checked as: its field's kind for the fields in
+    ``UPLOAD_FIELD_KINDS``, otherwise the kind listing its extension, or
+    ``None`` for neither.
+    """
+    if field_name in UPLOAD_FIELD_KINDS:
+        return UPLOAD_FIELD_KINDS[field_name]
+    extension = file_extension(file_name)
+    for kind, policy in UPLOAD_KINDS.items():
+        if extension in policy['extensions']:
+            return kind
+    return None
+
+
+def max_upload_size(kind):
+    return settings.UPLOAD_MAX_SIZES[kind]
+
+
+def size_message(kind):
+    return _('File too large. Size should not exceed %(size)d MB.') % {'size': max_upload_size(kind) // (1024 * 1024)}
+
+
+def sniff_mime_type(head):
+    return magic.from_buffer(bytes(head), mime=True)
+
+
+def extension_allowed(kind, file_name):
+    return file_extension(file_name) in UPLOAD_KINDS[kind]['extensions']
+
+
+def mime_type_allowed(kind, file_name, mime_type):
+    """
+    Whether a sniffed type is one allowed for the file's extension: a
+    ``.pdf`` must sniff as a PDF, not merely as some document type.
+    """
+    return mime_type in UPLOAD_KINDS[kind]['extensions'].get(file_extension(file_name), ())
+
+
+class SniffingUploadHandler(FileUploadHandler):
+    """
+    Pass-through handler that rejects oversized or mislabelled files while
+    they stream. Must come before the handler that stores the data.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # The whole body is over the cap: refuse before reading any of it.
+        if content_length and content_length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            raise UploadTooLarge(_('Request body too large.'))
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.kind = upload_kind(self.file_name, self.field_name)
+        if self.kind is not None and not extension_allowed(self.kind, self.file_name):
+            raise UploadTypeMismatch(UPLOAD_KINDS[self.kind]['message'])
+        self.size = 0
+        self.head = bytearray()
+        self.sniffed = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.kind is None:
+            return raw_data
+        self.size += len(raw_data)
+        if self.size > max_upload_size(self.kind):
+            raise UploadTooLarge(size_message(self.kind))
+        if not self.sniffed:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Files shorter than SNIFF_BYTES are checked once they end.
+        if self.kind is not None and not self.sniffed:
+            self.check_type()
+        return None
+
+    def check_type(self):
+        self.sniffed = True
+        if not mime_type_allowed(self.kind, self.file_name, sniff_mime_type(self.head)):
+            raise UploadTypeMismatch(UPLOAD_KINDS[self.kind]['message'])
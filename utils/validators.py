@@ -1,9 +1,10 @@
 from django.core.exceptions import ValidationError
-from django.core.validators import FileExtensionValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.gis.geos import Point
 import re
 
+from .uploads import SNIFF_BYTES, UPLOAD_KINDS, extension_allowed, max_upload_size, mime_type_allowed, sniff_mime_type
+
 def validate_coordinates(latitude, longitude):
     try:
         point = Point(float(longitude), float(latitude))
@@ -28,37 +29,39 @@ def validate_website_url(value):
     if not url_regex.match(value):
         raise ValidationError(_("Invalid URL format. Please provide a valid URL."))
 
-def validate_file_size(value):
-    limit = 5 * 1024 * 1024  # 5 MB
+def validate_file_size(value, limit=5 * 1024 * 1024):
     if value.size > limit:
-        raise ValidationError(_('File too large. Size should not exceed 5 MB.'))
+        raise ValidationError(_('File too large. Size should not exceed %(size)d MB.') % {'size': limit // (1024 * 1024)})
+
+def validate_file_content(value, kind):
+    """
+    Check an upload's extension and its sniffed content against ``kind``.
+    The upload handler has usually done this already while streaming; this
+    covers files that arrive by other routes.
+    """
+    policy = UPLOAD_KINDS[kind]
+    validate_file_size(value, max_upload_size(kind))
+    if not extension_allowed(kind, value.name):
+        raise ValidationError(policy['message'])
+
+    # Files already in storage were checked on upload.
+    if getattr(value, '_committed', False):
+        return
+    position = value.tell()
+    value.seek(0)
+    head = value.read(SNIFF_BYTES)
+    value.seek(position)
+    if not mime_type_allowed(kind, value.name, sniff_mime_type(head)):
+        raise ValidationError(policy['message'])
 
 def validate_image_file(value):
-    validate_file_size(value)
-    valid_extensions = ['jpg', 'jpeg', 'png', 'gif']
-    ext_validator = FileExtensionValidator(allowed_extensions=valid_extensions)
-    try:
-        ext_validator(value)
-    except ValidationError:
-        raise ValidationError(_("Unsupported image format. Please use JPG, JPEG, PNG, or GIF."))
+    validate_file_content(value, 'image')
 
 def validate_video_file(value):
-    validate_file_size(value)
-    valid_extensions = ['mp4', 'avi', 'mov', 'wmv']
-    ext_validator = FileExtensionValidator(allowed_extensions=valid_extensions)
-    try:
-        ext_validator(value)
-    except ValidationError:
-        raise ValidationError(_("Unsupported video format. Please use MP4, AVI, MOV, or WMV."))
+    validate_file_content(value, 'video')
 
 def validate_document_file(value):
-    validate_file_size(value)
-    valid_extensions = ['pdf', 'doc', 'docx', 'txt']
-    ext_validator = FileExtensionValidator(allowed_extensions=valid_extensions)
-    try:
-        ext_validator(value)
-    except ValidationError:
-        raise ValidationError(_("Unsupported document format. Please use PDF, DOC, DOCX, or TXT."))
+    validate_file_content(value, 'document')
 
 def validate_price(value):
     if value < 0: